@@ -1,13 +1,16 @@
+import asyncio
 import logging
 import time
 from urllib.parse import quote_plus
 
-import requests
 from bs4 import BeautifulSoup
-from crawl4ai import AsyncWebCrawler
 from ddgs import DDGS
 from ollama import chat
 
+from src.services.browser_pool import BROWSER_POOL
+from src.services.web_cache import SEARCH_RESULTS_TTL_SECONDS, WEB_PAGE_CACHE
+from src.services.web_fetch_client import WEB_FETCH_CLIENT
+
 logger = logging.getLogger("uvicorn.error")
 
 def check_if_search_is_needed(query: str) -> bool:
@@ -78,18 +81,39 @@ def reformulate_query_into_internet_search(query: str) -> str:
     # Return the boolean result based on the LLM's response
     return response.message.content 
 
-def run_web_search(query: str, max_results: int = 3) -> list[dict]:
+async def run_web_search(query: str, max_results: int = 3) -> list[dict]:
+    search_cache_key = f"{max_results}:{' '.join(query.lower().split())}"
+    cached_results = await asyncio.to_thread(WEB_PAGE_CACHE.lookup_document, "search", search_cache_key)
+    if cached_results is not None:
+        logger.info("Serving cached web search results for query: %s", query)
+        return cached_results
+
+    results = await search_web_uncached(query, max_results)
+    if results:
+        await asyncio.to_thread(
+            WEB_PAGE_CACHE.store_document,
+            "search",
+            search_cache_key,
+            results,
+            SEARCH_RESULTS_TTL_SECONDS,
+        )
+
+    return results
+
+
+async def search_web_uncached(query: str, max_results: int) -> list[dict]:
     logger.info("Running web search for query: %s", query)
 
     try:
-        results = run_ddgs_search(query, max_results)
+        # DDGS is a blocking client, so keep it off the event loop
+        results = await asyncio.to_thread(run_ddgs_search, query, max_results)
         if results:
             logger.info("DDGS search returned %s results", len(results))
             return results
     except Exception:
         logger.exception("DDGS search failed for query: %s", query)
 
-    fallback_results = run_duckduckgo_html_search(query, max_results)
+    fallback_results = await run_duckduckgo_html_search(query, max_results)
     logger.info("Fallback HTML search returned %s results", len(fallback_results))
     return fallback_results
 
@@ -114,23 +138,20 @@ def run_ddgs_search(query: str, max_results: int) -> list[dict]:
     return results
 
 
-def run_duckduckgo_html_search(query: str, max_results: int) -> list[dict]:
+async def run_duckduckgo_html_search(query: str, max_results: int) -> list[dict]:
     search_url = f"https://duckduckgo.com/html/?q={quote_plus(query)}"
 
     try:
-        response = requests.get(
-            search_url,
-            timeout=20,
-            headers={
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) Tars/0.1",
-            },
-        )
-        response.raise_for_status()
+        search_html = await WEB_FETCH_CLIENT.fetch_text_hedged(search_url)
     except Exception:
         logger.exception("DuckDuckGo HTML fallback search failed for query: %s", query)
         return []
 
-    soup = BeautifulSoup(response.text, "html.parser")
+    return parse_duckduckgo_html_results(search_html, max_results)
+
+
+def parse_duckduckgo_html_results(search_html: str, max_results: int) -> list[dict]:
+    soup = BeautifulSoup(search_html, "html.parser")
     results = []
 
     for result_node in soup.select(".result"):
@@ -190,7 +211,5 @@ def select_best_link(question: str, links: list[dict]) -> dict:
         return links[0]  # fallback
     
 async def crawl_page_markdown(url: str) -> str:
-    async with AsyncWebCrawler() as crawler:
-        print(url)
-        result = await crawler.arun(url=url)
-        return result.markdown
+    # The pool keeps one browser warm, so each crawl pays for navigation rather than a browser launch
+    return await BROWSER_POOL.crawl_markdown(url)
@@ -1,7 +1,11 @@
+import asyncio
 import logging
 import json
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable
+
+from src.agents.tool_result_cache import TOOL_RESULT_CACHE
 
 logger = logging.getLogger("uvicorn.error")
 
@@ -51,15 +55,16 @@ def write_file(path: str, content: str) -> str:
 # Search tools
 # -------------------------
 
-def web_search(query: str, max_results: int = 5) -> str:
+async def web_search(query: str, max_results: int = 5) -> str:
     try:
         from search.web_search import run_web_search
+        from src.services.web_content_service import add_page_excerpts
     except Exception as error:
         logger.exception("Could not import run_web_search")
         return f"Error: web search is unavailable: {error}"
 
     try:
-        results = run_web_search(query, max_results)
+        results = await run_web_search(query, max_results)
     except Exception as error:
         logger.exception("Web search failed for query: %s", query)
         return f"Error: web search failed: {error}"
@@ -67,14 +72,19 @@ def web_search(query: str, max_results: int = 5) -> str:
     if not results:
         return "No web search results were found."
 
+    results = await add_page_excerpts(results[:max_results], query=query)
+
     formatted_results = []
-    for index, result in enumerate(results[:max_results], start=1):
+    for index, result in enumerate(results, start=1):
         title = str(result.get("title", "")).strip()
         snippet = str(result.get("snippet", "")).strip()
         url = str(result.get("url", "")).strip()
-        formatted_results.append(
-            f"[{index}] {title}\nSnippet: {snippet}\nURL: {url}",
-        )
+        formatted_result = f"[{index}] {title}\nSnippet: {snippet}\nURL: {url}"
+        excerpt = str(result.get("excerpt", "")).strip()
+        if excerpt:
+            formatted_result += f"\nPage excerpt: {excerpt}"
+
+        formatted_results.append(formatted_result)
 
     return "\n\n".join(formatted_results)
 
@@ -186,9 +196,107 @@ PLANNER_TOOLS = [
     }
 ]
 
-TOOL_MAP = {
-    "read_file": read_file,
-    "write_file": write_file,
-    "web_search": web_search,
-    "plan_steps": plan_steps
+# -------------------------
+# Tool execution
+# -------------------------
+
+DEFAULT_TOOL_TIMEOUT_SECONDS = 30.0
+WEB_SEARCH_CACHE_TTL_SECONDS = 10 * 60
+
+
+def read_file_cache_key(arguments: dict[str, Any]) -> str:
+    try:
+        resolved_path = resolve_workspace_path(str(arguments.get("path", "")))
+        file_stat = resolved_path.stat()
+    except (OSError, ValueError):
+        return ""
+
+    # Any write changes mtime or size, so an outdated entry is never looked up again
+    return f"read_file:{resolved_path}:{file_stat.st_mtime_ns}:{file_stat.st_size}"
+
+
+def web_search_cache_key(arguments: dict[str, Any]) -> str:
+    normalized_query = " ".join(str(arguments.get("query", "")).lower().split())
+    if not normalized_query:
+        return ""
+
+    return f"web_search:{arguments.get('max_results', 5)}:{normalized_query}"
+
+
+@dataclass(frozen=True)
+class ToolHandler:
+    function: Callable[..., Any]
+    is_async: bool = False
+    timeout_seconds: float = DEFAULT_TOOL_TIMEOUT_SECONDS
+    # Calls naming the same value for this argument run in request order instead of concurrently
+    resource_argument: str = ""
+    # Returns the result cache key for a call, or "" when the call should not be cached
+    cache_key: Callable[[dict[str, Any]], str] | None = None
+    cache_ttl_seconds: float | None = None
+
+
+@dataclass(frozen=True)
+class ToolRunResult:
+    value: Any
+    cache_hit: bool = False
+
+
+TOOL_HANDLERS = {
+    "read_file": ToolHandler(
+        read_file,
+        timeout_seconds=10.0,
+        resource_argument="path",
+        cache_key=read_file_cache_key,
+    ),
+    "write_file": ToolHandler(write_file, timeout_seconds=10.0, resource_argument="path"),
+    "web_search": ToolHandler(
+        web_search,
+        is_async=True,
+        timeout_seconds=25.0,
+        cache_key=web_search_cache_key,
+        cache_ttl_seconds=WEB_SEARCH_CACHE_TTL_SECONDS,
+    ),
 }
+
+
+async def run_tool(tool_name: str, arguments: dict[str, Any]) -> Any:
+    tool_run_result = await run_tool_with_cache(tool_name, arguments)
+    return tool_run_result.value
+
+
+async def run_tool_with_cache(tool_name: str, arguments: dict[str, Any]) -> ToolRunResult:
+    tool_handler = TOOL_HANDLERS[tool_name]
+    cache_key = tool_handler.cache_key(arguments) if tool_handler.cache_key is not None else ""
+    if cache_key:
+        cached_value = TOOL_RESULT_CACHE.get(cache_key)
+        if cached_value is not None:
+            return ToolRunResult(value=cached_value, cache_hit=True)
+
+    if tool_handler.is_async:
+        tool_call = tool_handler.function(**arguments)
+    else:
+        # Sync handlers do blocking file and network I/O, so keep them off the event loop
+        tool_call = asyncio.to_thread(tool_handler.function, **arguments)
+
+    value = await asyncio.wait_for(tool_call, timeout=tool_handler.timeout_seconds)
+
+    # Tools report failures as "Error: ..." text, which should be retried rather than remembered
+    if cache_key and not str(value).startswith("Error"):
+        TOOL_RESULT_CACHE.put(cache_key, value, ttl_seconds=tool_handler.cache_ttl_seconds)
+
+    return ToolRunResult(value=value)
+
+
+def tool_resource_key(tool_name: str, arguments: dict[str, Any]) -> str:
+    tool_handler = TOOL_HANDLERS.get(tool_name)
+    if tool_handler is None or not tool_handler.resource_argument:
+        return ""
+
+    resource = str(arguments.get(tool_handler.resource_argument, ""))
+    if tool_handler.resource_argument != "path":
+        return resource
+
+    try:
+        return str(resolve_workspace_path(resource))
+    except ValueError:
+        return resource
@@ -40,9 +40,10 @@ async def extract_expected_outcomes(
      - Do not explain.
     """
 
-    response = model_manager.ask_model(
+    response = await model_manager.ask_model(
         model,
-        [Message(role="user", content=prompt)]
+        [Message(role="user", content=prompt)],
+        prompt_family="planner",
     )
 
     text = response.strip()
@@ -3,7 +3,7 @@ import json
 import logging
 from typing import Any
 
-from src.agents.agent_utils import TOOL_MAP, TOOLS
+from src.agents.agent_utils import TOOL_HANDLERS, TOOLS, run_tool
 from src.config.Model import Model
 from src.infer.ModelManager import ModelManager
 from src.message_structures.message import Message
@@ -59,11 +59,12 @@ async def execute_step(
     ***
     """
 
-    response = model_manager.ask_model(
+    response = await model_manager.ask_model(
         model,
         [Message(role="user", content=prompt)],
         tools=TOOLS,
         tool_choice="auto",
+        prompt_family="worker",
     )
 
     if isinstance(response, str):
@@ -74,15 +75,14 @@ async def execute_step(
             continue
 
         function = part["function"]
-        handler = TOOL_MAP.get(function["name"])
-        if not handler:
+        if function["name"] not in TOOL_HANDLERS:
             continue
 
         arguments = function["arguments"]
         if isinstance(arguments, str):
             arguments = json.loads(arguments)
 
-        result = handler(**arguments)
+        result = await run_tool(function["name"], arguments)
         logger.info("Tool call executed: %s(%s)", function["name"], arguments)
 
         context.append({
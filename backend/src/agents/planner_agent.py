@@ -1,15 +1,19 @@
 # src/agents/planner_agent.py
-import json
 import logging
 from typing import List, Dict, Any
 
 from src.config.Model import Model
 from src.infer.ModelManager import ModelManager
 from src.message_structures.message import Message
-from src.agents.agent_utils import PLANNER_TOOLS, TOOL_MAP
+from src.agents.agent_utils import PLANNER_TOOLS
 
 logger = logging.getLogger("uvicorn.error")
 
+PLAN_STEPS_SCHEMA = {
+    **PLANNER_TOOLS[0]["function"]["parameters"],
+    "required": ["steps"],
+}
+
 
 async def plan_for_outcome(
     query: str,
@@ -62,29 +66,19 @@ async def plan_for_outcome(
     - If the outcome is already satisfied return no steps.
     - Executor agents have access to the following tools: [`read_file`, `write_file`, `web_search`]. Clearly instruct the executor agents when to use tools and when to respond without tool calls by **explicitly telling them not to use tools within the prompt**
 
-    Return steps using plan_steps.
+    Respond with a JSON object whose `steps` list holds each step's `step` and `prompt`.
     """
 
-    response = model_manager.ask_model(
+    parsed = await model_manager.ask_model_structured(
         model,
         [Message(role="user", content=prompt)],
-        tools=PLANNER_TOOLS,
-        tool_choice="required",
+        schema_name="plan_steps",
+        schema=PLAN_STEPS_SCHEMA,
+        prompt_family="planner",
     )
 
-    for call in response:
-        if call.get("type") != "function":
-            continue
-
-        function = call["function"]
-        if function["name"] != "plan_steps":
-            continue
-
-        normalized = TOOL_MAP["plan_steps"](function["arguments"])
-        parsed = json.loads(normalized)
-
-        steps = parsed.get("steps", [])
-        return steps
+    if parsed is not None:
+        return parsed.get("steps", [])
 
     logger.error("❌ Planner failed to return steps")
     return []
@@ -0,0 +1,77 @@
+import json
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+
+logger = logging.getLogger("uvicorn.error")
+
+DEFAULT_MAX_MEMORY_BYTES = 32 * 1024 * 1024
+
+
+@dataclass
+class CachedToolResult:
+    value: Any
+    size_bytes: int
+    expires_at: float | None
+
+
+class ToolResultCache:
+    """In-memory LRU of tool results, bounded by the approximate size of the cached values.
+
+    Callers build keys that already encode freshness, such as a file's mtime and size, so a stale
+    entry is simply never looked up again and ages out. Entries can also carry a TTL for results
+    that have no such signal, like web searches.
+    """
+
+    def __init__(self, max_memory_bytes: int = DEFAULT_MAX_MEMORY_BYTES):
+        self.max_memory_bytes = max_memory_bytes
+        self.memory_bytes = 0
+        self.entries: OrderedDict[str, CachedToolResult] = OrderedDict()
+
+    def get(self, key: str) -> Any | None:
+        cached_result = self.entries.get(key)
+        if cached_result is None:
+            return None
+
+        if cached_result.expires_at is not None and time.time() > cached_result.expires_at:
+            self.discard(key)
+            return None
+
+        self.entries.move_to_end(key)
+        return cached_result.value
+
+    def put(self, key: str, value: Any, ttl_seconds: float | None = None) -> None:
+        size_bytes = estimate_size_bytes(value)
+        # One oversized result would flush everything else for a single hit
+        if size_bytes > self.max_memory_bytes // 4:
+            logger.info("Skipping tool result cache for a %s byte result", size_bytes)
+            return
+
+        self.discard(key)
+        self.entries[key] = CachedToolResult(
+            value=value,
+            size_bytes=size_bytes,
+            expires_at=time.time() + ttl_seconds if ttl_seconds is not None else None,
+        )
+        self.memory_bytes += size_bytes
+        while self.memory_bytes > self.max_memory_bytes:
+            _, evicted_result = self.entries.popitem(last=False)
+            self.memory_bytes -= evicted_result.size_bytes
+
+    def discard(self, key: str) -> None:
+        cached_result = self.entries.pop(key, None)
+        if cached_result is not None:
+            self.memory_bytes -= cached_result.size_bytes
+
+
+def estimate_size_bytes(value: Any) -> int:
+    if isinstance(value, str):
+        return len(value.encode("utf-8"))
+
+    return len(json.dumps(value, ensure_ascii=False, default=str).encode("utf-8"))
+
+
+# Shared by every session so repeated reads and searches are served from one place
+TOOL_RESULT_CACHE = ToolResultCache()
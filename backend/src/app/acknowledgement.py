@@ -0,0 +1,140 @@
+"""Produce the TARS acknowledgement alongside the run instead of before it."""
+
+import asyncio
+import logging
+import zlib
+from contextlib import aclosing
+from contextvars import ContextVar
+
+from src.config.Model import Model
+from src.infer.ModelManager import ModelManager
+from src.message_structures.message import Message
+
+logger = logging.getLogger("uvicorn.error")
+
+FAST_ACKNOWLEDGEMENTS = [
+    "Copy that. Working on it.",
+    "Received. Honesty setting at ninety percent.",
+    "Acknowledged. Stand by.",
+    "On it. Humour setting lowered while I work.",
+    "Message received. Engaging the useful parts of my circuitry.",
+]
+
+_current_acknowledgement: ContextVar["PendingAcknowledgement | None"] = ContextVar(
+    "current_acknowledgement",
+    default=None,
+)
+
+
+class PendingAcknowledgement:
+    def __init__(self):
+        self.task: asyncio.Task | None = None
+        self.delivering = False
+
+    def attach(self, task: asyncio.Task) -> None:
+        self.task = task
+
+    def mark_delivering(self) -> None:
+        self.delivering = True
+
+    def cancel_if_pending(self) -> bool:
+        if self.task is None or self.task.done():
+            return False
+
+        # Once delivery starts the text is already paid for, so let the send finish
+        if self.delivering:
+            return False
+
+        self.task.cancel()
+        return True
+
+
+def set_current_acknowledgement(pending_acknowledgement: PendingAcknowledgement | None):
+    return _current_acknowledgement.set(pending_acknowledgement)
+
+
+def reset_current_acknowledgement(token) -> None:
+    _current_acknowledgement.reset(token)
+
+
+def cancel_pending_acknowledgement() -> bool:
+    pending_acknowledgement = _current_acknowledgement.get()
+    if pending_acknowledgement is None:
+        return False
+
+    return pending_acknowledgement.cancel_if_pending()
+
+
+def build_fast_acknowledgement(message: str) -> str:
+    acknowledgement_index = zlib.crc32(message.encode("utf-8")) % len(FAST_ACKNOWLEDGEMENTS)
+    return FAST_ACKNOWLEDGEMENTS[acknowledgement_index]
+
+
+def build_acknowledgement_prompt(message: str) -> str:
+    return f"""
+    You are a minimal acknowledgment assistant.
+    Your sole task is to acknowledge receipt of the user's message — not to answer, explain, or respond to the content.
+
+    You must respond with exactly no more than one line. Try and embody a dry humoured robot like Tars from Interstellar when responding.
+
+    Do NOT answer the question.
+
+    QUERY:
+    {message}
+    """
+
+
+async def generate_model_acknowledgement(
+    message: str,
+    model: Model,
+    model_manager: ModelManager,
+) -> str:
+    response_parts = []
+    acknowledgement_request = [Message(role="user", content=build_acknowledgement_prompt(message))]
+
+    # Stop at the first line break: the prompt only allows one line, and closing
+    # the stream early frees the llama-server slot for the real work.
+    acknowledgement_stream = model_manager.ask_model_stream(
+        model,
+        acknowledgement_request,
+        prompt_family="acknowledgement",
+    )
+    async with aclosing(acknowledgement_stream) as stream:
+        async for stream_event in stream:
+            content = stream_event.get("content", "")
+            if not content:
+                continue
+
+            response_parts.append(content)
+            acknowledgement_text = "".join(response_parts).strip()
+            if "\n" in acknowledgement_text:
+                return acknowledgement_text.splitlines()[0].strip()
+
+    return "".join(response_parts).strip()
+
+
+async def resolve_acknowledgement_text(
+    message: str,
+    model: Model,
+    model_manager: ModelManager,
+) -> tuple[str, str]:
+    if not model_manager.is_model_active(model):
+        logger.info("Acknowledgement model %s is not loaded, using fast acknowledgement", model.name)
+        return build_fast_acknowledgement(message), "fast_path"
+
+    try:
+        acknowledgement_text = await generate_model_acknowledgement(
+            message=message,
+            model=model,
+            model_manager=model_manager,
+        )
+    except asyncio.CancelledError:
+        raise
+    except Exception:
+        logger.exception("Acknowledgement generation failed, using fast acknowledgement")
+        return build_fast_acknowledgement(message), "fast_path"
+
+    if not acknowledgement_text:
+        return build_fast_acknowledgement(message), "fast_path"
+
+    return acknowledgement_text, "model"
@@ -1,25 +1,41 @@
+import asyncio
 import json
 import logging
 import uuid
 
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 
+from src.app.acknowledgement import (
+    PendingAcknowledgement,
+    reset_current_acknowledgement,
+    resolve_acknowledgement_text,
+    set_current_acknowledgement,
+)
 from src.app.router import handle_query
-from src.app.ws_events import send_acknowledgement, send_phase_changed, send_run_accepted, send_run_failed
+from src.app.run_scheduler import RunScheduler
+from src.app.ws_events import send_acknowledgement, send_phase_changed, send_run_accepted, send_run_completed, send_run_failed
 from src.config.InferenceProvider import InferenceProvider
 from src.config.LlamaCppPresetGenerator import generate_llama_cpp_presets
 from src.config.ModelConfig import ModelConfig
 from src.config.RuntimeEnvironment import runtime_environment
 from src.infer.LlamaCppServerModelManager import LlamaCppServerModelManager
 from src.infer.LlamaServerProcess import LlamaServerProcess
+from src.infer.ModelResponseCache import ModelResponseCache
 from src.message_structures.conversation_manager import ConversationManager
+from src.message_structures.conversation import Conversation
 from src.message_structures.message import Message
-from src.telemetry.run_telemetry import RunTelemetryRecorder, reset_current_run_recorder, set_current_run_recorder
+from src.orchestration.model_roles import ModelRoleSelector
+from src.services.browser_pool import BROWSER_POOL
+from src.services.web_fetch_client import WEB_FETCH_CLIENT
+from src.telemetry.run_telemetry import RunTelemetryRecorder, now_utc, reset_current_run_recorder, set_current_run_recorder
 
 logger = logging.getLogger("uvicorn.error")
 
 api_router = APIRouter()
 conversation_manager = ConversationManager()
+run_scheduler = RunScheduler()
+
+CANCEL_ACTION_TYPES = {"cancel", "run.cancel"}
 
 RUNTIME_ENVIRONMENT = runtime_environment()
 MODEL_REGISTRY_PATH = str(RUNTIME_ENVIRONMENT.registry_path)
@@ -42,9 +58,30 @@ server = LlamaServerProcess(
     models_dir = MODELS_DIRECTORY_PATH,
     models_config = LLAMA_SERVER_PRESET_PATH,
     port = 8080,
+    slot_save_path = str(RUNTIME_ENVIRONMENT.slot_snapshot_directory),
 )
 
-model_manager = LlamaCppServerModelManager(config, server)
+model_manager = LlamaCppServerModelManager(
+    config,
+    server,
+    hardware_profile = RUNTIME_ENVIRONMENT.hardware_profile,
+    response_cache = ModelResponseCache(RUNTIME_ENVIRONMENT.response_cache_directory),
+)
+
+
+@api_router.on_event("shutdown")
+async def close_model_manager():
+    await model_manager.close()
+
+
+@api_router.on_event("shutdown")
+async def close_web_fetch_client():
+    await WEB_FETCH_CLIENT.close()
+
+
+@api_router.on_event("shutdown")
+async def close_browser_pool():
+    await BROWSER_POOL.close()
 
 
 @api_router.websocket("/ws/agent")
@@ -55,16 +92,68 @@ async def agent_websocket_endpoint(websocket: WebSocket):
     try:
         while True:
             data = await websocket.receive_text()
-            await handle_socket_message(websocket, data)
+            dispatch_socket_message(websocket, data)
     except WebSocketDisconnect:
         logger.warning("Client disconnected")
+    finally:
+        cancelled_run_count = run_scheduler.cancel_owner_runs(websocket)
+        if cancelled_run_count:
+            logger.info("Cancelled %s runs owned by the disconnected socket", cancelled_run_count)
 
 
-async def handle_socket_message(
+def dispatch_socket_message(
     websocket: WebSocket,
     data: str,
 ):
+    payload = parse_socket_payload(data)
+    if is_cancel_action(payload):
+        cancel_requested_run(payload)
+        return
+
     run_id = str(uuid.uuid4())
+    session_id = payload.get("session_id") or payload.get("sessionId") or 1
+    run_scheduler.schedule(
+        run_id = run_id,
+        session_id = session_id,
+        owner = websocket,
+        run_factory = lambda: handle_socket_message(websocket, data, run_id),
+    )
+
+
+def parse_socket_payload(data: str) -> dict:
+    try:
+        payload = json.loads(data)
+    except json.JSONDecodeError:
+        return {}
+
+    return payload if isinstance(payload, dict) else {}
+
+
+def is_cancel_action(payload: dict) -> bool:
+    if payload.get("event_kind") != "run.action":
+        return False
+
+    payload_body = payload.get("payload") or {}
+    action_type = payload_body.get("action_type") or payload_body.get("action") or ""
+    return action_type in CANCEL_ACTION_TYPES
+
+
+def cancel_requested_run(payload: dict):
+    target_run_id = payload.get("run_id") or payload.get("runId") or ""
+    if not target_run_id:
+        logger.warning("Ignoring cancel action without a run id")
+        return
+
+    if not run_scheduler.cancel_run(target_run_id):
+        logger.info("Cancel requested for run %s, but it is not active", target_run_id)
+
+
+async def handle_socket_message(
+    websocket: WebSocket,
+    data: str,
+    run_id: str = "",
+):
+    run_id = run_id or str(uuid.uuid4())
     session_id = 1
     recorder = RunTelemetryRecorder(
         run_id = run_id,
@@ -88,7 +177,7 @@ async def handle_socket_message(
                 websocket=websocket,
                 run_id=incoming_run_id,
                 session_id=session_id,
-                error="Frontend run actions are not registered in this build.",
+                error="Only cancel run actions are registered in this build.",
                 detail="Use a normal chat message so the generic agent can decide what to do.",
             )
             return
@@ -120,32 +209,40 @@ async def handle_socket_message(
             websocket = websocket,
             run_id = run_id,
             session_id = session_id,
-            phase = "acknowledging",
-            detail = "Generating TARS acknowledgement.",
+            phase = "routing",
+            detail = "Choosing how to handle the request.",
         )
 
-        acknowledgement_response = build_acknowledgement_response(message)
-        await send_acknowledgement(
+        pending_acknowledgement = start_acknowledgement(
             websocket = websocket,
             run_id = run_id,
             session_id = session_id,
-            text = acknowledgement_response,
-        )
-        conversation_history.append_message(
-            Message(
-                role="acknowledger",
-                content=acknowledgement_response,
-            ),
+            message = message,
+            conversation_history = conversation_history,
+            recorder = recorder,
         )
-
-        await handle_query(
-            message,
-            websocket,
-            run_id,
-            session_id,
-            conversation_history,
-            model_manager,
+        acknowledgement_token = set_current_acknowledgement(pending_acknowledgement)
+
+        try:
+            await handle_query(
+                message,
+                websocket,
+                run_id,
+                session_id,
+                conversation_history,
+                model_manager,
+            )
+        finally:
+            pending_acknowledgement.cancel_if_pending()
+            reset_current_acknowledgement(acknowledgement_token)
+    except asyncio.CancelledError:
+        logger.info("Run %s cancelled", run_id)
+        await send_run_cancelled(
+            websocket = websocket,
+            run_id = run_id,
+            session_id = session_id,
         )
+        raise
     except Exception as exc:
         logger.exception("Unhandled websocket request failure")
         await send_run_failed(
@@ -160,6 +257,23 @@ async def handle_socket_message(
         reset_current_run_recorder(recorder_token)
 
 
+async def send_run_cancelled(
+    websocket: WebSocket,
+    run_id: str,
+    session_id: int,
+):
+    # The socket may already be gone when a disconnect triggered the cancel
+    try:
+        await send_run_completed(
+            websocket = websocket,
+            run_id = run_id,
+            session_id = session_id,
+            status = "cancelled",
+        )
+    except Exception:
+        logger.info("Could not report cancellation for run %s", run_id)
+
+
 def add_user_message_to_conversation(
     session_id: int,
     message: str,
@@ -173,37 +287,70 @@ def add_user_message_to_conversation(
     return conversation_history
 
 
-def build_acknowledgement_response(message: str) -> str:
-    fast_model = resolve_acknowledgement_model()
-    acknowledgement_prompt = f"""
-    You are a minimal acknowledgment assistant.
-    Your sole task is to acknowledge receipt of the user's message — not to answer, explain, or respond to the content.
-
-    You must respond with exactly no more than one line. Try and embody a dry humoured robot like Tars from Interstellar when responding.
-
-    Do NOT answer the question.
-
-    QUERY:
-    {message}
-    """
-    acknowledge_request = [Message(role="user", content=acknowledgement_prompt)]
-    acknowledgement_response = model_manager.ask_model(
-        fast_model,
-        acknowledge_request,
+def start_acknowledgement(
+    websocket: WebSocket,
+    run_id: str,
+    session_id: int,
+    message: str,
+    conversation_history: Conversation,
+    recorder: RunTelemetryRecorder,
+) -> PendingAcknowledgement:
+    pending_acknowledgement = PendingAcknowledgement()
+    acknowledgement_task = asyncio.create_task(
+        deliver_acknowledgement(
+            websocket = websocket,
+            run_id = run_id,
+            session_id = session_id,
+            message = message,
+            conversation_history = conversation_history,
+            pending_acknowledgement = pending_acknowledgement,
+            recorder = recorder,
+        ),
     )
-    return acknowledgement_response.strip()
+    pending_acknowledgement.attach(acknowledgement_task)
+    return pending_acknowledgement
 
 
-def resolve_acknowledgement_model():
-    acknowledgement_model = model_manager.config.get_model("Qwen 3.5 4B Instruct (Q4_K_M)")
-    if acknowledgement_model is not None:
-        return acknowledgement_model
+async def deliver_acknowledgement(
+    websocket: WebSocket,
+    run_id: str,
+    session_id: int,
+    message: str,
+    conversation_history: Conversation,
+    pending_acknowledgement: PendingAcknowledgement,
+    recorder: RunTelemetryRecorder,
+):
+    started_at = now_utc()
+    acknowledgement_model = ModelRoleSelector(model_manager.config).resolve_model("acknowledgement_model")
 
-    acknowledgement_model = model_manager.config.get_model("Qwen 3.5 4B Instruct (Q6_K)")
-    if acknowledgement_model is not None:
-        return acknowledgement_model
+    try:
+        acknowledgement_text, source = await resolve_acknowledgement_text(
+            message = message,
+            model = acknowledgement_model,
+            model_manager = model_manager,
+        )
+    except asyncio.CancelledError:
+        logger.info("Acknowledgement cancelled because the response started first")
+        recorder.note_acknowledgement(source = "model", status = "cancelled", started_at = started_at)
+        raise
 
-    if not model_manager.config.models:
-        raise RuntimeError("No models are configured for acknowledgement generation.")
+    pending_acknowledgement.mark_delivering()
+    recorder.note_acknowledgement(source = source, status = "delivered", started_at = started_at)
 
-    return next(iter(model_manager.config.models.values()))
+    try:
+        await send_acknowledgement(
+            websocket = websocket,
+            run_id = run_id,
+            session_id = session_id,
+            text = acknowledgement_text,
+        )
+    except Exception:
+        logger.exception("Could not send acknowledgement")
+        return
+
+    conversation_history.append_message(
+        Message(
+            role="acknowledger",
+            content=acknowledgement_text,
+        ),
+    )
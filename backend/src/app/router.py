@@ -22,15 +22,16 @@ async def handle_query(
     model_manager: ModelManager,
 ):
     orchestration_models = ModelRoleSelector(model_manager.config).resolve()
-    route_decision = route_request(
+    route_decision = await route_request(
         query=query,
         model=orchestration_models.router_model,
         model_manager=model_manager,
     )
 
     logger.info(
-        "Route decision for query: mode=%s reason=%s",
+        "Route decision for query: mode=%s source=%s reason=%s",
         route_decision.mode,
+        route_decision.source,
         route_decision.reason,
     )
     await send_route_selected(
@@ -39,6 +40,7 @@ async def handle_query(
         session_id=session_id,
         mode=route_decision.mode,
         reason=route_decision.reason,
+        source=route_decision.source,
     )
 
     if route_decision.mode == "direct_chat":
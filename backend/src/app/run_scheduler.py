@@ -0,0 +1,104 @@
+"""Schedule websocket runs as tasks, ordered per session and cancellable by run id."""
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable
+
+logger = logging.getLogger("uvicorn.error")
+
+
+@dataclass
+class ScheduledRun:
+    run_id: str
+    session_id: Any
+    owner: Any
+    task: asyncio.Task
+
+
+class RunScheduler:
+    def __init__(self):
+        self.runs: dict[str, ScheduledRun] = {}
+        self.session_tail_tasks: dict[Any, asyncio.Task] = {}
+
+    def schedule(
+        self,
+        run_id: str,
+        session_id,
+        owner,
+        run_factory: Callable[[], Awaitable[None]],
+    ) -> ScheduledRun:
+        previous_task = self.session_tail_tasks.get(session_id)
+        task = asyncio.create_task(
+            self.run_in_session_order(previous_task, run_factory),
+            name=f"run-{run_id}",
+        )
+
+        scheduled_run = ScheduledRun(
+            run_id=run_id,
+            session_id=session_id,
+            owner=owner,
+            task=task,
+        )
+        self.runs[run_id] = scheduled_run
+        self.session_tail_tasks[session_id] = task
+        task.add_done_callback(
+            lambda finished_task: self.forget_run(scheduled_run, finished_task),
+        )
+        return scheduled_run
+
+    async def run_in_session_order(
+        self,
+        previous_task: asyncio.Task | None,
+        run_factory: Callable[[], Awaitable[None]],
+    ):
+        # Waiting with asyncio.wait keeps a cancelled or failed predecessor from cancelling this run
+        if previous_task is not None and not previous_task.done():
+            await asyncio.wait([previous_task])
+
+        await run_factory()
+
+    def cancel_run(self, run_id: str) -> bool:
+        scheduled_run = self.runs.get(run_id)
+        if scheduled_run is None:
+            return False
+
+        if scheduled_run.task.done():
+            return False
+
+        logger.info("Cancelling run %s", run_id)
+        scheduled_run.task.cancel()
+        return True
+
+    def cancel_owner_runs(self, owner) -> int:
+        owned_runs = [
+            scheduled_run
+            for scheduled_run in self.runs.values()
+            if scheduled_run.owner is owner
+        ]
+
+        cancelled_count = 0
+        for scheduled_run in owned_runs:
+            if self.cancel_run(scheduled_run.run_id):
+                cancelled_count += 1
+
+        return cancelled_count
+
+    def forget_run(self, scheduled_run: ScheduledRun, finished_task: asyncio.Task) -> None:
+        self.runs.pop(scheduled_run.run_id, None)
+
+        if self.session_tail_tasks.get(scheduled_run.session_id) is finished_task:
+            del self.session_tail_tasks[scheduled_run.session_id]
+
+        if finished_task.cancelled():
+            return
+
+        run_error = finished_task.exception()
+        if run_error is None:
+            return
+
+        logger.error(
+            "Run %s ended with an unhandled error",
+            scheduled_run.run_id,
+            exc_info=run_error,
+        )
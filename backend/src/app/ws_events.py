@@ -2,6 +2,7 @@ from datetime import datetime, timezone
 
 from fastapi import WebSocket
 
+from src.app.acknowledgement import cancel_pending_acknowledgement
 from src.telemetry.run_telemetry import get_current_run_recorder
 
 PROTOCOL_VERSION = "0.6"
@@ -101,7 +102,12 @@ async def send_route_selected(
     session_id: int,
     mode: str,
     reason: str,
+    source: str = "model",
 ):
+    recorder = get_current_run_recorder()
+    if recorder is not None:
+        recorder.note_route(mode=mode, reason=reason, source=source)
+
     await send_server_event(
         websocket=websocket,
         event_kind="run.routed",
@@ -110,6 +116,7 @@ async def send_route_selected(
         payload={
             "mode": mode,
             "reason": reason,
+            "source": source,
         },
         legacy_type="route_decision",
         legacy_message=f"{mode}: {reason}",
@@ -164,6 +171,19 @@ async def send_progress_update(
     )
 
 
+def build_progress_callback(websocket: WebSocket, run_id: str, session_id: int):
+    async def report_progress(status: str, details: dict):
+        await send_progress_update(
+            websocket=websocket,
+            run_id=run_id,
+            session_id=session_id,
+            status=status,
+            details=details,
+        )
+
+    return report_progress
+
+
 async def send_result_event(
     websocket: WebSocket,
     run_id: str,
@@ -231,6 +251,13 @@ async def send_response_delta(
     text: str,
     reasoning_text: str = "",
 ):
+    if text:
+        cancel_pending_acknowledgement()
+
+    recorder = get_current_run_recorder()
+    if recorder is not None:
+        recorder.note_response_delta(text)
+
     await send_server_event(
         websocket=websocket,
         event_kind="assistant.response.delta",
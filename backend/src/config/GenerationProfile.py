@@ -0,0 +1,24 @@
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class GenerationProfile:
+    """Output bounds applied to every call made for one orchestration role."""
+
+    max_tokens: int | None = None
+    stop: tuple[str, ...] = ()
+    thinking_budget: int | None = None
+
+    @classmethod
+    def from_config(cls, profile_config: dict) -> "GenerationProfile":
+        raw_max_tokens = profile_config.get("max_tokens")
+        raw_thinking_budget = profile_config.get("thinking_budget")
+        raw_stop = profile_config.get("stop") or []
+        if isinstance(raw_stop, str):
+            raw_stop = [raw_stop]
+
+        return cls(
+            max_tokens = int(raw_max_tokens) if raw_max_tokens else None,
+            stop = tuple(str(stop_sequence) for stop_sequence in raw_stop if stop_sequence),
+            thinking_budget = int(raw_thinking_budget) if raw_thinking_budget is not None else None,
+        )
@@ -67,6 +67,7 @@ class LlamaCppPresetGenerator:
     ):
         self.registry_path = Path(registry_path)
         self.output_path = Path(output_path)
+        self.model_entries_by_name: dict[str, dict] = {}
 
     def generate(self) -> str:
         registry = self.load_registry()
@@ -84,6 +85,10 @@ class LlamaCppPresetGenerator:
             "# Edit the JSON registry or runtime preset metadata instead of editing this file by hand.",
             "",
         ]
+        self.model_entries_by_name = {
+            str(model_entry.get("name") or ""): model_entry
+            for model_entry in model_entries
+        }
 
         for model_entry in model_entries:
             section_lines = self.build_section_lines(model_entry)
@@ -140,6 +145,7 @@ class LlamaCppPresetGenerator:
             ("n_cpu_moe", "n-cpu-moe"),
             ("mlock", "mlock"),
             ("mmap", "mmap"),
+            ("parallel_slots", "parallel"),
         ]
 
         for preset_key, ini_key in optional_key_lines:
@@ -156,8 +162,33 @@ class LlamaCppPresetGenerator:
         if "no_kv_offload" in preset:
             section_lines.append(f"no-kv-offload = {self.format_boolean(preset['no_kv_offload'])}")
 
+        section_lines.extend(self.build_draft_lines(model_entry, preset))
         return section_lines
 
+    def build_draft_lines(self, model_entry: dict, preset: dict) -> list[str]:
+        draft_model_name = str(model_entry.get("draft_model") or "").strip()
+        if not draft_model_name:
+            return []
+
+        draft_entry = self.model_entries_by_name.get(draft_model_name)
+        draft_model_path = portable_model_path(str((draft_entry or {}).get("path") or "").strip())
+        if not draft_model_path:
+            return [f"# draft model {draft_model_name} is not in the registry, speculative decoding is off"]
+
+        draft_lines = [f"model-draft = {draft_model_path}"]
+        draft_key_lines = [
+            ("draft_max", "draft-max"),
+            ("draft_min", "draft-min"),
+            ("draft_p_min", "draft-p-min"),
+            ("draft_n_gpu_layers", "n-gpu-layers-draft"),
+            ("draft_context_window", "ctx-size-draft"),
+        ]
+        for preset_key, ini_key in draft_key_lines:
+            if preset_key in preset:
+                draft_lines.append(f"{ini_key} = {self.format_value(preset[preset_key])}")
+
+        return draft_lines
+
     def resolve_runtime_preset(self, model_entry: dict) -> dict:
         configured_preset = model_entry.get("runtime_preset")
         if isinstance(configured_preset, dict) and configured_preset:
@@ -217,6 +248,21 @@ class LlamaCppPresetGenerator:
             "n_cpu_moe": "n_cpu_moe",
             "mlock": "mlock",
             "mmap": "mmap",
+            "parallel": "parallel_slots",
+            "np": "parallel_slots",
+            "parallel_slots": "parallel_slots",
+            "draft-max": "draft_max",
+            "draft-n": "draft_max",
+            "draft_max": "draft_max",
+            "draft-min": "draft_min",
+            "draft_min": "draft_min",
+            "draft-p-min": "draft_p_min",
+            "draft_p_min": "draft_p_min",
+            "n-gpu-layers-draft": "draft_n_gpu_layers",
+            "ngld": "draft_n_gpu_layers",
+            "draft_n_gpu_layers": "draft_n_gpu_layers",
+            "ctx-size-draft": "draft_context_window",
+            "draft_context_window": "draft_context_window",
         }
 
         for key, value in configured_preset.items():
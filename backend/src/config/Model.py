@@ -26,6 +26,8 @@ class Model():
     default_context_candidates: list[int] | None = None
     default_thinking_budget_candidates: list[int] | None = None
     runtime_preset: dict | None = None
+    draft_model: str = ""
+    draft_model_size: float = 0.0
 
     def readable_name(self) -> str:
         if self.display_name:
@@ -38,3 +40,7 @@ class Model():
     def context_window(self) -> int:
         runtime_preset = self.runtime_preset or {}
         return int(runtime_preset.get("context_window") or 0)
+
+    def parallel_slots(self) -> int:
+        runtime_preset = self.runtime_preset or {}
+        return int(runtime_preset.get("parallel_slots") or 0)
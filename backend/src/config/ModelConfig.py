@@ -2,6 +2,7 @@ import json
 from collections import defaultdict
 from typing import List
 
+from src.config.GenerationProfile import GenerationProfile
 from src.config.InferenceProvider import InferenceProvider
 from src.config.InferenceSpeed import InferenceSpeed
 from src.config.Model import Model
@@ -14,6 +15,7 @@ class ModelConfig:
     models_by_id: dict[str, Model]
     models_by_speed: dict[InferenceSpeed, List[Model]]
     models_by_role: dict[Role, List[Model]]
+    generation_profiles: dict[str, GenerationProfile]
 
     def __init__(
             self, 
@@ -27,9 +29,13 @@ class ModelConfig:
         self.models_by_id = dict()
         self.models_by_speed = defaultdict(list)
         self.models_by_role = defaultdict(list)
+        self.generation_profiles = dict()
 
         with open(config_path) as file:
             config = json.load(file)
+            for prompt_family, profile_config in config.get("GenerationProfiles", {}).items():
+                self.generation_profiles[prompt_family] = GenerationProfile.from_config(profile_config)
+
             for model_config in config["Models"]:
                 normalized_model_config = self.normalize_model_config(model_config)
                 display_name = model_config.get("display_name") or model_config["name"].replace("_", " ")
@@ -55,12 +61,22 @@ class ModelConfig:
                     default_context_candidates = normalized_model_config.get("default_context_candidates", []),
                     default_thinking_budget_candidates = normalized_model_config.get("default_thinking_budget_candidates", []),
                     runtime_preset = normalized_model_config.get("runtime_preset", {}),
+                    draft_model = normalized_model_config.get("draft_model", ""),
                 )
                 self.models[model.name] = model
                 self.models_by_id[model.id] = model
                 self.models_by_speed[model.inference_speed].append(model)
                 self.models_by_role[model.role].append(model)
 
+        # Draft weights load alongside their target, so residency planning counts them too
+        for model in self.models.values():
+            draft_model = self.get_model(model.draft_model)
+            if draft_model is not None:
+                model.draft_model_size = float(draft_model.size or 0.0)
+
+    def generation_profile(self, prompt_family: str) -> GenerationProfile:
+        return self.generation_profiles.get(prompt_family) or GenerationProfile()
+
     def get_model(self, identifier: str) -> Model | None:
         if not identifier:
             return None
@@ -100,6 +116,7 @@ class ModelConfig:
         normalized_model_config["default_context_candidates"] = self.normalize_context_candidates(model_config)
         normalized_model_config["default_thinking_budget_candidates"] = self.normalize_thinking_budget_candidates(model_config)
         normalized_model_config["runtime_preset"] = dict(model_config.get("runtime_preset") or {})
+        normalized_model_config["draft_model"] = str(model_config.get("draft_model") or "").strip()
         return normalized_model_config
 
     def model_filename(self, model_config: dict) -> str:
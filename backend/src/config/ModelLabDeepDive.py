@@ -14,6 +14,17 @@ LLAMA_SERVER_PATH = RUNTIME_ENVIRONMENT.llama_server_binary_path
 REGISTRY_PATH = RUNTIME_ENVIRONMENT.registry_path
 DEEP_DIVE_DIRECTORY = RUNTIME_ENVIRONMENT.deep_dive_directory
 BENCHMARK_SERVER_PORTS = tuple(range(8091, 8105))
+PARALLEL_THROUGHPUT_TOLERANCE = 0.9
+SPECULATIVE_DRAFT_MAX_CANDIDATES = (8, 16)
+SPECULATIVE_MAX_DRAFTS_PER_TARGET = 2
+SPECULATIVE_MAX_DRAFT_SIZE_RATIO = 0.5
+SPECULATIVE_MIN_SPEEDUP = 1.1
+SPECULATIVE_BENCHMARK_PORT = 8097
+SPECULATIVE_PROMPTS = (
+    "Write a Python function that parses an ISO 8601 date string and returns a datetime, with a docstring and type hints.",
+    "List the steps to set up a new Git repository, add a remote, and push the first commit, as a numbered list.",
+    "Explain in two short paragraphs how a hash map handles collisions.",
+)
 
 SHORTLIST_MODEL_NAMES = {
     "QWEN_3_5_4B_Q6_K",
@@ -90,11 +101,13 @@ class LlamaServerHarness:
         runtime_preset: dict,
         port: int,
         parallel_slots: int = 1,
+        draft_model_entry: dict | None = None,
     ):
         self.model_entry = model_entry
         self.runtime_preset = runtime_preset
         self.port = port
         self.parallel_slots = parallel_slots
+        self.draft_model_entry = draft_model_entry
         self.process = None
         self.base_url = f"http://127.0.0.1:{port}"
 
@@ -126,6 +139,14 @@ class LlamaServerHarness:
                 ],
             )
 
+        # Production presets keep the mmproj, so every run loads it and speculative runs match their baseline
+        mmproj_path = str(self.model_entry.get("mmproj_path") or "").strip()
+        if mmproj_path:
+            command.extend(["--mmproj", resolve_model_path(mmproj_path)])
+
+        if self.draft_model_entry is not None:
+            command.extend(self.draft_arguments())
+
         self.process = subprocess.Popen(
             command,
             stdout = subprocess.DEVNULL,
@@ -134,6 +155,18 @@ class LlamaServerHarness:
         self.wait_for_health()
         return self
 
+    def draft_arguments(self) -> list[str]:
+        draft_arguments = [
+            "-md", resolve_model_path(self.draft_model_entry["path"]),
+            "-ngld", str(self.runtime_preset.get("draft_n_gpu_layers", 99)),
+            "--draft-max", str(self.runtime_preset.get("draft_max", 16)),
+            "--draft-min", str(self.runtime_preset.get("draft_min", 0)),
+        ]
+        if "draft_p_min" in self.runtime_preset:
+            draft_arguments.extend(["--draft-p-min", str(self.runtime_preset["draft_p_min"])])
+
+        return draft_arguments
+
     def __exit__(self, exc_type, exc, traceback):
         if self.process is None:
             cleanup_llama_server_for_port(self.port)
@@ -203,6 +236,7 @@ class LlamaServerHarness:
         response_payload = response.json()
 
         usage = response_payload.get("usage") or {}
+        timings = response_payload.get("timings") or {}
         choice = response_payload["choices"][0]
         message = choice.get("message", {})
 
@@ -214,6 +248,9 @@ class LlamaServerHarness:
             "prompt_tokens": prompt_tokens,
             "completion_tokens": completion_tokens,
             "tokens_per_second": round(completion_tokens / elapsed_seconds, 3) if completion_tokens else 0.0,
+            "decode_tokens_per_second": round(float(timings.get("predicted_per_second") or 0.0), 3),
+            "draft_tokens": int(timings.get("draft_n") or 0),
+            "draft_tokens_accepted": int(timings.get("draft_n_accepted") or 0),
             "content": message.get("content") or "",
             "reasoning_content": message.get("reasoning_content") or "",
         }
@@ -256,11 +293,26 @@ class ModelLabDeepDive:
                 self.write_markdown("parallel_sweep.md", self.parallel_markdown(results))
                 return
 
+            if command_name == "apply-parallel":
+                self.apply_parallel_recommendations(self.read_json("parallel_sweep.json"))
+                return
+
+            if command_name == "speculative":
+                results = self.run_speculative_sweep()
+                self.write_json("speculative_sweep.json", results)
+                self.write_markdown("speculative_sweep.md", self.speculative_markdown(results))
+                return
+
+            if command_name == "apply-speculative":
+                self.apply_speculative_recommendations(self.read_json("speculative_sweep.json"))
+                return
+
             if command_name == "all":
                 self.run("decode")
                 self.run("context")
                 self.run("thinking")
                 self.run("parallel")
+                self.run("speculative")
                 return
 
             raise ValueError(f"Unknown command: {command_name}")
@@ -470,11 +522,208 @@ class ModelLabDeepDive:
                     "name": model_entry["name"],
                     "display_name": model_entry.get("display_name", ""),
                     "parallel_results": model_results,
+                    "recommended_parallel_slots": self.recommend_parallel_slots(model_results),
                 },
             )
 
         return {"results": results}
 
+    def recommend_parallel_slots(self, parallel_results: list[dict]) -> int:
+        completed_results = [
+            parallel_result
+            for parallel_result in parallel_results
+            if parallel_result["status"] == "completed"
+        ]
+        if not completed_results:
+            return 0
+
+        # Extra slots cost KV cache, so take the smallest concurrency close to the best aggregate speed
+        best_tokens_per_second = max(parallel_result["aggregate_tokens_per_second"] for parallel_result in completed_results)
+        for parallel_result in sorted(completed_results, key = lambda parallel_result: parallel_result["concurrency"]):
+            if parallel_result["aggregate_tokens_per_second"] >= best_tokens_per_second * PARALLEL_THROUGHPUT_TOLERANCE:
+                return parallel_result["concurrency"]
+
+        return 0
+
+    def apply_parallel_recommendations(self, parallel_sweep: dict) -> None:
+        registry = self.load_registry()
+        recommended_slots_by_name = {
+            result["name"]: int(result.get("recommended_parallel_slots") or 0)
+            for result in parallel_sweep.get("results", [])
+        }
+
+        for model_entry in registry["Models"]:
+            recommended_parallel_slots = recommended_slots_by_name.get(model_entry["name"], 0)
+            if recommended_parallel_slots <= 0:
+                continue
+
+            runtime_preset = dict(model_entry.get("runtime_preset") or {})
+            runtime_preset["parallel_slots"] = recommended_parallel_slots
+            model_entry["runtime_preset"] = runtime_preset
+
+        with self.registry_path.open("w", encoding = "utf-8") as file:
+            json.dump(registry, file, indent = 4)
+            file.write("\n")
+
+    def run_speculative_sweep(self) -> dict:
+        results = []
+
+        for target_entry, draft_entries in self.speculative_pairings():
+            runtime_preset = target_entry.get("runtime_preset") or {}
+            try:
+                baseline = self.run_speculative_candidate(target_entry, runtime_preset)
+            except Exception as error:
+                results.append(
+                    {
+                        "name": target_entry["name"],
+                        "display_name": target_entry.get("display_name", ""),
+                        "baseline": {"status": "failed", "error": str(error)},
+                        "draft_results": [],
+                        "recommendation": {},
+                    },
+                )
+                continue
+
+            draft_results = []
+            for draft_entry in draft_entries:
+                for draft_max in SPECULATIVE_DRAFT_MAX_CANDIDATES:
+                    candidate_preset = {**runtime_preset, "draft_max": draft_max}
+                    try:
+                        draft_result = self.run_speculative_candidate(target_entry, candidate_preset, draft_entry)
+                    except Exception as error:
+                        draft_result = {"status": "failed", "error": str(error)}
+
+                    draft_result["draft_model"] = draft_entry["name"]
+                    draft_result["draft_max"] = draft_max
+                    if draft_result["status"] == "completed" and baseline["decode_tokens_per_second"]:
+                        draft_result["speedup"] = round(
+                            draft_result["decode_tokens_per_second"] / baseline["decode_tokens_per_second"],
+                            3,
+                        )
+                    draft_results.append(draft_result)
+
+            results.append(
+                {
+                    "name": target_entry["name"],
+                    "display_name": target_entry.get("display_name", ""),
+                    "baseline": baseline,
+                    "draft_results": draft_results,
+                    "recommendation": self.recommend_draft_model(draft_results),
+                },
+            )
+
+        return {"results": results}
+
+    def run_speculative_candidate(
+        self,
+        target_entry: dict,
+        runtime_preset: dict,
+        draft_entry: dict | None = None,
+    ) -> dict:
+        with LlamaServerHarness(
+            model_entry = target_entry,
+            runtime_preset = runtime_preset,
+            port = SPECULATIVE_BENCHMARK_PORT,
+            draft_model_entry = draft_entry,
+        ) as harness:
+            completions = [
+                harness.chat_completion(
+                    messages = [{"role": "user", "content": prompt}],
+                    prediction_tokens = 256,
+                    thinking_budget_tokens = 0,
+                )
+                for prompt in SPECULATIVE_PROMPTS
+            ]
+
+        completion_tokens = sum(completion["completion_tokens"] for completion in completions)
+        elapsed_seconds = sum(completion["elapsed_seconds"] for completion in completions)
+        draft_tokens = sum(completion["draft_tokens"] for completion in completions)
+        draft_tokens_accepted = sum(completion["draft_tokens_accepted"] for completion in completions)
+        decode_rates = [
+            completion["decode_tokens_per_second"] or completion["tokens_per_second"]
+            for completion in completions
+        ]
+
+        return {
+            "status": "completed",
+            "completion_tokens": completion_tokens,
+            "elapsed_seconds": round(elapsed_seconds, 3),
+            "decode_tokens_per_second": round(sum(decode_rates) / len(decode_rates), 3),
+            "draft_tokens": draft_tokens,
+            "draft_tokens_accepted": draft_tokens_accepted,
+            "acceptance_rate": round(draft_tokens_accepted / draft_tokens, 3) if draft_tokens else 0.0,
+        }
+
+    def recommend_draft_model(self, draft_results: list[dict]) -> dict:
+        # No drafted tokens means the server ran without speculation, whatever the speed says
+        useful_results = [
+            draft_result
+            for draft_result in draft_results
+            if draft_result["status"] == "completed"
+            and draft_result["draft_tokens"] > 0
+            and draft_result.get("speedup", 0.0) >= SPECULATIVE_MIN_SPEEDUP
+        ]
+        if not useful_results:
+            return {}
+
+        best_result = max(useful_results, key = lambda draft_result: draft_result["speedup"])
+        return {
+            "draft_model": best_result["draft_model"],
+            "draft_max": best_result["draft_max"],
+            "speedup": best_result["speedup"],
+            "acceptance_rate": best_result["acceptance_rate"],
+        }
+
+    def apply_speculative_recommendations(self, speculative_sweep: dict) -> None:
+        registry = self.load_registry()
+        recommendations_by_name = {
+            result["name"]: result.get("recommendation") or {}
+            for result in speculative_sweep.get("results", [])
+        }
+
+        for model_entry in registry["Models"]:
+            recommendation = recommendations_by_name.get(model_entry["name"])
+            if not recommendation:
+                continue
+
+            runtime_preset = dict(model_entry.get("runtime_preset") or {})
+            runtime_preset["draft_max"] = recommendation["draft_max"]
+            model_entry["runtime_preset"] = runtime_preset
+            model_entry["draft_model"] = recommendation["draft_model"]
+
+        with self.registry_path.open("w", encoding = "utf-8") as file:
+            json.dump(registry, file, indent = 4)
+            file.write("\n")
+
+    def speculative_pairings(self) -> list[tuple[dict, list[dict]]]:
+        registry_entries = self.load_registry()["Models"]
+        pairings = []
+
+        for target_entry in self.shortlisted_registry_entries():
+            target_size = float(target_entry.get("size") or 0.0)
+            # Drafts must share the target's tokenizer, so only smaller members of the same family qualify
+            draft_entries = sorted(
+                [
+                    draft_entry
+                    for draft_entry in registry_entries
+                    if draft_entry.get("family") == target_entry.get("family")
+                    and draft_entry["path"] != target_entry["path"]
+                    and draft_entry.get("fits_in_gpu", False)
+                    and float(draft_entry.get("size") or 0.0) <= target_size * SPECULATIVE_MAX_DRAFT_SIZE_RATIO
+                ],
+                key = lambda draft_entry: float(draft_entry.get("size") or 0.0),
+            )
+            # Registry variants of one GGUF differ only in settings, so benchmark each file once
+            unique_draft_entries = []
+            for draft_entry in draft_entries:
+                if all(draft_entry["path"] != unique_entry["path"] for unique_entry in unique_draft_entries):
+                    unique_draft_entries.append(draft_entry)
+
+            if unique_draft_entries:
+                pairings.append((target_entry, unique_draft_entries[:SPECULATIVE_MAX_DRAFTS_PER_TARGET]))
+
+        return pairings
+
     def run_bench_candidate(self, model_entry: dict, candidate: dict) -> dict:
         command = [
             str(LLAMA_BENCH_PATH),
@@ -635,6 +884,11 @@ class ModelLabDeepDive:
             json.dump(payload, file, indent = 4)
             file.write("\n")
 
+    def read_json(self, filename: str) -> dict:
+        input_path = self.output_directory / filename
+        with input_path.open(encoding = "utf-8") as file:
+            return json.load(file)
+
     def write_markdown(self, filename: str, content: str) -> None:
         output_path = self.output_directory / filename
         output_path.write_text(content, encoding = "utf-8")
@@ -696,6 +950,39 @@ class ModelLabDeepDive:
                 lines.append(
                     f"- concurrency {parallel_result['concurrency']}: wall {parallel_result['wall_elapsed_seconds']} s, aggregate {parallel_result['aggregate_tokens_per_second']} tok/s, per-request {parallel_result['per_request_tokens_per_second']}"
                 )
+            if result.get("recommended_parallel_slots"):
+                lines.append(f"- recommended parallel slots: {result['recommended_parallel_slots']}")
+            lines.append("")
+        return "\n".join(lines).rstrip() + "\n"
+
+
+    def speculative_markdown(self, payload: dict) -> str:
+        lines = ["# Deep Dive Speculative Decoding Sweep", ""]
+        for result in payload["results"]:
+            lines.extend([f"## {result['display_name'] or result['name']}", ""])
+            baseline = result["baseline"]
+            if baseline["status"] != "completed":
+                lines.append(f"- baseline: failed ({baseline.get('error', 'unknown error')})")
+                lines.append("")
+                continue
+
+            lines.append(f"- baseline: decode {baseline['decode_tokens_per_second']} tok/s")
+            for draft_result in result["draft_results"]:
+                if draft_result["status"] != "completed":
+                    lines.append(
+                        f"- {draft_result['draft_model']} draft-max {draft_result['draft_max']}: failed ({draft_result.get('error', 'unknown error')})"
+                    )
+                    continue
+                lines.append(
+                    f"- {draft_result['draft_model']} draft-max {draft_result['draft_max']}: decode {draft_result['decode_tokens_per_second']} tok/s, speedup {draft_result.get('speedup', 0.0)}x, acceptance {draft_result['acceptance_rate']}"
+                )
+            recommendation = result.get("recommendation") or {}
+            if recommendation:
+                lines.append(
+                    f"- recommended draft: {recommendation['draft_model']} with draft-max {recommendation['draft_max']} ({recommendation['speedup']}x)"
+                )
+            else:
+                lines.append("- recommended draft: none")
             lines.append("")
         return "\n".join(lines).rstrip() + "\n"
 
@@ -704,7 +991,7 @@ def main():
     argument_parser = argparse.ArgumentParser()
     argument_parser.add_argument(
         "command",
-        choices = ["decode", "context", "thinking", "parallel", "all"],
+        choices = ["decode", "context", "thinking", "parallel", "apply-parallel", "speculative", "apply-speculative", "all"],
     )
     arguments = argument_parser.parse_args()
 
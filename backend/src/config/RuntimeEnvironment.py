@@ -19,6 +19,9 @@ class RuntimeEnvironment:
     benchmark_directory: Path
     deep_dive_directory: Path
     context_dump_path: Path
+    slot_snapshot_directory: Path
+    response_cache_directory: Path
+    web_cache_directory: Path
     models_directory: Path
     llama_server_binary_path: str
     llama_bench_binary_path: str
@@ -45,6 +48,9 @@ def load_runtime_environment() -> RuntimeEnvironment:
         benchmark_directory = REPO_ROOT / "generated" / "benchmarks",
         deep_dive_directory = REPO_ROOT / "generated" / "benchmarks" / "deep_dive",
         context_dump_path = REPO_ROOT / "generated" / "debug" / "context.txt",
+        slot_snapshot_directory = REPO_ROOT / "generated" / "slot_snapshots",
+        response_cache_directory = REPO_ROOT / "generated" / "response_cache",
+        web_cache_directory = REPO_ROOT / "generated" / "web_cache",
         models_directory = resolve_path_from_repo(models_directory_value),
         llama_server_binary_path = resolve_command_path(llama_server_binary_value),
         llama_bench_binary_path = resolve_command_path(llama_bench_binary_value),
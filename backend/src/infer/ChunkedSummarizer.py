@@ -0,0 +1,224 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable
+
+from src.message_structures.message import Message
+
+logger = logging.getLogger("uvicorn.error")
+
+CHARS_PER_TOKEN_ESTIMATE = 4
+DEFAULT_CONTEXT_WINDOW = 8192
+PROMPT_OVERHEAD_TOKENS = 256
+SUMMARY_RESERVE_TOKENS = 1024
+MAX_REDUCE_LEVELS = 4
+
+ProgressCallback = Callable[[str, dict], Awaitable[None]]
+
+
+class ChunkedSummarizer:
+    """Map-reduce summarization for documents larger than a model's context window.
+
+    The document is split on the server tokenizer so each chunk fits the model's context budget,
+    chunks are summarized concurrently through `ask_model_batch`, and partial summaries are merged
+    level by level until they fit in a single context again. llama-server runs with `--kv-unified`,
+    so concurrent slots share one context window and each chunk gets an equal share of it.
+    """
+
+    def __init__(self, model_manager):
+        self.model_manager = model_manager
+
+    async def summarize(
+        self,
+        model,
+        document: str,
+        user_goal: str,
+        progress_callback: ProgressCallback | None = None,
+    ) -> str:
+        token_budget = self.chunk_token_budget(model)
+        chunks = await self.split_document(model, document, token_budget)
+        logger.info(f"📦 Split into {len(chunks)} chunks of up to {token_budget} tokens")
+
+        summaries = await self.summarize_concurrently(
+            model = model,
+            prompts = [
+                self.build_map_prompt(user_goal, chunk_text, chunk_index, len(chunks))
+                for chunk_index, chunk_text in enumerate(chunks)
+            ],
+            stage = "map",
+            level = 0,
+            progress_callback = progress_callback,
+        )
+        labelled_summaries = [
+            f"[Part {summary_index + 1} Summary]\n{summary}"
+            for summary_index, summary in enumerate(summaries)
+        ]
+
+        for level in range(1, MAX_REDUCE_LEVELS + 1):
+            summary_groups = await self.group_to_budget(model, labelled_summaries, token_budget)
+            if len(summary_groups) <= 1:
+                break
+
+            logger.info(f"🧮 Reducing {len(labelled_summaries)} summaries into {len(summary_groups)} at level {level}")
+            reduced_summaries = await self.summarize_concurrently(
+                model = model,
+                prompts = [
+                    self.build_reduce_prompt(user_goal, summary_group)
+                    for summary_group in summary_groups
+                ],
+                stage = "reduce",
+                level = level,
+                progress_callback = progress_callback,
+            )
+            labelled_summaries = [
+                f"[Part {summary_index + 1} Summary]\n{summary}"
+                for summary_index, summary in enumerate(reduced_summaries)
+            ]
+
+        return "\n\n".join(labelled_summaries).strip()
+
+    def chunk_token_budget(self, model) -> int:
+        context_window = model.context_window() or DEFAULT_CONTEXT_WINDOW
+        concurrency = max(1, self.model_manager.batch_concurrency(model))
+        return max(256, context_window // concurrency - PROMPT_OVERHEAD_TOKENS - SUMMARY_RESERVE_TOKENS)
+
+    async def split_document(self, model, document: str, token_budget: int) -> list[str]:
+        token_pieces = await self.model_manager.tokenize_pieces(model, document)
+        if token_pieces is None:
+            return self.split_by_characters(document, token_budget * CHARS_PER_TOKEN_ESTIMATE)
+
+        chunks = []
+        start = 0
+        while start < len(token_pieces):
+            end = min(start + token_budget, len(token_pieces))
+
+            # Try not to cut mid-paragraph: back off to a line break in the last quarter of the chunk
+            if end < len(token_pieces):
+                earliest_cut = start + token_budget * 3 // 4
+                for cut in range(end, earliest_cut, -1):
+                    if b"\n" in token_pieces[cut - 1]:
+                        end = cut
+                        break
+
+            chunk_text = b"".join(token_pieces[start:end]).decode("utf-8", errors = "ignore").strip()
+            if chunk_text:
+                chunks.append(chunk_text)
+
+            start = end
+
+        return chunks
+
+    def split_by_characters(self, text: str, max_chars: int) -> list[str]:
+        chunks = []
+        start = 0
+        length = len(text)
+
+        while start < length:
+            end = min(start + max_chars, length)
+
+            if end < length:
+                newline = text.rfind("\n\n", start, end)
+                if newline > start:
+                    end = newline
+
+            chunk = text[start:end].strip()
+            if chunk:
+                chunks.append(chunk)
+
+            start = end
+
+        return chunks
+
+    async def group_to_budget(self, model, summaries: list[str], token_budget: int) -> list[list[str]]:
+        summary_token_counts = await asyncio.gather(
+            *(self.count_tokens(model, summary) for summary in summaries),
+        )
+        if sum(summary_token_counts) <= token_budget:
+            return [summaries]
+
+        summary_groups: list[list[str]] = []
+        current_group: list[str] = []
+        current_group_tokens = 0
+        for summary, summary_tokens in zip(summaries, summary_token_counts):
+            if current_group and current_group_tokens + summary_tokens > token_budget:
+                summary_groups.append(current_group)
+                current_group = []
+                current_group_tokens = 0
+
+            current_group.append(summary)
+            current_group_tokens += summary_tokens
+
+        if current_group:
+            summary_groups.append(current_group)
+
+        # Merge at least two summaries per call, or the reduction would never shrink
+        if len(summary_groups) == len(summaries):
+            summary_groups = [
+                summaries[group_start:group_start + 2]
+                for group_start in range(0, len(summaries), 2)
+            ]
+
+        return summary_groups
+
+    async def count_tokens(self, model, text: str) -> int:
+        token_count = await self.model_manager.count_tokens(model, text)
+        if token_count is None:
+            return len(text) // CHARS_PER_TOKEN_ESTIMATE + 1
+
+        return token_count
+
+    async def summarize_concurrently(
+        self,
+        model,
+        prompts: list[str],
+        stage: str,
+        level: int,
+        progress_callback: ProgressCallback | None,
+    ) -> list[str]:
+        item_label = "chunks" if stage == "map" else "partial summaries"
+
+        async def report_progress(completed_count: int, total_count: int):
+            await progress_callback(
+                f"Summarized {completed_count}/{total_count} {item_label}",
+                {
+                    "stage": stage,
+                    "level": level,
+                    "completed": completed_count,
+                    "total": total_count,
+                },
+            )
+
+        responses = await self.model_manager.ask_model_batch(
+            model,
+            [[Message(role="user", content=prompt)] for prompt in prompts],
+            prompt_family = "batch",
+            item_completed_callback = report_progress if progress_callback is not None else None,
+        )
+
+        summaries = []
+        for response in responses:
+            if "</think>" in response:
+                response = response.split("</think>", 1)[1]
+            summaries.append(response.strip())
+
+        return summaries
+
+    def build_map_prompt(self, user_goal: str, chunk_text: str, chunk_index: int, chunk_count: int) -> str:
+        return (
+            f"You are reading part {chunk_index + 1}/{chunk_count} of a document.\n\n"
+            f"The user's goal is:\n{user_goal}\n\n"
+            f"Here is the next part:\n\n{chunk_text}\n\n"
+            "Summarize key details that are relevant to the user's goal.\n"
+            "If nothing is relevant, respond briefly.\n"
+            "Be concise — memory is limited."
+        )
+
+    def build_reduce_prompt(self, user_goal: str, summaries: list[str]) -> str:
+        joined_summaries = "\n\n".join(summaries)
+        return (
+            "You are combining partial summaries of one long document.\n\n"
+            f"The user's goal is:\n{user_goal}\n\n"
+            f"Here are the partial summaries, in document order:\n\n{joined_summaries}\n\n"
+            "Merge them into one summary that keeps every detail relevant to the user's goal.\n"
+            "Drop repetition and anything irrelevant.\n"
+            "Be concise — memory is limited."
+        )
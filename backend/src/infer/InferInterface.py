@@ -16,19 +16,6 @@ class InferInterface(ABC):
         ) -> str:
         pass
 
-    @abstractmethod
-    def ask_model_in_chunks(
-        self,
-        model,
-        llm,
-        messages: list[Message],
-        user_goal: str = None,
-        system_prompt: str = None,
-        tools: list = None,
-        tool_choice: str = "auto"
-        ) -> str:
-            pass
-
     @abstractmethod
     async def ask_model_stream(
         self, 
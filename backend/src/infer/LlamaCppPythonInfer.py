@@ -1,4 +1,4 @@
-from llama_cpp import ChatCompletionStreamResponseChoice, ChatCompletionStreamResponseDelta, CreateChatCompletionStreamResponse, Llama, CreateChatCompletionResponse,ChatCompletionResponseChoice, ChatCompletionResponseMessage, ChatCompletionRequestUserMessage
+from llama_cpp import LlamaGrammar, ChatCompletionStreamResponseChoice, ChatCompletionStreamResponseDelta, CreateChatCompletionStreamResponse, Llama, CreateChatCompletionResponse,ChatCompletionResponseChoice, ChatCompletionResponseMessage, ChatCompletionRequestUserMessage
 import gc
 import torch
 import time
@@ -28,6 +28,10 @@ class LlamaCppPythonInfer(InferInterface):
             system_prompt: str = None,
             tools: list = None,  # Optional tools param
             tool_choice: str = "auto",
+            response_format: dict = None,
+            grammar: str = None,
+            max_tokens: int = None,
+            stop: list[str] = None,
             ) -> str:
         if system_prompt:
             messages.insert(0, Message(role="system", content=system_prompt))
@@ -47,6 +51,10 @@ class LlamaCppPythonInfer(InferInterface):
                 messages=[m.model_dump() for m in messages],
                 tools=tools if tools else None,
                 tool_choice=tool_choice if tools else None,
+                response_format=to_llama_cpp_response_format(response_format),
+                grammar=LlamaGrammar.from_string(grammar) if grammar and not response_format else None,
+                max_tokens=max_tokens,
+                stop=stop,
                 stream=False,
                 temperature=0.3,
             )
@@ -209,3 +217,14 @@ class LlamaCppPythonInfer(InferInterface):
         return chunked_messages
 
 
+
+
+def to_llama_cpp_response_format(response_format: dict = None) -> dict | None:
+    # llama-cpp-python takes the schema inline on a json_object format
+    if not response_format:
+        return None
+
+    if response_format.get("type") == "json_schema":
+        return {"type": "json_object", "schema": response_format["json_schema"]["schema"]}
+
+    return response_format
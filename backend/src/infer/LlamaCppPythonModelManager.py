@@ -1,3 +1,4 @@
+import asyncio
 import gc
 import torch
 import time
@@ -13,7 +14,7 @@ from src.config.Model import Model
 from src.infer.InferInterface import InferInterface
 from src.infer.LlamaCppPythonInfer import LlamaCppPythonInfer
 from src.message_structures.message import Message
-from src.infer.ModelManager import ModelManager
+from src.infer.ModelManager import ModelManager, build_output_options
 
 logger = logging.getLogger("uvicorn.error")
 
@@ -31,19 +32,22 @@ class LlamaCppPythonModelManager(ModelManager):
         self.loaded_models: OrderedDict[str, Llama] = OrderedDict()
         self.max_loaded = max_loaded
 
-    def ask_model_in_chunks(
+    async def ask_model_in_chunks(
         self,
         model: Model,
         messages: list[Message],
         user_goal: str = None,
         system_prompt: str = None,
         tools: list = None,
-        tool_choice: str = "auto"
+        tool_choice: str = "auto",
+        progress_callback = None,
     ) -> str:
         
         llm = self.ready_model(model)
 
-        return self.inference_engine.ask_model_in_chunks(
+        # llama-cpp-python is blocking, so keep it off the event loop
+        return await asyncio.to_thread(
+            self.inference_engine.ask_model_in_chunks,
             model,
             llm,
             messages,
@@ -54,31 +58,67 @@ class LlamaCppPythonModelManager(ModelManager):
         )
         
 
-    def ask_model(
+    async def ask_model(
         self,
         model: Model,
         messages: list[Message],
         tools=None,
         tool_choice: str = "auto",
         system_prompt: str = None,
+        prompt_family: str = "",
+        cache_response: bool = False,
+        response_format: dict = None,
+        grammar: str = None,
+        max_tokens: int = None,
     ):
+        generation_profile = self.config.generation_profile(prompt_family)
+        output_options = build_output_options(
+            response_format,
+            grammar,
+            max_tokens,
+            generation_profile=generation_profile,
+        )
+        cache_key, cached_response = "", None
+        if cache_response:
+            cache_key, cached_response = self.lookup_cached_response(
+                model,
+                messages,
+                system_prompt,
+                tools,
+                tool_choice,
+                output_options=output_options,
+            )
+            if cached_response is not None:
+                return cached_response
+
         llm = self.ready_model(model)
 
-        return self.inference_engine.ask_model(
+        response = await asyncio.to_thread(
+            self.inference_engine.ask_model,
             model,
             llm, 
             messages,
             system_prompt=system_prompt,
             tools=tools,
             tool_choice=tool_choice,
+            response_format=response_format,
+            grammar=grammar,
+            max_tokens=max_tokens or generation_profile.max_tokens,
+            stop=list(generation_profile.stop) or None,
         )
+        self.store_cached_response(cache_key, response)
+        return response
 
     async def ask_model_stream(
         self,
         model: Model,
         messages: list[Message],
-        system_prompt: str = None
+        system_prompt: str = None,
+        prompt_family: str = "",
+        tools=None,
+        tool_choice: str = "auto",
     ):
+        # The llama-cpp-python stream has no tool-call deltas, so tool-enabled callers get a plain answer
         llm = self.ready_model(model)
 
         async for chunk in self.inference_engine.ask_model_stream(
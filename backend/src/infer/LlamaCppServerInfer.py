@@ -1,11 +1,14 @@
+import asyncio
 import json
 import time
-import requests
+import httpx
 import logging
-from typing import List
 from datetime import datetime, timezone
 
+from src.config.GenerationProfile import GenerationProfile
 from src.infer.InferInterface import InferInterface
+from src.infer.LlamaServerSlotPlanner import ANY_SLOT, LlamaServerSlotPlanner
+from src.infer.ToolCallStreamParser import ToolCallStreamParser
 from src.message_structures.message import Message
 from src.telemetry.run_telemetry import get_current_run_recorder
 
@@ -13,16 +16,35 @@ logger = logging.getLogger("uvicorn.error")
 
 
 class LlamaCppServerInfer(InferInterface):
-    MAX_CHARS_PER_CHUNK = 8000  # conservative, model-agnostic
+    REQUEST_TIMEOUT_SECONDS = 300
+    CONNECT_TIMEOUT_SECONDS = 10
+    MAX_CONNECTIONS = 16
 
-    def __init__(self, base_url: str):
+    def __init__(
+        self,
+        base_url: str,
+        slot_count: int = 1,
+        generation_profiles: dict[str, GenerationProfile] | None = None,
+    ):
         self.base_url = base_url
+        self.default_slot_count = max(1, slot_count)
+        self.generation_profiles = generation_profiles or {}
+        self.slot_planners: dict[str, LlamaServerSlotPlanner] = {}
+        self.http_client = build_http_client(
+            base_url = base_url,
+            request_timeout_seconds = self.REQUEST_TIMEOUT_SECONDS,
+            connect_timeout_seconds = self.CONNECT_TIMEOUT_SECONDS,
+            max_connections = self.MAX_CONNECTIONS,
+        )
+
+    async def close(self):
+        await self.http_client.aclose()
 
     # =========================
     # STANDARD INFERENCE
     # =========================
 
-    def ask_model(
+    async def ask_model(
         self,
         model,
         llm_unused,
@@ -30,29 +52,52 @@ class LlamaCppServerInfer(InferInterface):
         system_prompt: str = None,
         tools = None,
         tool_choice: str = "auto",
+        prompt_family: str = "",
+        slot_id: int | None = None,
+        queue_ms: int = 0,
+        queue_depth: int = 0,
+        response_format: dict | None = None,
+        grammar: str | None = None,
+        max_tokens: int | None = None,
     ) -> str:
+        if slot_id is None:
+            slot_id = self.resolve_slot(model, prompt_family)
+
         payload = self.build_payload(
             model,
             messages,
             tools,
             system_prompt,
             tool_choice = tool_choice,
+            slot_id = slot_id,
+            response_format = response_format,
+            grammar = grammar,
+            max_tokens = max_tokens,
+            prompt_family = prompt_family,
         )
 
         recorder = get_current_run_recorder()
         invocation_index = -1
         if recorder is not None:
-            invocation_index = recorder.start_model_invocation(model = model, kind = "chat_completion")
+            invocation_index = recorder.start_model_invocation(
+                model = model,
+                kind = "chat_completion",
+                slot_id = slot_id,
+                queue_ms = queue_ms,
+                queue_depth = queue_depth,
+                prompt_family = prompt_family,
+                output_constraint = self.describe_output_constraint(tools, response_format, grammar),
+                max_tokens = payload.get("max_tokens", 0),
+            )
 
         started_at = time.perf_counter()
         try:
-            r = requests.post(
-                f"{self.base_url}/v1/chat/completions",
+            r = await self.http_client.post(
+                "/v1/chat/completions",
                 json = payload,
-                timeout = 300,
             )
 
-            self.raise_for_status_with_context(r, payload)
+            await self.raise_for_status_with_context(r, payload)
 
             data = r.json()
             choice = data["choices"][0]
@@ -65,13 +110,14 @@ class LlamaCppServerInfer(InferInterface):
                     invocation_index,
                     usage = usage,
                     reasoning_content = reasoning_content,
+                    finish_reason = choice.get("finish_reason") or "",
                 )
 
             if choice["finish_reason"] == "tool_calls":
                 return message_payload["tool_calls"]
 
             if choice["finish_reason"] == "length":
-                logger.warning("⚠️ Message truncated")
+                logger.warning("⚠️ Message truncated at %s tokens for %s", payload.get("max_tokens", "context"), prompt_family or "chat")
 
             elapsed_seconds = max(0.001, time.perf_counter() - started_at)
             if usage.get("completion_tokens"):
@@ -97,13 +143,25 @@ class LlamaCppServerInfer(InferInterface):
         model,
         messages: list[Message],
         system_prompt: str = None,
+        prompt_family: str = "",
+        slot_id: int | None = None,
+        queue_ms: int = 0,
+        queue_depth: int = 0,
+        tools = None,
+        tool_choice: str = "auto",
     ):
+        if slot_id is None:
+            slot_id = self.resolve_slot(model, prompt_family)
+
         payload = self.build_payload(
             model = model,
             messages = messages,
-            tools = None,
+            tools = tools,
             system_prompt = system_prompt,
+            tool_choice = tool_choice,
             stream = True,
+            slot_id = slot_id,
+            prompt_family = prompt_family,
         )
         logger.info(
             "llama-server streaming request: model=%s stream=%s message_count=%s",
@@ -115,29 +173,35 @@ class LlamaCppServerInfer(InferInterface):
         recorder = get_current_run_recorder()
         invocation_index = -1
         if recorder is not None:
-            invocation_index = recorder.start_model_invocation(model = model, kind = "stream_chat_completion")
+            invocation_index = recorder.start_model_invocation(
+                model = model,
+                kind = "stream_chat_completion",
+                slot_id = slot_id,
+                queue_ms = queue_ms,
+                queue_depth = queue_depth,
+                prompt_family = prompt_family,
+                output_constraint = self.describe_output_constraint(tools, None, None),
+                max_tokens = payload.get("max_tokens", 0),
+            )
 
         first_token_at = None
+        finish_reason = ""
+        tool_call_parser = ToolCallStreamParser()
+        tool_call_started = False
         usage = {}
         reasoning_parts: list[str] = []
         terminal_status = "completed"
 
         try:
-            with requests.post(
-                f"{self.base_url}/v1/chat/completions",
+            async with self.http_client.stream(
+                "POST",
+                "/v1/chat/completions",
                 json = payload,
-                stream = True,
-                timeout = 300,
             ) as r:
-                self.raise_for_status_with_context(r, payload)
+                await self.raise_for_status_with_context(r, payload)
 
-                for raw in r.iter_lines(decode_unicode=False):
-                    if not raw:
-                        continue
-
-                    try:
-                        line = raw.decode("utf-8")
-                    except UnicodeDecodeError:
+                async for line in r.aiter_lines():
+                    if not line:
                         continue
 
                     if not line.startswith("data:"):
@@ -152,7 +216,11 @@ class LlamaCppServerInfer(InferInterface):
                     except json.JSONDecodeError:
                         continue
 
-                    delta_payload = chunk["choices"][0]["delta"]
+                    choices = chunk.get("choices") or []
+                    if choices and choices[0].get("finish_reason"):
+                        finish_reason = choices[0]["finish_reason"]
+
+                    delta_payload = (choices[0].get("delta") or {}) if choices else {}
                     reasoning_delta = delta_payload.get("reasoning_content")
                     if reasoning_delta:
                         reasoning_parts.append(reasoning_delta)
@@ -165,8 +233,29 @@ class LlamaCppServerInfer(InferInterface):
 
                         yield {"type": "chunk", "content": delta}
 
-                    usage = self.extract_usage(chunk) or usage
+                    tool_call_deltas = delta_payload.get("tool_calls") or []
+                    if tool_call_deltas and not tool_call_started:
+                        # Lets callers stop treating content as the answer before any call completes
+                        tool_call_started = True
+                        yield {"type": "tool_call_started"}
 
+                    # Release each tool call as soon as its arguments close, before the stream ends
+                    for tool_call in tool_call_parser.feed(tool_call_deltas):
+                        if first_token_at is None:
+                            first_token_at = datetime.now(timezone.utc)
+
+                        yield {"type": "tool_call", "tool_call": tool_call}
+
+                    # Usage and timings can arrive on different chunks near the end of the stream
+                    chunk_usage = self.extract_usage(chunk)
+                    usage.update({key: value for key, value in chunk_usage.items() if value})
+
+            for tool_call in tool_call_parser.flush():
+                yield {"type": "tool_call", "tool_call": tool_call}
+
+        except asyncio.CancelledError:
+            terminal_status = "cancelled"
+            raise
         except Exception:
             terminal_status = "failed"
             raise
@@ -178,105 +267,57 @@ class LlamaCppServerInfer(InferInterface):
                     first_token_at = first_token_at,
                     reasoning_content = "".join(reasoning_parts).strip(),
                     status = terminal_status,
+                    finish_reason = finish_reason,
                 )
 
-    # =========================
-    # CHUNKED INFERENCE
-    # =========================
-
-    def ask_model_in_chunks(
-        self,
-        model,
-        llm_unused,
-        messages: list[Message],
-        user_goal: str = None,
-        system_prompt: str = None,
-        tools = None,
-        tool_choice: str = "auto",
-    ) -> str:
-        """
-        Reads long input in character-based chunks and returns an aggregated summary.
-        """
-
-        if system_prompt:
-            messages = [Message(role="system", content=system_prompt)] + messages
-
-        user_query = user_goal or messages[-1].content
-        logger.info(f"🧠 Chunked inference for goal: {user_query[:80]}")
-
-        # Combine all usable text into one document
-        long_context = "\n\n".join(
-            m.content for m in messages
-            if isinstance(m.content, str) and m.content.strip()
-        )
-
-        logger.info(f"📄 Total context length: {len(long_context)} characters")
-
-        chunks = self.split_into_chunks(long_context)
-        logger.info(f"📦 Split into {len(chunks)} chunks")
+    async def tokenize_pieces(self, model, text: str) -> list[bytes] | None:
+        """Return the UTF-8 bytes of each token in `text`, or None when the tokenizer is unavailable."""
+        token_data = await self.post_tokenize(model, text, with_pieces = True)
+        if token_data is None:
+            return None
 
-        memory_summary = ""
+        token_pieces = []
+        for token in token_data:
+            piece = token.get("piece", "") if isinstance(token, dict) else ""
+            # Pieces that are not valid UTF-8 on their own arrive as byte lists
+            if isinstance(piece, list):
+                token_pieces.append(bytes(piece))
+            else:
+                token_pieces.append(str(piece).encode("utf-8"))
 
-        for idx, chunk_text in enumerate(chunks):
-            prompt = (
-                f"You are reading part {idx + 1}/{len(chunks)} of a document.\n\n"
-                f"The user's goal is:\n{user_query}\n\n"
-                f"Here is the next part:\n\n{chunk_text}\n\n"
-                "Summarize key details that are relevant to the user's goal.\n"
-                "If nothing is relevant, respond briefly.\n"
-                "Be concise — memory is limited."
-            )
+        return token_pieces
 
-            step_messages = [Message(role="user", content=prompt)]
+    async def count_tokens(self, model, text: str) -> int | None:
+        token_data = await self.post_tokenize(model, text)
+        if token_data is None:
+            return None
 
-            logger.info(f"🧩 Processing chunk {idx + 1}/{len(chunks)}")
+        return len(token_data)
 
-            response = self.ask_model(
-                model = model,
-                llm_unused = None,
-                messages = step_messages,
-                system_prompt = None,
-                tools = None,
-                tool_choice = "auto",
+    async def post_tokenize(self, model, text: str, with_pieces: bool = False) -> list | None:
+        try:
+            response = await self.http_client.post(
+                "/tokenize",
+                json = {
+                    "model": model.name,
+                    "content": text,
+                    "with_pieces": with_pieces,
+                },
             )
+        except httpx.HTTPError:
+            logger.warning("llama-server tokenize request failed, falling back to character estimates")
+            return None
 
-            if "</think>" in response:
-                response = response.split("</think>", 1)[1]
-
-            memory_summary += f"\n\n[Part {idx + 1} Summary]\n{response.strip()}"
+        if not response.is_success:
+            logger.warning("llama-server tokenize returned HTTP %s", response.status_code)
+            return None
 
-        logger.info("✅ Completed chunked inference")
-        return memory_summary.strip()
+        return response.json().get("tokens", [])
 
     # =========================
     # HELPERS
     # =========================
 
-    def split_into_chunks(self, text: str) -> List[str]:
-        """
-        Split text into roughly equal character-sized chunks.
-        """
-        chunks = []
-        start = 0
-        length = len(text)
-
-        while start < length:
-            end = min(start + self.MAX_CHARS_PER_CHUNK, length)
-
-            # Try not to cut mid-paragraph
-            if end < length:
-                newline = text.rfind("\n\n", start, end)
-                if newline != -1:
-                    end = newline
-
-            chunk = text[start:end].strip()
-            if chunk:
-                chunks.append(chunk)
-
-            start = end
-
-        return chunks
-
     def build_payload(
         self,
         model,
@@ -285,7 +326,13 @@ class LlamaCppServerInfer(InferInterface):
         system_prompt: str = None,
         tool_choice: str = "auto",
         stream: bool = False,
+        slot_id: int = ANY_SLOT,
+        response_format: dict | None = None,
+        grammar: str | None = None,
+        max_tokens: int | None = None,
+        prompt_family: str = "",
     ):
+        generation_profile = self.generation_profiles.get(prompt_family) or GenerationProfile()
         msgs = []
 
         if system_prompt:
@@ -297,9 +344,19 @@ class LlamaCppServerInfer(InferInterface):
             "model": self.resolve_server_model_identifier(model),
             "messages": msgs,
             "stream": stream,
+            # Reuse the KV cache for the unchanged prompt prefix held in the slot
+            "cache_prompt": True,
         }
 
+        if slot_id != ANY_SLOT:
+            payload["id_slot"] = slot_id
+
         thinking_budget = self.resolve_thinking_budget(model)
+        if generation_profile.thinking_budget is not None:
+            thinking_budget = generation_profile.thinking_budget
+        # Constrained output is the whole answer, so reasoning tokens would only add latency
+        if response_format or grammar:
+            thinking_budget = 0
         if thinking_budget == 0:
             payload["chat_template_kwargs"] = {"enable_thinking": False}
         if thinking_budget and thinking_budget > 0:
@@ -309,20 +366,74 @@ class LlamaCppServerInfer(InferInterface):
             payload["tools"] = tools
             payload["tool_choice"] = tool_choice
 
+        if response_format:
+            payload["response_format"] = response_format
+        elif grammar:
+            payload["grammar"] = grammar
+
+        # An explicit cap from the caller wins over the role's profile
+        max_tokens = max_tokens or generation_profile.max_tokens
+        if max_tokens:
+            payload["max_tokens"] = max_tokens
+
+        if generation_profile.stop:
+            payload["stop"] = list(generation_profile.stop)
+
         return payload
 
+    def describe_output_constraint(self, tools, response_format: dict | None, grammar: str | None) -> str:
+        if response_format:
+            return response_format.get("type", "json_object")
+        if grammar:
+            return "grammar"
+        if tools:
+            return "tool_call"
+        return ""
+
+    def resolve_slot(self, model, prompt_family: str = "") -> int:
+        return self.slot_planner_for(model).resolve_slot(
+            session_key = self.current_session_key(),
+            prompt_family = prompt_family,
+        )
+
+    def slot_count_for(self, model) -> int:
+        # Models with a benchmarked `parallel_slots` preset run with their own --parallel
+        return model.parallel_slots() or self.default_slot_count
+
+    def slot_planner_for(self, model) -> LlamaServerSlotPlanner:
+        slot_planner = self.slot_planners.get(model.name)
+        if slot_planner is None:
+            slot_planner = LlamaServerSlotPlanner(self.slot_count_for(model))
+            self.slot_planners[model.name] = slot_planner
+
+        return slot_planner
+
+    def current_session_key(self) -> str:
+        recorder = get_current_run_recorder()
+        if recorder is None:
+            return ""
+
+        return str(recorder.session_id)
+
     def extract_usage(self, response_data: dict) -> dict:
         usage = response_data.get("usage")
-        if not isinstance(usage, dict):
+        timings = response_data.get("timings")
+        if not isinstance(usage, dict) and not isinstance(timings, dict):
             return {}
 
+        usage = usage if isinstance(usage, dict) else {}
+        timings = timings if isinstance(timings, dict) else {}
+
         return {
             "prompt_tokens": usage.get("prompt_tokens") or usage.get("input_tokens") or 0,
             "completion_tokens": usage.get("completion_tokens") or usage.get("output_tokens") or 0,
             "total_tokens": usage.get("total_tokens") or 0,
-            "prompt_eval_ms": usage.get("prompt_eval_ms") or 0,
-            "decode_ms": usage.get("decode_ms") or 0,
+            "prompt_eval_ms": usage.get("prompt_eval_ms") or timings.get("prompt_ms") or 0,
+            "decode_ms": usage.get("decode_ms") or timings.get("predicted_ms") or 0,
             "queue_ms": usage.get("queue_ms") or 0,
+            # llama-server reports how much of the prompt came from the slot's KV cache
+            "cached_prompt_tokens": timings.get("cache_n") or 0,
+            "evaluated_prompt_tokens": timings.get("prompt_n") or 0,
         }
 
     def resolve_server_model_identifier(self, model) -> str:
@@ -345,16 +456,20 @@ class LlamaCppServerInfer(InferInterface):
             logger.warning("Could not parse thinking budget for model %s: %s", getattr(model, "name", ""), raw_thinking_budget)
             return None
 
-    def raise_for_status_with_context(self, response, payload):
-        if response.ok:
+    async def raise_for_status_with_context(self, response: httpx.Response, payload):
+        if response.is_success:
             return
 
+        await response.aread()
         response_text = response.text.strip()
         payload_summary = {
             "model": payload.get("model"),
             "stream": payload.get("stream", False),
             "has_tools": "tools" in payload,
             "tool_choice": payload.get("tool_choice"),
+            "response_format": (payload.get("response_format") or {}).get("type"),
+            "has_grammar": "grammar" in payload,
+            "max_tokens": payload.get("max_tokens"),
             "message_count": len(payload.get("messages", [])),
             "last_message_preview": self.last_message_preview(payload),
         }
@@ -375,3 +490,19 @@ class LlamaCppServerInfer(InferInterface):
             return ""
 
         return content[:200]
+
+
+def build_http_client(
+    base_url: str,
+    request_timeout_seconds: float,
+    connect_timeout_seconds: float,
+    max_connections: int,
+) -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        base_url = base_url,
+        timeout = httpx.Timeout(request_timeout_seconds, connect = connect_timeout_seconds),
+        limits = httpx.Limits(
+            max_connections = max_connections,
+            max_keepalive_connections = max_connections,
+        ),
+    )
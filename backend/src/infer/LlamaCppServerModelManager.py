@@ -1,81 +1,304 @@
+import asyncio
 import logging
 import time
+from collections import OrderedDict
+from contextlib import aclosing
 
-import requests
+import httpx
 
 from src.config.Model import Model
+from src.infer.ChunkedSummarizer import ChunkedSummarizer
 from src.infer.LlamaCppServerInfer import LlamaCppServerInfer
+from src.infer.LlamaServerModelStatusCache import LlamaServerModelStatusCache
 from src.infer.LlamaServerProcess import LlamaServerProcess
-from src.infer.ModelManager import ModelManager
+from src.infer.LlamaServerSlotPlanner import ANY_SLOT, RESERVED_PROMPT_FAMILIES
+from src.infer.LlamaServerSlotSnapshotStore import LlamaServerSlotSnapshotStore
+from src.infer.ModelInvocationScheduler import ModelInvocationScheduler
+from src.infer.ModelManager import ModelManager, build_output_options
+from src.infer.ModelResidencyPlanner import ModelResidencyPlanner
+from src.infer.ModelResponseCache import ModelResponseCache
 from src.message_structures.message import Message
+from src.telemetry.run_telemetry import ModelSwapTelemetryRecord, get_current_run_recorder, now_utc
 
 logger = logging.getLogger("uvicorn.error")
 
 
 class LlamaCppServerModelManager(ModelManager):
-    def __init__(self, config, server: LlamaServerProcess):
+    def __init__(
+        self,
+        config,
+        server: LlamaServerProcess,
+        hardware_profile: dict | None = None,
+        response_cache: ModelResponseCache | None = None,
+    ):
         self.config = config
+        self.response_cache = response_cache
         self.server = server
         self.server.start()
 
-        self.inference_engine = LlamaCppServerInfer(server.base_url)
-        self.current_loaded_model_name = ""
+        self.inference_engine = LlamaCppServerInfer(
+            server.base_url,
+            slot_count = server.parallel,
+            generation_profiles = config.generation_profiles,
+        )
+        self.http_client = self.inference_engine.http_client
+        self.model_status_cache = LlamaServerModelStatusCache(self.http_client)
+        self.residency_planner = ModelResidencyPlanner(hardware_profile)
+        self.model_swap_lock = asyncio.Lock()
+        self.invocation_scheduler = ModelInvocationScheduler(
+            is_model_resident = lambda model_name: model_name in self.resident_models,
+        )
 
-    def ask_model(
+        # Loaded models in least-recently-used first order
+        self.resident_models: OrderedDict[str, Model] = OrderedDict()
+
+        # Which session's KV state each slot holds, per resident model
+        self.slot_sessions: dict[str, dict[int, str]] = {}
+        self.slot_snapshot_store = None
+        if server.slot_save_path:
+            self.slot_snapshot_store = LlamaServerSlotSnapshotStore(
+                http_client = self.http_client,
+                snapshot_directory = server.slot_save_path,
+            )
+
+    async def ask_model(
         self,
         model: Model,
         messages: list[Message],
         tools = None,
         tool_choice: str = "auto",
         system_prompt: str = None,
+        prompt_family: str = "",
+        cache_response: bool = False,
+        response_format: dict = None,
+        grammar: str = None,
+        max_tokens: int = None,
     ):
-        self.ensure_loaded(model)
-        return self.inference_engine.ask_model(
-            model,
-            None,
-            messages,
-            system_prompt,
-            tools,
-            tool_choice,
+        output_options = build_output_options(
+            response_format,
+            grammar,
+            max_tokens,
+            generation_profile = self.config.generation_profile(prompt_family),
+        )
+        cache_key, cached_response = "", None
+        if cache_response:
+            cache_key, cached_response = self.lookup_cached_response(
+                model,
+                messages,
+                system_prompt,
+                tools,
+                tool_choice,
+                output_options = output_options,
+            )
+            if cached_response is not None:
+                return cached_response
+
+        async with self.invocation_scheduler.admit(model.name) as admission:
+            await self.ensure_loaded(model)
+            self.invocation_scheduler.mark_model_ready(model.name)
+            slot_id = await self.prepare_slot(model, prompt_family)
+            try:
+                response = await self.inference_engine.ask_model(
+                    model,
+                    None,
+                    messages,
+                    system_prompt,
+                    tools,
+                    tool_choice,
+                    prompt_family = prompt_family,
+                    slot_id = slot_id,
+                    queue_ms = admission.queue_ms,
+                    queue_depth = admission.queue_depth,
+                    response_format = response_format,
+                    grammar = grammar,
+                    max_tokens = max_tokens,
+                )
+            except httpx.HTTPStatusError:
+                # The model may have been unloaded behind our back, so re-check before the next call
+                self.model_status_cache.invalidate()
+                raise
+
+        self.store_cached_response(cache_key, response)
+        return response
+
+    async def ask_model_stream(self, model: Model, messages, prompt_family: str = "", **kwargs):
+        # The admission is held for the whole stream so a swap cannot unload the model mid-answer
+        async with self.invocation_scheduler.admit(model.name) as admission:
+            await self.ensure_loaded(model)
+            self.invocation_scheduler.mark_model_ready(model.name)
+            slot_id = await self.prepare_slot(model, prompt_family)
+            stream = self.inference_engine.ask_model_stream(
+                model,
+                messages,
+                prompt_family = prompt_family,
+                slot_id = slot_id,
+                queue_ms = admission.queue_ms,
+                queue_depth = admission.queue_depth,
+                **kwargs,
+            )
+
+            # Close the inner stream promptly when a caller stops early so the HTTP request is aborted
+            async with aclosing(stream):
+                async for chunk in stream:
+                    yield chunk
+
+    async def ask_model_in_chunks(self, model, messages, user_goal, progress_callback = None):
+        """Read long input in token-sized chunks and return a map-reduced summary."""
+        user_query = user_goal or messages[-1].content
+        logger.info(f"🧠 Chunked inference for goal: {user_query[:80]}")
+
+        # Combine all usable text into one document
+        long_context = "\n\n".join(
+            message.content for message in messages
+            if isinstance(message.content, str) and message.content.strip()
         )
+        logger.info(f"📄 Total context length: {len(long_context)} characters")
 
-    async def ask_model_stream(self, model: Model, messages, **kwargs):
-        self.ensure_loaded(model)
-        async for chunk in self.inference_engine.ask_model_stream(
-            model,
-            messages,
-            **kwargs,
-        ):
-            yield chunk
-
-    def ask_model_in_chunks(self, model, messages, user_goal):
-        self.ensure_loaded(model)
-        return self.inference_engine.ask_model_in_chunks(
-            model,
-            None,
-            messages,
-            user_goal = user_goal,
+        # Each map and reduce call is admitted on its own through ask_model_batch
+        summary = await ChunkedSummarizer(self).summarize(
+            model = model,
+            document = long_context,
+            user_goal = user_query,
+            progress_callback = progress_callback,
         )
 
-    def ensure_loaded(self, model: Model):
-        model_status = self.get_model_status(model)
-        if self.current_loaded_model_name == model.name and model_status == "loaded":
+        logger.info("✅ Completed chunked inference")
+        return summary
+
+    def batch_concurrency(self, model: Model) -> int:
+        return self.inference_engine.slot_count_for(model)
+
+    async def count_tokens(self, model: Model, text: str) -> int | None:
+        return await self.inference_engine.count_tokens(model, text)
+
+    async def tokenize_pieces(self, model: Model, text: str) -> list[bytes] | None:
+        return await self.inference_engine.tokenize_pieces(model, text)
+
+    def is_model_active(self, model: Model) -> bool:
+        return bool(model.name) and model.name in self.resident_models
+
+    async def close(self):
+        for resident_model in list(self.resident_models.values()):
+            await self.snapshot_model_sessions(resident_model)
+
+        await self.model_status_cache.close()
+        await self.inference_engine.close()
+
+    async def prepare_slot(self, model: Model, prompt_family: str = "") -> int:
+        slot_id = self.inference_engine.resolve_slot(model, prompt_family)
+        if slot_id == ANY_SLOT:
+            return slot_id
+
+        model_slot_sessions = self.slot_sessions.setdefault(model.name, {})
+        if prompt_family in RESERVED_PROMPT_FAMILIES:
+            model_slot_sessions.pop(slot_id, None)
+            return slot_id
+
+        session_key = self.inference_engine.current_session_key()
+        outgoing_session_key = model_slot_sessions.get(slot_id)
+        if not session_key or outgoing_session_key == session_key:
+            return slot_id
+
+        if self.slot_snapshot_store is not None:
+            if outgoing_session_key:
+                # The slot is about to be overwritten, so keep the outgoing session's newer prefix on disk
+                await self.save_session_slot(model, outgoing_session_key, slot_id)
+
+            await self.slot_snapshot_store.restore(
+                model_name = self.resolve_server_model_identifier(model),
+                session_key = session_key,
+                slot_id = slot_id,
+            )
+
+        model_slot_sessions[slot_id] = session_key
+        return slot_id
+
+    async def snapshot_model_sessions(self, model: Model):
+        if self.slot_snapshot_store is None:
+            return
+
+        model_slot_sessions = self.slot_sessions.get(model.name, {})
+        for slot_id, session_key in list(model_slot_sessions.items()):
+            await self.save_session_slot(model, session_key, slot_id)
+
+    async def save_session_slot(self, model: Model, session_key: str, slot_id: int):
+        model_name = self.resolve_server_model_identifier(model)
+        saved = await self.slot_snapshot_store.save(
+            model_name = model_name,
+            session_key = session_key,
+            slot_id = slot_id,
+        )
+        if not saved:
+            # An older snapshot would restore a prefix that no longer matches the session's history
+            self.slot_snapshot_store.discard(model_name, session_key)
+
+    async def ensure_loaded(self, model: Model):
+        self.model_status_cache.start_background_refresh()
+
+        # Hot path: trust the cache, which our own loads and unloads keep current
+        model_identifier = self.resolve_server_model_identifier(model)
+        model_status = self.model_status_cache.cached_status(model_identifier)
+        if model.name in self.resident_models and model_status == "loaded":
+            self.resident_models.move_to_end(model.name)
             return
 
+        async with self.model_swap_lock:
+            await self.load_model(model)
+
+    async def load_model(self, model: Model):
+        # Swaps are the slow path, so pay for an up-to-date view of the server here
+        model_status = await self.get_model_status(model, refresh = True)
+        self.forget_unloaded_models()
         if model_status == "loaded":
-            logger.info("Model %s already loaded in llama-server", model.name)
-            self.current_loaded_model_name = model.name
+            if model.name not in self.resident_models:
+                logger.info("Model %s already loaded in llama-server", model.name)
+                self.slot_sessions[model.name] = {}
+
+            self.mark_model_resident(model)
             return
 
+        swap_started_at = now_utc()
+        evicted_models = self.residency_planner.models_to_evict(model, self.resident_models)
+        swap_status = "failed"
+        unload_ms = 0
+        status_poll_count = 0
+
+        try:
+            unload_started_at = time.perf_counter()
+            for evicted_model in evicted_models:
+                await self.unload_model(evicted_model)
+            unload_ms = round((time.perf_counter() - unload_started_at) * 1000)
+
+            status_poll_count = await self.request_model_load(model)
+            swap_status = "completed"
+        finally:
+            swap_record = self.record_model_swap(
+                model = model,
+                evicted_models = evicted_models,
+                started_at = swap_started_at,
+                status = swap_status,
+                unload_ms = unload_ms,
+                status_poll_count = status_poll_count,
+            )
+
+        logger.info(
+            "Model %s loaded in %sms (%s status polls); resident models: %s",
+            model.name,
+            swap_record["elapsed_ms"],
+            status_poll_count,
+            ", ".join(self.resident_models),
+        )
+
+    async def request_model_load(self, model: Model) -> int:
         logger.info("Loading model %s", model.name)
-        response = requests.post(
-            f"{self.server.base_url}/models/load",
-            json = {"model": self.resolve_server_model_identifier(model)},
-            timeout = 300,
+        model_identifier = self.resolve_server_model_identifier(model)
+        response = await self.http_client.post(
+            "/models/load",
+            json = {"model": model_identifier},
         )
 
-        if not response.ok:
-            model_status = self.get_model_status(model)
+        if not response.is_success:
+            model_status = await self.get_model_status(model, refresh = True)
             if model_status in {"loaded", "loading"}:
                 logger.info(
                     "Model %s was already active with status %s after load request",
@@ -84,41 +307,91 @@ class LlamaCppServerModelManager(ModelManager):
                 )
             else:
                 response.raise_for_status()
+        else:
+            self.model_status_cache.set_status(model_identifier, "loading")
 
-        self.wait_for_model_loaded(model)
+        status_poll_count = await self.wait_for_model_loaded(model)
 
-        logger.info("Model %s loaded", model.name)
-        self.current_loaded_model_name = model.name
+        self.slot_sessions[model.name] = {}
+        self.mark_model_resident(model)
+        return status_poll_count
 
-    def is_model_loaded(self, model: Model) -> bool:
-        return self.get_model_status(model) == "loaded"
+    async def unload_model(self, model: Model):
+        # Unloading drops the model's slot caches, so keep the session prefixes on disk first
+        await self.snapshot_model_sessions(model)
 
-    def get_model_status(self, model: Model) -> str:
-        response = requests.get(
-            f"{self.server.base_url}/models",
-            timeout = 300,
+        logger.info("Unloading model %s to make room", model.name)
+        model_identifier = self.resolve_server_model_identifier(model)
+        response = await self.http_client.post(
+            "/models/unload",
+            json = {"model": model_identifier},
         )
-        response.raise_for_status()
+        if response.is_success:
+            self.model_status_cache.set_status(model_identifier, "unloaded")
+        else:
+            logger.warning("Unload request for %s returned HTTP %s", model.name, response.status_code)
+            self.model_status_cache.invalidate()
+
+        self.resident_models.pop(model.name, None)
+        self.slot_sessions.pop(model.name, None)
+
+    def mark_model_resident(self, model: Model):
+        self.resident_models[model.name] = model
+        self.resident_models.move_to_end(model.name)
 
-        all_model_data = response.json()["data"]
-        for model_data in all_model_data:
-            model_identifier = self.resolve_server_model_identifier(model)
-            if model_data["id"] != model_identifier:
+    def forget_unloaded_models(self):
+        # A crashed or restarted server drops models without telling us
+        for resident_model in list(self.resident_models.values()):
+            model_identifier = self.resolve_server_model_identifier(resident_model)
+            if self.model_status_cache.cached_status(model_identifier) in {"loaded", "loading"}:
                 continue
 
-            return model_data["status"]["value"]
+            logger.info("Model %s is no longer loaded in llama-server", resident_model.name)
+            self.resident_models.pop(resident_model.name, None)
+            self.slot_sessions.pop(resident_model.name, None)
+
+    def record_model_swap(
+        self,
+        model: Model,
+        evicted_models: list[Model],
+        started_at,
+        status: str,
+        unload_ms: int = 0,
+        status_poll_count: int = 0,
+    ) -> dict:
+        swap_record = ModelSwapTelemetryRecord(
+            model_name = model.name,
+            evicted_model_names = [evicted_model.name for evicted_model in evicted_models],
+            started_at = started_at,
+            ended_at = now_utc(),
+            status = status,
+            unload_ms = unload_ms,
+            status_poll_count = status_poll_count,
+        )
+
+        recorder = get_current_run_recorder()
+        if recorder is not None:
+            recorder.note_model_swap(swap_record)
+
+        return swap_record.to_payload()
 
-        return ""
+    async def is_model_loaded(self, model: Model) -> bool:
+        return await self.get_model_status(model) == "loaded"
 
-    def wait_for_model_loaded(self, model: Model):
-        model_status = self.get_model_status(model)
+    async def get_model_status(self, model: Model, refresh: bool = False) -> str:
+        return await self.model_status_cache.get_status(
+            self.resolve_server_model_identifier(model),
+            refresh = refresh,
+        )
 
-        while model_status == "loading":
-            time.sleep(1)
-            model_status = self.get_model_status(model)
+    async def wait_for_model_loaded(self, model: Model) -> int:
+        model_status, status_poll_count = await self.model_status_cache.wait_for_status(
+            self.resolve_server_model_identifier(model),
+            pending_statuses = {"loading"},
+        )
 
         if model_status == "loaded":
-            return
+            return status_poll_count
 
         raise RuntimeError(
             f"Model {model.name} did not reach loaded state. Final status: {model_status or 'unknown'}",
@@ -0,0 +1,115 @@
+import asyncio
+import logging
+import time
+
+import httpx
+
+logger = logging.getLogger("uvicorn.error")
+
+DEFAULT_STATUS_TTL_SECONDS = 5.0
+BACKGROUND_REFRESH_INTERVAL_SECONDS = 5.0
+LOAD_POLL_INITIAL_SECONDS = 0.05
+LOAD_POLL_MAX_SECONDS = 1.0
+LOAD_TIMEOUT_SECONDS = 600.0
+
+
+class LlamaServerModelStatusCache:
+    """Model statuses from llama-server `/models`, kept current by our own actions and a background refresh."""
+
+    def __init__(
+        self,
+        http_client: httpx.AsyncClient,
+        ttl_seconds: float = DEFAULT_STATUS_TTL_SECONDS,
+    ):
+        self.http_client = http_client
+        self.ttl_seconds = ttl_seconds
+        self.statuses: dict[str, str] = {}
+        self.refreshed_at = 0.0
+        self.refresh_lock = asyncio.Lock()
+        self.refresh_task: asyncio.Task | None = None
+
+    @property
+    def is_fresh(self) -> bool:
+        return self.refreshed_at > 0 and time.monotonic() - self.refreshed_at < self.ttl_seconds
+
+    def cached_status(self, model_identifier: str) -> str:
+        return self.statuses.get(model_identifier, "")
+
+    def set_status(self, model_identifier: str, status: str) -> None:
+        self.statuses[model_identifier] = status
+
+    def invalidate(self) -> None:
+        self.refreshed_at = 0.0
+
+    async def get_status(self, model_identifier: str, refresh: bool = False) -> str:
+        if refresh or not self.is_fresh:
+            await self.refresh()
+
+        return self.cached_status(model_identifier)
+
+    async def refresh(self) -> None:
+        # Concurrent callers share one /models round trip
+        refresh_requested_at = time.monotonic()
+        async with self.refresh_lock:
+            if self.refreshed_at >= refresh_requested_at:
+                return
+
+            response = await self.http_client.get("/models")
+            response.raise_for_status()
+
+            self.statuses = {
+                model_data["id"]: model_data["status"]["value"]
+                for model_data in response.json()["data"]
+            }
+            self.refreshed_at = time.monotonic()
+
+    async def wait_for_status(
+        self,
+        model_identifier: str,
+        pending_statuses: set[str],
+        timeout_seconds: float = LOAD_TIMEOUT_SECONDS,
+    ) -> tuple[str, int]:
+        """Poll with exponential backoff until the status leaves `pending_statuses`; return it and the poll count."""
+        deadline = time.monotonic() + timeout_seconds
+        poll_delay_seconds = LOAD_POLL_INITIAL_SECONDS
+        poll_count = 1
+        model_status = await self.get_status(model_identifier, refresh = True)
+
+        while model_status in pending_statuses and time.monotonic() < deadline:
+            await asyncio.sleep(poll_delay_seconds)
+            poll_delay_seconds = min(poll_delay_seconds * 2, LOAD_POLL_MAX_SECONDS)
+            poll_count += 1
+            model_status = await self.get_status(model_identifier, refresh = True)
+
+        return model_status, poll_count
+
+    def start_background_refresh(self) -> None:
+        if self.refresh_task is not None and not self.refresh_task.done():
+            return
+
+        self.refresh_task = asyncio.create_task(
+            self.refresh_periodically(),
+            name = "llama-server-model-status",
+        )
+
+    async def refresh_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(BACKGROUND_REFRESH_INTERVAL_SECONDS)
+            try:
+                await self.refresh()
+            except httpx.HTTPError as error:
+                # Leave the cache stale so the next caller refreshes on demand
+                logger.debug("Background model status refresh failed: %s", error)
+                self.invalidate()
+
+    async def close(self) -> None:
+        if self.refresh_task is None:
+            return
+
+        self.refresh_task.cancel()
+        try:
+            await self.refresh_task
+        except asyncio.CancelledError:
+            pass
+
+        self.refresh_task = None
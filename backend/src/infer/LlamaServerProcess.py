@@ -14,24 +14,39 @@ class LlamaServerProcess:
         models_dir: str,
         models_config: str,
         port: int = 8080,
+        parallel: int = 4,
+        models_max: int = 4,
+        cache_reuse_tokens: int = 256,
+        slot_save_path: str = "",
     ):
         self.port = port
         self.base_url = f"http://127.0.0.1:{port}"
         self.proc: subprocess.Popen | None = None
         self.models_dir = models_dir
+        self.parallel = max(1, parallel)
+        self.models_max = max(1, models_max)
+        self.slot_save_path = slot_save_path
 
         self.cmd = [
             llama_server_path,
             "--models-dir", models_dir,
             "--models-preset", models_config,
             "--no-models-autoload",
-            "--models-max", "1",
-            "--parallel", "1",
+            # Upper bound only; LlamaCppServerModelManager decides what stays resident
+            "--models-max", str(self.models_max),
+            "--parallel", str(self.parallel),
+            # One KV buffer shared by every slot, so extra slots do not split ctx-size
+            "--kv-unified",
+            "--cache-reuse", str(cache_reuse_tokens),
             "--metrics",
             "--slots",
             "--port", str(port),
         ]
 
+        if slot_save_path:
+            os.makedirs(slot_save_path, exist_ok = True)
+            self.cmd.extend(["--slot-save-path", slot_save_path])
+
         atexit.register(self.shutdown)
 
     def start(self):
@@ -0,0 +1,66 @@
+from collections import OrderedDict
+
+# Prompt families with a stable, reusable prefix get their own slot so their KV state
+# is not evicted by long conversation prompts.
+RESERVED_PROMPT_FAMILIES = ("router", "acknowledgement")
+
+# One-off prompts fanned out across slots; pinning them to the session slot would serialize them
+UNPINNED_PROMPT_FAMILIES = ("batch",)
+
+ANY_SLOT = -1
+
+
+class LlamaServerSlotPlanner:
+    def __init__(self, slot_count: int):
+        self.slot_count = max(1, int(slot_count))
+        self.family_slots = self.build_family_slots()
+        self.session_slot_ids = [
+            slot_id
+            for slot_id in range(self.slot_count)
+            if slot_id not in self.family_slots.values()
+        ] or [self.slot_count - 1]
+        self.session_slots: OrderedDict[str, int] = OrderedDict()
+
+    def build_family_slots(self) -> dict[str, int]:
+        # Keep at least one slot free for conversations
+        reservable_slot_count = self.slot_count - 1
+        if reservable_slot_count <= 0:
+            return {}
+
+        family_slots = {}
+        for family_index, prompt_family in enumerate(RESERVED_PROMPT_FAMILIES):
+            family_slots[prompt_family] = min(family_index, reservable_slot_count - 1)
+
+        return family_slots
+
+    def resolve_slot(self, session_key: str = "", prompt_family: str = "") -> int:
+        if self.slot_count == 1:
+            return 0
+
+        if prompt_family in self.family_slots:
+            return self.family_slots[prompt_family]
+
+        if prompt_family in UNPINNED_PROMPT_FAMILIES:
+            return ANY_SLOT
+
+        if not session_key:
+            return ANY_SLOT
+
+        return self.resolve_session_slot(session_key)
+
+    def resolve_session_slot(self, session_key: str) -> int:
+        if session_key in self.session_slots:
+            self.session_slots.move_to_end(session_key)
+            return self.session_slots[session_key]
+
+        claimed_slot_ids = set(self.session_slots.values())
+        free_slot_ids = [slot_id for slot_id in self.session_slot_ids if slot_id not in claimed_slot_ids]
+        if free_slot_ids:
+            slot_id = free_slot_ids[0]
+        else:
+            # Hand the least recently active session's slot to the new session
+            least_recent_session_key, slot_id = next(iter(self.session_slots.items()))
+            del self.session_slots[least_recent_session_key]
+
+        self.session_slots[session_key] = slot_id
+        return slot_id
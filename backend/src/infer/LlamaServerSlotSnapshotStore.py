@@ -0,0 +1,192 @@
+import hashlib
+import json
+import logging
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+import httpx
+
+logger = logging.getLogger("uvicorn.error")
+
+DEFAULT_SNAPSHOT_DISK_BUDGET_BYTES = 4 * 1024 * 1024 * 1024
+INDEX_FILENAME = "index.json"
+
+
+@dataclass
+class SlotSnapshotEntry:
+    model_name: str
+    session_key: str
+    filename: str
+    size_bytes: int
+    saved_at: float
+    last_used_at: float
+
+
+class LlamaServerSlotSnapshotStore:
+    def __init__(
+        self,
+        http_client: httpx.AsyncClient,
+        snapshot_directory: Path,
+        disk_budget_bytes: int = DEFAULT_SNAPSHOT_DISK_BUDGET_BYTES,
+    ):
+        self.http_client = http_client
+        self.snapshot_directory = Path(snapshot_directory)
+        self.snapshot_directory.mkdir(parents = True, exist_ok = True)
+        self.index_path = self.snapshot_directory / INDEX_FILENAME
+        self.disk_budget_bytes = disk_budget_bytes
+        self.entries: dict[str, SlotSnapshotEntry] = self.load_index()
+
+    def has_snapshot(self, model_name: str, session_key: str) -> bool:
+        return self.snapshot_key(model_name, session_key) in self.entries
+
+    async def save(self, model_name: str, session_key: str, slot_id: int) -> bool:
+        filename = self.snapshot_filename(model_name, session_key)
+        response_data = await self.post_slot_action(
+            action = "save",
+            model_name = model_name,
+            slot_id = slot_id,
+            filename = filename,
+        )
+        if response_data is None:
+            return False
+
+        size_bytes = int(response_data.get("n_written") or 0) or self.file_size(filename)
+        current_time = time.time()
+        self.entries[self.snapshot_key(model_name, session_key)] = SlotSnapshotEntry(
+            model_name = model_name,
+            session_key = session_key,
+            filename = filename,
+            size_bytes = size_bytes,
+            saved_at = current_time,
+            last_used_at = current_time,
+        )
+        logger.info("Saved slot %s for session %s on %s (%s bytes)", slot_id, session_key, model_name, size_bytes)
+
+        self.evict_to_budget()
+        self.write_index()
+        return True
+
+    async def restore(self, model_name: str, session_key: str, slot_id: int) -> bool:
+        snapshot_key = self.snapshot_key(model_name, session_key)
+        entry = self.entries.get(snapshot_key)
+        if entry is None:
+            return False
+
+        if not (self.snapshot_directory / entry.filename).exists():
+            del self.entries[snapshot_key]
+            self.write_index()
+            return False
+
+        response_data = await self.post_slot_action(
+            action = "restore",
+            model_name = model_name,
+            slot_id = slot_id,
+            filename = entry.filename,
+        )
+        if response_data is None:
+            return False
+
+        entry.last_used_at = time.time()
+        self.write_index()
+        logger.info(
+            "Restored slot %s for session %s on %s (%s tokens)",
+            slot_id,
+            session_key,
+            model_name,
+            response_data.get("n_restored", 0),
+        )
+        return True
+
+    def discard(self, model_name: str, session_key: str) -> None:
+        entry = self.entries.pop(self.snapshot_key(model_name, session_key), None)
+        if entry is None:
+            return
+
+        (self.snapshot_directory / entry.filename).unlink(missing_ok = True)
+        self.write_index()
+
+    async def post_slot_action(
+        self,
+        action: str,
+        model_name: str,
+        slot_id: int,
+        filename: str,
+    ) -> dict | None:
+        try:
+            response = await self.http_client.post(
+                f"/slots/{slot_id}",
+                params = {"action": action},
+                json = {"filename": filename, "model": model_name},
+            )
+        except httpx.HTTPError:
+            logger.exception("Slot %s request failed for slot %s", action, slot_id)
+            return None
+
+        if not response.is_success:
+            logger.warning(
+                "llama-server rejected slot %s for slot %s: HTTP %s %s",
+                action,
+                slot_id,
+                response.status_code,
+                response.text[:500],
+            )
+            return None
+
+        return response.json()
+
+    def evict_to_budget(self) -> None:
+        total_size_bytes = sum(entry.size_bytes for entry in self.entries.values())
+        if total_size_bytes <= self.disk_budget_bytes:
+            return
+
+        entries_by_age = sorted(self.entries.items(), key = lambda item: item[1].last_used_at)
+        for snapshot_key, entry in entries_by_age:
+            if total_size_bytes <= self.disk_budget_bytes:
+                return
+
+            (self.snapshot_directory / entry.filename).unlink(missing_ok = True)
+            del self.entries[snapshot_key]
+            total_size_bytes -= entry.size_bytes
+            logger.info("Evicted slot snapshot for session %s on %s", entry.session_key, entry.model_name)
+
+    def load_index(self) -> dict[str, SlotSnapshotEntry]:
+        if not self.index_path.exists():
+            return {}
+
+        try:
+            raw_entries = json.loads(self.index_path.read_text(encoding = "utf-8"))
+        except (OSError, json.JSONDecodeError):
+            logger.warning("Could not read slot snapshot index, starting empty")
+            return {}
+
+        entries = {}
+        for snapshot_key, raw_entry in raw_entries.items():
+            try:
+                entries[snapshot_key] = SlotSnapshotEntry(**raw_entry)
+            except TypeError:
+                continue
+
+        return entries
+
+    def write_index(self) -> None:
+        serialized_entries = {
+            snapshot_key: asdict(entry)
+            for snapshot_key, entry in self.entries.items()
+        }
+        self.index_path.write_text(json.dumps(serialized_entries, indent = 2), encoding = "utf-8")
+
+    def file_size(self, filename: str) -> int:
+        snapshot_path = self.snapshot_directory / filename
+        if not snapshot_path.exists():
+            return 0
+
+        return snapshot_path.stat().st_size
+
+    def snapshot_key(self, model_name: str, session_key: str) -> str:
+        return f"{model_name}::{session_key}"
+
+    def snapshot_filename(self, model_name: str, session_key: str) -> str:
+        # llama-server only accepts plain filenames, so hash the key into a safe name
+        key_hash = hashlib.sha1(self.snapshot_key(model_name, session_key).encode("utf-8")).hexdigest()
+        return f"{key_hash}.bin"
@@ -0,0 +1,202 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Callable
+
+logger = logging.getLogger("uvicorn.error")
+
+DEFAULT_MAX_QUEUE_WAIT_SECONDS = 2.0
+
+
+@dataclass
+class InvocationAdmission:
+    model_name: str
+    enqueued_at: float
+    queue_depth: int
+    future: asyncio.Future = field(repr = False)
+    admitted_at: float = 0.0
+
+    @property
+    def queue_ms(self) -> int:
+        if not self.admitted_at:
+            return 0
+
+        return round((self.admitted_at - self.enqueued_at) * 1000)
+
+
+class ModelInvocationScheduler:
+    """Admit model invocations in per-model groups so interleaved sessions do not thrash model swaps.
+
+    Invocations for a model that is already loaded run straight away. An invocation that needs a
+    swap waits until in-flight work drains, and queued invocations for the same model are admitted
+    together once it is loaded. A request waiting longer than `max_queue_wait_seconds` stops new
+    work for other models from being admitted, so no session starves behind a busy model.
+    """
+
+    def __init__(
+        self,
+        is_model_resident: Callable[[str], bool],
+        max_queue_wait_seconds: float = DEFAULT_MAX_QUEUE_WAIT_SECONDS,
+    ):
+        self.is_model_resident = is_model_resident
+        self.max_queue_wait_seconds = max_queue_wait_seconds
+        self.waiting: dict[str, deque[InvocationAdmission]] = {}
+        self.active_counts: dict[str, int] = {}
+        self.swapping_model_name = ""
+        self.starvation_timer: asyncio.TimerHandle | None = None
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(len(model_queue) for model_queue in self.waiting.values())
+
+    @property
+    def active_count(self) -> int:
+        return sum(self.active_counts.values())
+
+    @asynccontextmanager
+    async def admit(self, model_name: str):
+        admission = InvocationAdmission(
+            model_name = model_name,
+            enqueued_at = time.monotonic(),
+            queue_depth = self.queue_depth,
+            future = asyncio.get_running_loop().create_future(),
+        )
+        self.waiting.setdefault(model_name, deque()).append(admission)
+        self.dispatch()
+
+        try:
+            await admission.future
+        except asyncio.CancelledError:
+            self.withdraw(admission)
+            raise
+
+        try:
+            yield admission
+        finally:
+            self.release(model_name)
+
+    def mark_model_ready(self, model_name: str) -> None:
+        if self.swapping_model_name != model_name:
+            return
+
+        self.swapping_model_name = ""
+        self.dispatch()
+
+    def withdraw(self, admission: InvocationAdmission) -> None:
+        if admission.future.done() and not admission.future.cancelled():
+            # Cancelled between admission and resuming, so hand the place back
+            self.release(admission.model_name)
+            return
+
+        model_queue = self.waiting.get(admission.model_name)
+        if model_queue and admission in model_queue:
+            model_queue.remove(admission)
+
+        self.dispatch()
+
+    def release(self, model_name: str) -> None:
+        remaining_count = self.active_counts.get(model_name, 0) - 1
+        if remaining_count > 0:
+            self.active_counts[model_name] = remaining_count
+        else:
+            self.active_counts.pop(model_name, None)
+
+        # A failed swap must not block everyone else
+        if self.swapping_model_name == model_name and model_name not in self.active_counts:
+            self.swapping_model_name = ""
+
+        self.dispatch()
+
+    def dispatch(self) -> None:
+        while True:
+            model_name = self.next_admissible_model()
+            if not model_name:
+                return
+
+            if not self.is_ready(model_name):
+                self.swapping_model_name = model_name
+                logger.info(
+                    "Scheduling swap to %s with %s queued invocations",
+                    model_name,
+                    len(self.waiting[model_name]),
+                )
+
+            self.admit_model_queue(model_name)
+
+    def next_admissible_model(self) -> str:
+        waiting_model_names = [
+            model_name
+            for model_name, model_queue in self.waiting.items()
+            if model_queue
+        ]
+        if not waiting_model_names:
+            return ""
+
+        # While a swap is in flight, only its own queue may join it
+        if self.swapping_model_name:
+            if self.swapping_model_name in waiting_model_names:
+                return self.swapping_model_name
+            return ""
+
+        oldest_model_name = min(
+            waiting_model_names,
+            key = lambda model_name: self.waiting[model_name][0].enqueued_at,
+        )
+        oldest_wait_seconds = time.monotonic() - self.waiting[oldest_model_name][0].enqueued_at
+        if oldest_wait_seconds >= self.max_queue_wait_seconds:
+            if self.is_ready(oldest_model_name) or self.active_count == 0:
+                return oldest_model_name
+
+            # Hold back other models so in-flight work drains and the starved model can swap in
+            return ""
+
+        for model_name in waiting_model_names:
+            if self.is_ready(model_name):
+                return model_name
+
+        if self.active_count > 0:
+            self.schedule_starvation_check()
+            return ""
+
+        # Nothing loaded is wanted, so swap to the model with the most queued work
+        return max(
+            waiting_model_names,
+            key = lambda model_name: (
+                len(self.waiting[model_name]),
+                -self.waiting[model_name][0].enqueued_at,
+            ),
+        )
+
+    def is_ready(self, model_name: str) -> bool:
+        if self.swapping_model_name:
+            return model_name == self.swapping_model_name
+
+        return model_name in self.active_counts or self.is_model_resident(model_name)
+
+    def admit_model_queue(self, model_name: str) -> None:
+        model_queue = self.waiting.pop(model_name, deque())
+        admitted_at = time.monotonic()
+        for admission in model_queue:
+            if admission.future.done():
+                continue
+
+            admission.admitted_at = admitted_at
+            self.active_counts[model_name] = self.active_counts.get(model_name, 0) + 1
+            admission.future.set_result(None)
+
+    def schedule_starvation_check(self) -> None:
+        # Re-run dispatch once the oldest waiter crosses the wait bound, even if nothing releases
+        oldest_enqueued_at = min(
+            model_queue[0].enqueued_at
+            for model_queue in self.waiting.values()
+            if model_queue
+        )
+        remaining_seconds = max(0.0, oldest_enqueued_at + self.max_queue_wait_seconds - time.monotonic())
+
+        if self.starvation_timer is not None:
+            self.starvation_timer.cancel()
+
+        self.starvation_timer = asyncio.get_running_loop().call_later(remaining_seconds, self.dispatch)
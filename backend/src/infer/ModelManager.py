@@ -1,17 +1,28 @@
+import asyncio
+import copy
+import json
+from dataclasses import asdict
+import logging
 from abc import ABC, abstractmethod
 from llama_cpp import Llama
-from typing import Dict, Any
+from typing import Any, Awaitable, Callable, Dict
 
 from src.message_structures.message import Message
+from src.config.GenerationProfile import GenerationProfile
 from src.config.ModelConfig import ModelConfig
 from src.infer.InferInterface import InferInterface
+from src.infer.ModelResponseCache import ModelResponseCache
 from src.config.Model import Model
+from src.telemetry.run_telemetry import get_current_run_recorder
+
+logger = logging.getLogger("uvicorn.error")
 
 class ModelManager(ABC):
 
     config: ModelConfig
     inference_engine: InferInterface
     loaded_models: Dict[str, Model]
+    response_cache: ModelResponseCache | None = None
 
     def __init__(
             self, 
@@ -22,25 +33,31 @@ class ModelManager(ABC):
         self.inference_engine = inference_engine
 
     @abstractmethod
-    def ask_model(
+    async def ask_model(
         self,
         model: Model,
         messages: list[Message],
         tools = None,
         tool_choice: str = "auto",
-        system_prompt: str = None
+        system_prompt: str = None,
+        prompt_family: str = "",
+        cache_response: bool = False,
+        response_format: dict = None,
+        grammar: str = None,
+        max_tokens: int = None
     ):
         pass
 
     @abstractmethod
-    def ask_model_in_chunks(
+    async def ask_model_in_chunks(
         self,
         model: Model,
         messages: list[Message],
         user_goal: str,
         system_prompt: str = None,
         tools = None,
-        tool_choice: str = "auto"
+        tool_choice: str = "auto",
+        progress_callback = None
     ):
         pass
     
@@ -49,6 +66,166 @@ class ModelManager(ABC):
         self,
         model: Model, 
         messages: list[Message],
-        system_prompt: str = None
+        system_prompt: str = None,
+        prompt_family: str = "",
+        tools = None,
+        tool_choice: str = "auto"
     ):
+        """Yield `chunk`, `reasoning` and, when tools are given, `tool_call_started` and `tool_call` events as they arrive."""
         pass
+
+    async def ask_model_batch(
+        self,
+        model: Model,
+        message_batches: list[list[Message]],
+        system_prompt: str = None,
+        prompt_family: str = "batch",
+        item_completed_callback: Callable[[int, int], Awaitable[None]] | None = None
+    ) -> list[str]:
+        """Answer independent prompts concurrently, up to `batch_concurrency(model)` at a time, in input order.
+
+        `item_completed_callback(completed_count, total_count)` is awaited as each answer arrives.
+        """
+        batch_semaphore = asyncio.Semaphore(max(1, self.batch_concurrency(model)))
+        completed_count = 0
+
+        async def ask_batch_item(messages: list[Message]) -> str:
+            nonlocal completed_count
+
+            async with batch_semaphore:
+                response = await self.ask_model(
+                    model,
+                    messages,
+                    system_prompt = system_prompt,
+                    prompt_family = prompt_family,
+                )
+
+            completed_count += 1
+            if item_completed_callback is not None:
+                await item_completed_callback(completed_count, len(message_batches))
+
+            return response
+
+        return list(await asyncio.gather(*(ask_batch_item(messages) for messages in message_batches)))
+
+    def batch_concurrency(self, model: Model) -> int:
+        return 1
+
+    async def ask_model_structured(
+        self,
+        model: Model,
+        messages: list[Message],
+        schema_name: str,
+        schema: dict,
+        max_tokens: int = None,
+        system_prompt: str = None,
+        prompt_family: str = "",
+        cache_response: bool = False
+    ) -> dict | None:
+        """Decode a JSON object constrained to `schema`, or return None when no valid object comes back."""
+        response = await self.ask_model(
+            model,
+            messages,
+            system_prompt = system_prompt,
+            prompt_family = prompt_family,
+            cache_response = cache_response,
+            response_format = build_json_schema_response_format(schema_name, schema),
+            max_tokens = max_tokens,
+        )
+        return parse_structured_response(response)
+
+    def lookup_cached_response(
+        self,
+        model: Model,
+        messages: list[Message],
+        system_prompt: str = None,
+        tools = None,
+        tool_choice: str = "auto",
+        output_options: dict | None = None
+    ) -> tuple[str, Any]:
+        """Return the cache key and cached response, or ("", None) when caching is unavailable."""
+        if self.response_cache is None:
+            return "", None
+
+        cache_key = self.response_cache.build_key(
+            model = model,
+            messages = messages,
+            system_prompt = system_prompt,
+            tools = tools,
+            tool_choice = tool_choice,
+            output_options = output_options,
+        )
+        cached_response = self.response_cache.get(cache_key)
+
+        recorder = get_current_run_recorder()
+        if recorder is not None:
+            recorder.note_response_cache_lookup(hit = cached_response is not None)
+
+        # Callers may mutate tool-call payloads, so never hand out the cached object itself
+        return cache_key, copy.deepcopy(cached_response)
+
+    def store_cached_response(self, cache_key: str, response) -> None:
+        if not cache_key or self.response_cache is None or not response:
+            return
+
+        self.response_cache.put(cache_key, copy.deepcopy(response))
+
+    async def count_tokens(self, model: Model, text: str) -> int | None:
+        """Count tokens with the model's own tokenizer, or return None when none is available."""
+        return None
+
+    async def tokenize_pieces(self, model: Model, text: str) -> list[bytes] | None:
+        """Return the UTF-8 bytes of each token in `text`, or None when no tokenizer is available."""
+        return None
+
+    def is_model_active(self, model: Model) -> bool:
+        loaded_models = getattr(self, "loaded_models", None) or {}
+        return model.name in loaded_models
+
+
+def build_output_options(
+    response_format: dict = None,
+    grammar: str = None,
+    max_tokens: int = None,
+    generation_profile: GenerationProfile = None
+) -> dict:
+    output_options = {
+        "response_format": response_format,
+        "grammar": grammar,
+        "max_tokens": max_tokens,
+    }
+    if generation_profile is not None and generation_profile != GenerationProfile():
+        output_options["generation_profile"] = asdict(generation_profile)
+
+    return {key: value for key, value in output_options.items() if value}
+
+
+def build_json_schema_response_format(schema_name: str, schema: dict) -> dict:
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": schema_name,
+            "strict": True,
+            "schema": schema,
+        },
+    }
+
+
+def parse_structured_response(response) -> dict | None:
+    # llama-cpp-python returns the whole completion rather than just its content
+    if isinstance(response, dict) and "choices" in response:
+        response = response["choices"][0].get("message", {}).get("content")
+
+    if not isinstance(response, str) or not response.strip():
+        return None
+
+    try:
+        parsed_response = json.loads(response)
+    except json.JSONDecodeError:
+        logger.warning("Structured response was not valid JSON: %s", response[:200])
+        return None
+
+    if not isinstance(parsed_response, dict):
+        return None
+
+    return parsed_response
@@ -0,0 +1,85 @@
+from collections import OrderedDict
+
+from src.config.Model import Model
+
+# Rough KV cache cost for the small and mid-size models in the registry at f16/q8 cache types
+KV_CACHE_GIB_PER_1K_TOKENS = 0.08
+COMPUTE_BUFFER_GIB = 0.5
+VRAM_HEADROOM_GIB = 1.0
+RAM_HEADROOM_GIB = 6.0
+
+
+class ModelResidencyPlanner:
+    def __init__(self, hardware_profile: dict | None = None):
+        hardware_profile = hardware_profile or {}
+        self.total_vram_gib = float(hardware_profile.get("total_vram_gib") or 0.0)
+        self.system_ram_gib = float(hardware_profile.get("system_ram_gib") or 0.0)
+
+    @property
+    def knows_hardware(self) -> bool:
+        return self.total_vram_gib > 0
+
+    @property
+    def vram_budget_gib(self) -> float:
+        return max(0.0, self.total_vram_gib - VRAM_HEADROOM_GIB)
+
+    @property
+    def ram_budget_gib(self) -> float:
+        return max(0.0, self.system_ram_gib - RAM_HEADROOM_GIB)
+
+    def estimate_model_memory_gib(self, model: Model) -> float:
+        context_window = model.context_window() or 8192
+        kv_cache_gib = context_window / 1024 * KV_CACHE_GIB_PER_1K_TOKENS
+        return self.weights_gib(model) + kv_cache_gib + COMPUTE_BUFFER_GIB
+
+    def weights_gib(self, model: Model) -> float:
+        # A speculative draft model is loaded with its target and shares its lifetime
+        return float(model.size or 0.0) + float(model.draft_model_size or 0.0)
+
+    def models_to_evict(
+        self,
+        model: Model,
+        resident_models: OrderedDict[str, Model],
+    ) -> list[Model]:
+        """Return resident models to unload, least recently used first, so `model` fits."""
+        other_resident_models = [
+            resident_model
+            for resident_name, resident_model in resident_models.items()
+            if resident_name != model.name
+        ]
+
+        # Without a hardware profile, keep the old one-model-at-a-time behaviour
+        if not self.knows_hardware:
+            return other_resident_models
+
+        # Partially offloaded models take the whole GPU and spill into system RAM
+        if not model.fits_in_gpu:
+            return other_resident_models
+
+        evicted_models = [
+            resident_model
+            for resident_model in other_resident_models
+            if not resident_model.fits_in_gpu
+        ]
+        remaining_models = [
+            resident_model
+            for resident_model in other_resident_models
+            if resident_model.fits_in_gpu
+        ]
+
+        while remaining_models and not self.fits_together([*remaining_models, model]):
+            evicted_models.append(remaining_models.pop(0))
+
+        return evicted_models
+
+    def fits_together(self, models: list[Model]) -> bool:
+        required_vram_gib = sum(self.estimate_model_memory_gib(model) for model in models)
+        if required_vram_gib > self.vram_budget_gib:
+            return False
+
+        # Every resident model also keeps a host-side copy of its mmap'd weights
+        if self.ram_budget_gib <= 0:
+            return True
+
+        required_ram_gib = sum(self.weights_gib(model) for model in models)
+        return required_ram_gib <= self.ram_budget_gib
@@ -0,0 +1,162 @@
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from src.config.Model import Model
+from src.message_structures.message import Message
+
+logger = logging.getLogger("uvicorn.error")
+
+DEFAULT_MAX_MEMORY_ENTRIES = 512
+DEFAULT_TTL_SECONDS = 24 * 60 * 60
+DEFAULT_DISK_BUDGET_BYTES = 64 * 1024 * 1024
+CACHE_FORMAT_VERSION = 1
+
+
+@dataclass
+class CachedResponse:
+    value: Any
+    stored_at: float
+
+
+class ModelResponseCache:
+    """Exact-match cache for model responses that callers opt into per call.
+
+    Keys cover the model identity, its sampling preset, the tools schema, any output constraints and the whitespace-normalized
+    messages, so any prompt or configuration change is a miss. Entries live in an in-memory LRU and,
+    when a directory is given, in one JSON file per key on disk.
+    """
+
+    def __init__(
+        self,
+        cache_directory: Path | None = None,
+        max_memory_entries: int = DEFAULT_MAX_MEMORY_ENTRIES,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        disk_budget_bytes: int = DEFAULT_DISK_BUDGET_BYTES,
+    ):
+        self.cache_directory = Path(cache_directory) if cache_directory else None
+        if self.cache_directory is not None:
+            self.cache_directory.mkdir(parents = True, exist_ok = True)
+
+        self.max_memory_entries = max_memory_entries
+        self.ttl_seconds = ttl_seconds
+        self.disk_budget_bytes = disk_budget_bytes
+        self.memory_entries: OrderedDict[str, CachedResponse] = OrderedDict()
+
+    def build_key(
+        self,
+        model: Model,
+        messages: list[Message],
+        system_prompt: str = None,
+        tools = None,
+        tool_choice: str = "auto",
+        output_options: dict | None = None,
+    ) -> str:
+        key_payload = {
+            "version": CACHE_FORMAT_VERSION,
+            "model": [model.id, model.name, model.path],
+            "runtime_preset": model.runtime_preset or {},
+            "system_prompt": normalize_text(system_prompt or ""),
+            "tools": tools or [],
+            "tool_choice": tool_choice if tools else "",
+            "output_options": output_options or {},
+            "messages": [
+                [message.role, normalize_text(message.content)]
+                for message in messages
+            ],
+        }
+        serialized_payload = json.dumps(key_payload, sort_keys = True, ensure_ascii = False, default = str)
+        return hashlib.sha256(serialized_payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Any | None:
+        cached_response = self.memory_entries.get(key)
+        if cached_response is None:
+            cached_response = self.read_disk_entry(key)
+            if cached_response is None:
+                return None
+
+            self.remember_in_memory(key, cached_response)
+
+        if self.is_expired(cached_response):
+            self.discard(key)
+            return None
+
+        self.memory_entries.move_to_end(key)
+        return cached_response.value
+
+    def put(self, key: str, value: Any) -> None:
+        cached_response = CachedResponse(value = value, stored_at = time.time())
+        self.remember_in_memory(key, cached_response)
+        self.write_disk_entry(key, cached_response)
+
+    def discard(self, key: str) -> None:
+        self.memory_entries.pop(key, None)
+        if self.cache_directory is not None:
+            self.entry_path(key).unlink(missing_ok = True)
+
+    def is_expired(self, cached_response: CachedResponse) -> bool:
+        return time.time() - cached_response.stored_at > self.ttl_seconds
+
+    def remember_in_memory(self, key: str, cached_response: CachedResponse) -> None:
+        self.memory_entries[key] = cached_response
+        self.memory_entries.move_to_end(key)
+        while len(self.memory_entries) > self.max_memory_entries:
+            self.memory_entries.popitem(last = False)
+
+    def read_disk_entry(self, key: str) -> CachedResponse | None:
+        if self.cache_directory is None:
+            return None
+
+        entry_path = self.entry_path(key)
+        if not entry_path.exists():
+            return None
+
+        try:
+            raw_entry = json.loads(entry_path.read_text(encoding = "utf-8"))
+            return CachedResponse(value = raw_entry["value"], stored_at = float(raw_entry["stored_at"]))
+        except (OSError, json.JSONDecodeError, KeyError, TypeError, ValueError):
+            entry_path.unlink(missing_ok = True)
+            return None
+
+    def write_disk_entry(self, key: str, cached_response: CachedResponse) -> None:
+        if self.cache_directory is None:
+            return
+
+        try:
+            serialized_entry = json.dumps(
+                {"value": cached_response.value, "stored_at": cached_response.stored_at},
+                ensure_ascii = False,
+            )
+        except (TypeError, ValueError):
+            logger.warning("Skipping disk cache for a response that is not JSON serializable")
+            return
+
+        self.entry_path(key).write_text(serialized_entry, encoding = "utf-8")
+        self.evict_disk_to_budget()
+
+    def evict_disk_to_budget(self) -> None:
+        entry_paths = list(self.cache_directory.glob("*.json"))
+        entry_sizes = {entry_path: entry_path.stat().st_size for entry_path in entry_paths}
+        total_size_bytes = sum(entry_sizes.values())
+        if total_size_bytes <= self.disk_budget_bytes:
+            return
+
+        # Oldest writes go first; reads do not touch files, so this is write-order eviction
+        for entry_path in sorted(entry_paths, key = lambda entry_path: entry_path.stat().st_mtime):
+            if total_size_bytes <= self.disk_budget_bytes:
+                return
+
+            total_size_bytes -= entry_sizes[entry_path]
+            entry_path.unlink(missing_ok = True)
+
+    def entry_path(self, key: str) -> Path:
+        return self.cache_directory / f"{key}.json"
+
+
+def normalize_text(text: str) -> str:
+    return " ".join(str(text).split())
@@ -0,0 +1,59 @@
+import json
+
+
+class ToolCallStreamParser:
+    """Assemble OpenAI-style streamed `tool_calls` deltas into complete tool calls.
+
+    A call is released as soon as its arguments parse as a JSON object, so callers can start it
+    while the model is still generating the calls after it.
+    """
+
+    def __init__(self):
+        self.pending_calls: dict[int, dict] = {}
+        self.released_indexes: set[int] = set()
+
+    def feed(self, tool_call_deltas: list[dict]) -> list[dict]:
+        for tool_call_delta in tool_call_deltas:
+            call_index = int(tool_call_delta.get("index", len(self.pending_calls)))
+            pending_call = self.pending_calls.setdefault(
+                call_index,
+                {"id": "", "type": "function", "function": {"name": "", "arguments": ""}},
+            )
+
+            if tool_call_delta.get("id"):
+                pending_call["id"] = tool_call_delta["id"]
+
+            function_delta = tool_call_delta.get("function") or {}
+            if function_delta.get("name"):
+                pending_call["function"]["name"] += function_delta["name"]
+            if function_delta.get("arguments"):
+                pending_call["function"]["arguments"] += function_delta["arguments"]
+
+        return [
+            self.release(call_index)
+            for call_index in sorted(self.pending_calls)
+            if call_index not in self.released_indexes and self.has_complete_arguments(call_index)
+        ]
+
+    def flush(self) -> list[dict]:
+        # At the end of the stream every named call is as complete as it will get
+        return [
+            self.release(call_index)
+            for call_index in sorted(self.pending_calls)
+            if call_index not in self.released_indexes and self.pending_calls[call_index]["function"]["name"]
+        ]
+
+    def has_complete_arguments(self, call_index: int) -> bool:
+        function = self.pending_calls[call_index]["function"]
+        arguments = function["arguments"].strip()
+        if not function["name"] or not arguments.endswith("}"):
+            return False
+
+        try:
+            return isinstance(json.loads(arguments), dict)
+        except json.JSONDecodeError:
+            return False
+
+    def release(self, call_index: int) -> dict:
+        self.released_indexes.add(call_index)
+        return self.pending_calls[call_index]
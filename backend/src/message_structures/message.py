@@ -1,18 +1,31 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, PrivateAttr
 
 class Message(BaseModel):
     role: str
     content: str
 
+    # Token counts per model name; tokenizers differ between model families
+    _token_counts: dict[str, int] = PrivateAttr(default_factory=dict)
+
     def update(self, query: str):
         return self.model_copy(
             update={
                 "content": query
             }
-        )
+        ).without_token_counts()
 
     def add_context(self, context: str):
         return self.model_copy(update={
             "content": self.content + "\n\n" + context
-        })
+        }).without_token_counts()
+
+    def cached_token_count(self, model_name: str) -> int | None:
+        return self._token_counts.get(model_name)
+
+    def remember_token_count(self, model_name: str, token_count: int):
+        self._token_counts[model_name] = token_count
+
+    def without_token_counts(self):
+        self._token_counts = {}
+        return self
     
\ No newline at end of file
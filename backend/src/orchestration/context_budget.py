@@ -0,0 +1,133 @@
+"""Fit prompts into each model's context window by counting tokens and trimming the oldest history."""
+
+import logging
+
+from src.config.Model import Model
+from src.infer.ModelManager import ModelManager
+from src.message_structures.conversation import Conversation
+from src.message_structures.message import Message
+
+logger = logging.getLogger("uvicorn.error")
+
+DEFAULT_CONTEXT_WINDOW = 8192
+DEFAULT_OUTPUT_RESERVE_TOKENS = 1024
+MIN_PROMPT_TOKENS = 512
+CHARS_PER_TOKEN_ESTIMATE = 4
+MAX_HISTORY_MESSAGES = 6
+TRIM_SAFETY_RATIO = 0.9
+
+
+def context_token_budget(
+    model: Model,
+    output_reserve_tokens: int = DEFAULT_OUTPUT_RESERVE_TOKENS,
+) -> int:
+    context_window = model.context_window() or DEFAULT_CONTEXT_WINDOW
+    return max(MIN_PROMPT_TOKENS, context_window - output_reserve_tokens)
+
+
+async def count_text_tokens(text: str, model: Model, model_manager: ModelManager) -> int:
+    if not text:
+        return 0
+
+    token_count = await model_manager.count_tokens(model, text)
+    if token_count is None:
+        return len(text) // CHARS_PER_TOKEN_ESTIMATE + 1
+
+    return token_count
+
+
+async def count_message_tokens(message: Message, model: Model, model_manager: ModelManager) -> int:
+    token_count = message.cached_token_count(model.name)
+    if token_count is not None:
+        return token_count
+
+    # Counted as it is rendered into prompts, so the role prefix is included
+    token_count = await count_text_tokens(f"{message.role}: {message.content}", model, model_manager)
+    message.remember_token_count(model.name, token_count)
+    return token_count
+
+
+async def fit_text_to_tokens(
+    text: str,
+    max_tokens: int,
+    model: Model,
+    model_manager: ModelManager,
+) -> str:
+    token_count = await count_text_tokens(text, model, model_manager)
+    if token_count <= max_tokens:
+        return text
+
+    # Keep the start and the end, which usually carry the question and the latest detail
+    kept_chars = max(0, int(len(text) * max_tokens / token_count * TRIM_SAFETY_RATIO))
+    head_chars = kept_chars * 2 // 3
+    tail_chars = kept_chars - head_chars
+    omitted_chars = len(text) - kept_chars
+    logger.info("Trimming %s characters to fit %s tokens for %s", omitted_chars, max_tokens, model.name)
+
+    tail_text = text[len(text) - tail_chars:] if tail_chars else ""
+    return f"{text[:head_chars]}\n[... {omitted_chars} characters omitted to fit the context window ...]\n{tail_text}"
+
+
+async def format_budgeted_history(
+    conversation_history: Conversation,
+    model: Model,
+    model_manager: ModelManager,
+    max_tokens: int,
+    max_messages: int = MAX_HISTORY_MESSAGES,
+) -> str:
+    visible_messages = [
+        message
+        for message in conversation_history.return_message_history()
+        if message.role in {"user", "assistant"}
+    ]
+    recent_messages = visible_messages[-max_messages:]
+
+    # Walk back from the newest message and stop once the oldest no longer fits
+    kept_lines: list[str] = []
+    remaining_tokens = max_tokens
+    for message in reversed(recent_messages):
+        message_tokens = await count_message_tokens(message, model, model_manager)
+        if message_tokens <= remaining_tokens:
+            kept_lines.append(f"{message.role}: {message.content}")
+            remaining_tokens -= message_tokens
+            continue
+
+        # The newest message is worth keeping in part rather than dropping entirely
+        if not kept_lines and remaining_tokens > 0:
+            trimmed_content = await fit_text_to_tokens(message.content, remaining_tokens, model, model_manager)
+            kept_lines.append(f"{message.role}: {trimmed_content}")
+
+        break
+
+    dropped_count = len(recent_messages) - len(kept_lines)
+    if dropped_count:
+        logger.info("Dropped %s older history messages to fit %s tokens for %s", dropped_count, max_tokens, model.name)
+
+    if not kept_lines:
+        return "(no prior conversation)"
+
+    return "\n".join(reversed(kept_lines))
+
+
+async def fit_query_and_history(
+    query: str,
+    conversation_history: Conversation,
+    prompt_without_query_or_history: str,
+    model: Model,
+    model_manager: ModelManager,
+    output_reserve_tokens: int = DEFAULT_OUTPUT_RESERVE_TOKENS,
+) -> tuple[str, str]:
+    """Return the query and history text to render, with the query taking priority over history."""
+    available_tokens = context_token_budget(model, output_reserve_tokens)
+    available_tokens -= await count_text_tokens(prompt_without_query_or_history, model, model_manager)
+
+    fitted_query = await fit_text_to_tokens(query, max(0, available_tokens), model, model_manager)
+    available_tokens -= await count_text_tokens(fitted_query, model, model_manager)
+
+    history_text = await format_budgeted_history(
+        conversation_history=conversation_history,
+        model=model,
+        model_manager=model_manager,
+        max_tokens=max(0, available_tokens),
+    )
+    return fitted_query, history_text
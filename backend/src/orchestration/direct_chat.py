@@ -7,6 +7,8 @@ from src.config.Model import Model
 from src.infer.ModelManager import ModelManager
 from src.message_structures.conversation import Conversation
 from src.message_structures.message import Message
+from src.orchestration.context_budget import fit_query_and_history
+from src.orchestration.response_streaming import stream_model_response
 
 
 async def handle_direct_chat(
@@ -18,28 +20,35 @@ async def handle_direct_chat(
     model: Model,
     model_manager: ModelManager,
 ):
-    prompt = build_direct_chat_prompt(
+    prompt = await build_direct_chat_prompt(
         query=query,
         conversation_history=conversation_history,
+        model=model,
+        model_manager=model_manager,
+    )
+    final_response = await stream_model_response(
+        model=model,
+        messages=[Message(role="user", content=prompt)],
+        model_manager=model_manager,
+        websocket=websocket,
+        run_id=run_id,
+        session_id=session_id,
+        prompt_family="worker",
     )
-    final_response = model_manager.ask_model(
-        model,
-        [Message(role="user", content=prompt)],
-    ).strip()
 
     if not final_response:
         final_response = "Hello. Nice to be useful."
+        await send_response_delta(
+            websocket=websocket,
+            run_id=run_id,
+            session_id=session_id,
+            text=final_response,
+        )
 
     conversation_history.append_message(
         Message(role="assistant", content=final_response),
     )
 
-    await send_response_delta(
-        websocket=websocket,
-        run_id=run_id,
-        session_id=session_id,
-        text=final_response,
-    )
     await send_run_completed(
         websocket=websocket,
         run_id=run_id,
@@ -47,12 +56,30 @@ async def handle_direct_chat(
     )
 
 
-def build_direct_chat_prompt(
+async def build_direct_chat_prompt(
     query: str,
     conversation_history: Conversation,
+    model: Model,
+    model_manager: ModelManager,
 ) -> str:
-    recent_history_text = format_recent_history(conversation_history)
+    fitted_query, recent_history_text = await fit_query_and_history(
+        query=query,
+        conversation_history=conversation_history,
+        prompt_without_query_or_history=render_direct_chat_prompt(query="", recent_history_text=""),
+        model=model,
+        model_manager=model_manager,
+    )
 
+    return render_direct_chat_prompt(
+        query=fitted_query,
+        recent_history_text=recent_history_text,
+    )
+
+
+def render_direct_chat_prompt(
+    query: str,
+    recent_history_text: str,
+) -> str:
     return f"""
     You are TARS, a concise conversational assistant.
 
@@ -75,24 +102,3 @@ def build_direct_chat_prompt(
     {query}
     ---
     """
-
-
-def format_recent_history(
-    conversation_history: Conversation,
-    max_messages: int = 6,
-) -> str:
-    visible_messages = [
-        message
-        for message in conversation_history.return_message_history()
-        if message.role in {"user", "assistant"}
-    ]
-    recent_messages = visible_messages[-max_messages:]
-
-    if not recent_messages:
-        return "(no prior conversation)"
-
-    formatted_messages = []
-    for message in recent_messages:
-        formatted_messages.append(f"{message.role}: {message.content}")
-
-    return "\n".join(formatted_messages)
@@ -1,6 +1,5 @@
 """Handle lightweight fact checks with optional web verification."""
 
-import asyncio
 import logging
 from datetime import datetime, timezone
 
@@ -11,6 +10,7 @@ from src.config.Model import Model
 from src.infer.ModelManager import ModelManager
 from src.message_structures.conversation import Conversation
 from src.message_structures.message import Message
+from src.orchestration.response_streaming import stream_model_response
 
 logger = logging.getLogger("uvicorn.error")
 
@@ -62,24 +62,29 @@ async def handle_fact_check(
         search_results=search_results,
     )
 
-    final_response = model_manager.ask_model(
-        model,
-        [Message(role="user", content=prompt)],
-    ).strip()
+    final_response = await stream_model_response(
+        model=model,
+        messages=[Message(role="user", content=prompt)],
+        model_manager=model_manager,
+        websocket=websocket,
+        run_id=run_id,
+        session_id=session_id,
+        prompt_family="review",
+    )
 
     if not final_response:
         final_response = build_fact_check_fallback(search_results)
+        await send_response_delta(
+            websocket=websocket,
+            run_id=run_id,
+            session_id=session_id,
+            text=final_response,
+        )
 
     conversation_history.append_message(
         Message(role="assistant", content=final_response),
     )
 
-    await send_response_delta(
-        websocket=websocket,
-        run_id=run_id,
-        session_id=session_id,
-        text=final_response,
-    )
     await send_run_completed(
         websocket=websocket,
         run_id=run_id,
@@ -90,16 +95,20 @@ async def handle_fact_check(
 async def run_search(query: str) -> list[dict]:
     try:
         from search.web_search import run_web_search
+        from src.services.web_content_service import add_page_excerpts
     except Exception:
         logger.exception("Could not import run_web_search")
         return []
 
     try:
-        return await asyncio.to_thread(run_web_search, query, 5)
+        search_results = await run_web_search(query, 5)
     except Exception:
         logger.exception("Search failed for query: %s", query)
         return []
 
+    # The top pages are fetched together, so the evidence costs one fetch deadline rather than one per page
+    return await add_page_excerpts(search_results, query=query)
+
 
 def build_fact_check_prompt(
     query: str,
@@ -142,9 +151,12 @@ def format_search_results(search_results: list[dict]) -> str:
         snippet = result.get("snippet", "").strip()
         url = result.get("url", "").strip()
 
-        formatted_results.append(
-            f"[{index}] {title}\nSnippet: {snippet}\nURL: {url}",
-        )
+        formatted_result = f"[{index}] {title}\nSnippet: {snippet}\nURL: {url}"
+        excerpt = result.get("excerpt", "").strip()
+        if excerpt:
+            formatted_result += f"\nPage excerpt: {excerpt}"
+
+        formatted_results.append(formatted_result)
 
     return "\n\n".join(formatted_results)
 
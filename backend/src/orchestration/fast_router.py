@@ -0,0 +1,287 @@
+"""Route confidently classifiable requests without an LLM call.
+
+Lexical rules handle the obvious cases. A naive Bayes classifier trained on past runs in
+`run_summaries.jsonl` handles the rest when it is confident. Its labels come from what the tool
+agent actually did, not from routing guesses. Anything else is left to the LLM router.
+"""
+
+import asyncio
+import json
+import logging
+import math
+import re
+import time
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+
+from src.telemetry.run_telemetry import MONITORING_FILE
+
+logger = logging.getLogger("uvicorn.error")
+
+ROUTE_MODES = ("direct_chat", "task_orchestrator")
+
+CONVERSATIONAL_MESSAGES = {
+    "hi", "hello", "hey", "hiya", "yo", "sup",
+    "good morning", "good afternoon", "good evening", "good night",
+    "thanks", "thank you", "thanks a lot", "thank you so much", "cheers", "ta",
+    "ok", "okay", "cool", "nice", "great", "awesome", "perfect", "got it", "sounds good",
+    "bye", "goodbye", "see you", "see ya",
+    "how are you", "how are you doing", "whats up", "what's up",
+    "yes", "no", "yep", "nope", "sure",
+}
+
+TASK_KEYWORDS = {
+    "read", "open", "file", "files", "folder", "directory", "save", "write", "create", "edit",
+    "search", "research", "find", "browse", "fetch", "download", "website",
+    "code", "script", "function", "class", "bug", "debug", "fix", "refactor", "implement", "test",
+    "run", "execute", "install", "build", "deploy",
+    "analyse", "analyze", "analysis", "summarise", "summarize", "summary", "compare",
+    "plan", "schedule", "draft", "translate", "calculate", "convert",
+}
+
+TASK_PATTERNS = [
+    re.compile(r"https?://"),
+    re.compile(r"```"),
+    re.compile(r"[\w-]+\.(py|js|ts|tsx|json|md|txt|csv|pdf|html|yaml|yml|toml|ini|rs)\b"),
+    re.compile(r"[a-zA-Z]:\\|(^|\s)[~.]?/[\w.-]+/"),
+]
+
+# Follow-ups such as "thanks, that fixed it" open like this and mention task words in passing
+CONVERSATIONAL_OPENERS = {
+    "hi", "hello", "hey", "thanks", "thank", "cheers", "ok", "okay", "cool", "nice", "great", "awesome",
+    "perfect", "yes", "no", "yep", "nope", "sure", "lol", "haha", "wow", "oh", "ah",
+}
+
+MAX_CONVERSATIONAL_WORDS = 6
+MIN_TASK_WORDS = 40
+MIN_TASK_KEYWORD_HITS = 2
+MIN_IMPERATIVE_TASK_WORDS = 3
+KEYWORD_RULE_CONFIDENCE = 0.9
+TASK_KEYWORD_FEATURE = "<task_keyword>"
+CLASSIFIER_CONFIDENCE_THRESHOLD = 0.9
+MIN_TRAINING_EXAMPLES_PER_MODE = 20
+MAX_TRAINING_EXAMPLES = 5000
+RETRAIN_INTERVAL_SECONDS = 600
+WORD_PATTERN = re.compile(r"[a-z0-9']+")
+
+
+@dataclass(frozen=True)
+class FastRouteDecision:
+    mode: str
+    reason: str
+    source: str
+    confidence: float
+
+
+def tokenize_query(query: str) -> list[str]:
+    return WORD_PATTERN.findall(query.lower())
+
+
+def classify_with_rules(query: str) -> FastRouteDecision | None:
+    words = tokenize_query(query)
+    if not words:
+        return None
+
+    normalized_query = " ".join(words)
+    if len(words) <= MAX_CONVERSATIONAL_WORDS and normalized_query in CONVERSATIONAL_MESSAGES:
+        return FastRouteDecision(
+            mode="direct_chat",
+            reason="Fast path: short conversational message.",
+            source="rules",
+            confidence=1.0,
+        )
+
+    if any(pattern.search(query) for pattern in TASK_PATTERNS):
+        return FastRouteDecision(
+            mode="task_orchestrator",
+            reason="Fast path: request references files, paths, links, or code.",
+            source="rules",
+            confidence=1.0,
+        )
+
+    if len(words) >= MIN_TASK_WORDS:
+        return FastRouteDecision(
+            mode="task_orchestrator",
+            reason="Fast path: long request.",
+            source="rules",
+            confidence=1.0,
+        )
+
+    # One generic task word is weak evidence, so it takes two, or one leading an imperative request
+    if words[0] in CONVERSATIONAL_OPENERS:
+        return None
+
+    matched_task_keywords = sorted(TASK_KEYWORDS.intersection(words))
+    if len(matched_task_keywords) >= MIN_TASK_KEYWORD_HITS:
+        return FastRouteDecision(
+            mode="task_orchestrator",
+            reason=f"Fast path: task keywords {', '.join(repr(keyword) for keyword in matched_task_keywords)}.",
+            source="rules",
+            confidence=KEYWORD_RULE_CONFIDENCE,
+        )
+
+    if words[0] in TASK_KEYWORDS and len(words) >= MIN_IMPERATIVE_TASK_WORDS:
+        return FastRouteDecision(
+            mode="task_orchestrator",
+            reason=f"Fast path: request starts with the task keyword '{words[0]}'.",
+            source="rules",
+            confidence=KEYWORD_RULE_CONFIDENCE,
+        )
+
+    return None
+
+
+class RouteClassifier:
+    """Multinomial naive Bayes over word unigrams and bigrams."""
+
+    def __init__(self):
+        self.mode_example_counts: Counter[str] = Counter()
+        self.mode_feature_counts: dict[str, Counter[str]] = {mode: Counter() for mode in ROUTE_MODES}
+        self.vocabulary: set[str] = set()
+
+    @property
+    def is_ready(self) -> bool:
+        return all(
+            self.mode_example_counts[mode] >= MIN_TRAINING_EXAMPLES_PER_MODE
+            for mode in ROUTE_MODES
+        )
+
+    def train(self, examples: list[tuple[str, str]]) -> None:
+        for query, mode in examples:
+            if mode not in ROUTE_MODES:
+                continue
+
+            features = self.extract_features(query)
+            self.mode_example_counts[mode] += 1
+            self.mode_feature_counts[mode].update(features)
+            self.vocabulary.update(features)
+
+    def predict(self, query: str) -> tuple[str, float]:
+        features = self.extract_features(query)
+        total_examples = sum(self.mode_example_counts.values())
+        vocabulary_size = len(self.vocabulary) + 1
+
+        log_scores = {}
+        for mode in ROUTE_MODES:
+            feature_counts = self.mode_feature_counts[mode]
+            total_feature_count = sum(feature_counts.values())
+            log_score = math.log(self.mode_example_counts[mode] / total_examples)
+            for feature in features:
+                # Laplace smoothing keeps unseen words from zeroing a mode out
+                log_score += math.log((feature_counts[feature] + 1) / (total_feature_count + vocabulary_size))
+            log_scores[mode] = log_score
+
+        best_mode = max(log_scores, key=log_scores.get)
+        best_log_score = log_scores[best_mode]
+        normalizer = sum(math.exp(log_score - best_log_score) for log_score in log_scores.values())
+        return best_mode, 1 / normalizer
+
+    def extract_features(self, query: str) -> list[str]:
+        words = tokenize_query(query)
+        bigrams = [f"{first_word} {second_word}" for first_word, second_word in zip(words, words[1:])]
+        # Keyword hits the rules found too weak to act on still count as evidence here
+        task_keyword_features = [TASK_KEYWORD_FEATURE for word in words if word in TASK_KEYWORDS]
+        return words + bigrams + task_keyword_features
+
+
+class FastRouter:
+    def __init__(self, summary_path: Path = MONITORING_FILE):
+        self.summary_path = summary_path
+        self.classifier: RouteClassifier | None = None
+        self.trained_at = 0.0
+        self.trained_on_mtime = 0.0
+
+    async def route(self, query: str) -> FastRouteDecision | None:
+        rule_decision = classify_with_rules(query)
+        if rule_decision is not None:
+            return rule_decision
+
+        classifier = await self.current_classifier()
+        if classifier is None or not classifier.is_ready:
+            return None
+
+        mode, confidence = classifier.predict(query)
+        if confidence < CLASSIFIER_CONFIDENCE_THRESHOLD:
+            return None
+
+        return FastRouteDecision(
+            mode=mode,
+            reason=f"Fast path: classifier trained on past runs ({confidence:.2f} confidence).",
+            source="classifier",
+            confidence=confidence,
+        )
+
+    async def current_classifier(self) -> RouteClassifier | None:
+        if time.monotonic() - self.trained_at < RETRAIN_INTERVAL_SECONDS and self.classifier is not None:
+            return self.classifier
+
+        # Set before the read so concurrent routes do not all start a retrain
+        self.trained_at = time.monotonic()
+        return await asyncio.to_thread(self.retrain_if_changed)
+
+    def retrain_if_changed(self) -> RouteClassifier | None:
+        if not self.summary_path.exists():
+            return self.classifier
+
+        summary_mtime = self.summary_path.stat().st_mtime
+        if summary_mtime == self.trained_on_mtime:
+            return self.classifier
+
+        classifier = RouteClassifier()
+        classifier.train(load_routing_examples(self.summary_path))
+        self.classifier = classifier
+        self.trained_on_mtime = summary_mtime
+        logger.info(
+            "Trained fast route classifier on %s direct_chat and %s task_orchestrator examples",
+            classifier.mode_example_counts["direct_chat"],
+            classifier.mode_example_counts["task_orchestrator"],
+        )
+        return classifier
+
+
+def load_routing_examples(summary_path: Path) -> list[tuple[str, str]]:
+    examples = []
+    try:
+        with summary_path.open(encoding="utf-8") as file:
+            summary_lines = file.readlines()[-MAX_TRAINING_EXAMPLES:]
+    except OSError:
+        logger.warning("Could not read run summaries for fast route training")
+        return []
+
+    for summary_line in summary_lines:
+        try:
+            summary = json.loads(summary_line)
+        except json.JSONDecodeError:
+            continue
+
+        user_message = str(summary.get("user_message") or "").strip()
+        mode = confirmed_mode_from_summary(summary)
+        if not user_message or not mode:
+            continue
+
+        examples.append((user_message, mode))
+
+    return examples
+
+
+def confirmed_mode_from_summary(summary: dict) -> str:
+    """Label a finished run by what the tool agent did with the request, not by how it was routed.
+
+    Runs routed straight to direct chat never reach the agent, so they confirm nothing and neither
+    the LLM router's guesses nor the classifier's own decisions become training labels.
+    """
+    if summary.get("status") != "completed":
+        return ""
+
+    for result in summary.get("results", []):
+        tool_result = result.get("payload") or {}
+        if result.get("result_type") == "tool_result" and tool_result.get("status") == "completed":
+            return "task_orchestrator"
+
+    # The agent had its tools on offer and answered without any, so the request was conversational
+    agent_rounds = summary.get("agent_rounds") or []
+    if agent_rounds and not any(agent_round.get("tool_call_count") for agent_round in agent_rounds):
+        return "direct_chat"
+
+    return ""
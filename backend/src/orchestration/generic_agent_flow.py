@@ -1,19 +1,35 @@
+import asyncio
 import json
 import logging
+import time
+from contextlib import aclosing
 from typing import Any
 
 from fastapi import WebSocket
 
-from src.agents.agent_utils import TOOL_MAP, TOOLS
-from src.app.ws_events import send_phase_changed, send_progress_update, send_response_delta, send_result_event, send_run_completed
+from src.agents.agent_utils import TOOL_HANDLERS, TOOLS, run_tool_with_cache, tool_resource_key
+from src.app.ws_events import (
+    build_progress_callback,
+    send_phase_changed,
+    send_progress_update,
+    send_response_delta,
+    send_result_event,
+    send_run_completed,
+)
 from src.config.Model import Model
 from src.infer.ModelManager import ModelManager
 from src.message_structures.conversation import Conversation
 from src.message_structures.message import Message
+from src.orchestration.context_budget import context_token_budget, count_text_tokens, fit_query_and_history
+from src.telemetry.run_telemetry import AgentRoundTelemetryRecord, get_current_run_recorder, now_utc
 
 logger = logging.getLogger("uvicorn.error")
 
 MAX_TOOL_RESULT_CHARS = 5000
+MAX_TOOL_CALLS_PER_ROUND = 4
+MAX_TOOL_ROUNDS = 3
+# Observations past this share of the prompt budget are map-reduce summarized before the final answer
+TOOL_OBSERVATION_BUDGET_SHARE = 0.5
 
 
 async def handle_generic_query(
@@ -24,6 +40,7 @@ async def handle_generic_query(
     conversation_history: Conversation,
     model: Model,
     model_manager: ModelManager,
+    max_tool_rounds: int = MAX_TOOL_ROUNDS,
 ):
     logger.info("Routing query through generic tool agent")
     await send_phase_changed(
@@ -34,29 +51,65 @@ async def handle_generic_query(
         detail="Letting the generic agent decide whether tools are useful.",
     )
 
-    response = model_manager.ask_model(
-        model,
-        [Message(role="user", content=build_tool_decision_prompt(query, conversation_history))],
-        tools=TOOLS,
-        tool_choice="auto",
-    )
-
-    if isinstance(response, str) and response.strip():
-        await finish_generic_response(
-            final_response=response.strip(),
-            conversation_history=conversation_history,
+    answer_stream = AnswerDeltaStream(websocket=websocket, run_id=run_id, session_id=session_id)
+    tool_results: list[dict[str, Any]] = []
+    tool_results_text = format_tool_results(tool_results)
+    for round_index in range(1, max_tool_rounds + 1):
+        if round_index > 1:
+            await send_phase_changed(
+                websocket=websocket,
+                run_id=run_id,
+                session_id=session_id,
+                phase="thinking",
+                detail=f"Tool round {round_index}: deciding whether more tools are useful.",
+            )
+
+        tool_decision_prompt = await build_tool_decision_prompt(
+            query,
+            conversation_history,
+            tool_results_text,
+            model,
+            model_manager,
+        )
+        unsent_text, round_tool_results = await run_tool_round(
+            round_index=round_index,
+            prompt=tool_decision_prompt,
+            model=model,
+            model_manager=model_manager,
+            answer_stream=answer_stream,
             websocket=websocket,
             run_id=run_id,
             session_id=session_id,
         )
-        return
 
-    tool_results = await execute_tool_calls(
-        tool_calls=response if isinstance(response, list) else [],
-        websocket=websocket,
-        run_id=run_id,
-        session_id=session_id,
-    )
+        if not round_tool_results:
+            # Text after a tool call that never ran was held back, so it is still owed to the user
+            await answer_stream.send_text(unsent_text)
+            if answer_stream.section_text:
+                await complete_generic_response(
+                    final_response=answer_stream.shown_text,
+                    conversation_history=conversation_history,
+                    websocket=websocket,
+                    run_id=run_id,
+                    session_id=session_id,
+                )
+                return
+
+            break
+
+        # Earlier observations are already within budget, so only this round's results can push them over it
+        round_results_text = format_tool_results(round_tool_results, first_index=len(tool_results) + 1)
+        observations_text = f"{tool_results_text}\n\n{round_results_text}" if tool_results else round_results_text
+        tool_results.extend(round_tool_results)
+        tool_results_text = await fit_tool_observations(
+            query=query,
+            tool_results_text=observations_text,
+            model=model,
+            model_manager=model_manager,
+            websocket=websocket,
+            run_id=run_id,
+            session_id=session_id,
+        )
 
     await send_phase_changed(
         websocket=websocket,
@@ -66,16 +119,28 @@ async def handle_generic_query(
         detail="Summarising tool results into the final reply.",
     )
 
-    final_response = model_manager.ask_model(
+    final_response_prompt = await build_final_response_prompt(
+        query,
+        conversation_history,
+        tool_results_text,
+        model,
+        model_manager,
+    )
+    answer_stream.start_section()
+    final_response_stream = model_manager.ask_model_stream(
         model,
-        [Message(role="user", content=build_final_response_prompt(query, conversation_history, tool_results))],
-    ).strip()
+        [Message(role="user", content=final_response_prompt)],
+        prompt_family="worker",
+    )
+    async with aclosing(final_response_stream) as stream:
+        async for stream_event in stream:
+            await answer_stream.forward(stream_event)
 
-    if not final_response:
-        final_response = build_empty_tool_fallback(tool_results)
+    if not answer_stream.section_text:
+        await answer_stream.send_text(build_empty_tool_fallback(tool_results))
 
-    await finish_generic_response(
-        final_response=final_response,
+    await complete_generic_response(
+        final_response=answer_stream.shown_text,
         conversation_history=conversation_history,
         websocket=websocket,
         run_id=run_id,
@@ -83,62 +148,249 @@ async def handle_generic_query(
     )
 
 
-async def execute_tool_calls(
-    tool_calls: list[dict[str, Any]],
+class AnswerDeltaStream:
+    """Send the generic agent's answer as response deltas while it streams, across tool rounds.
+
+    Each round and the final answer open a new section. Text shown by an earlier section, such
+    as a preamble before a tool call, is kept apart from the next one by a blank line.
+    """
+
+    def __init__(self, websocket: WebSocket, run_id: str, session_id: int):
+        self.websocket = websocket
+        self.run_id = run_id
+        self.session_id = session_id
+        self.shown_parts: list[str] = []
+        self.section_parts: list[str] = []
+
+    @property
+    def shown_text(self) -> str:
+        return "".join(self.shown_parts).strip()
+
+    @property
+    def section_text(self) -> str:
+        return "".join(self.section_parts).strip()
+
+    def start_section(self) -> None:
+        self.section_parts = []
+
+    async def forward(self, stream_event: dict[str, Any]) -> None:
+        if stream_event.get("type") == "reasoning":
+            await send_response_delta(
+                websocket=self.websocket,
+                run_id=self.run_id,
+                session_id=self.session_id,
+                text="",
+                reasoning_text=stream_event.get("reasoning_content", ""),
+            )
+            return
+
+        if stream_event.get("type") == "chunk":
+            await self.send_text(stream_event.get("content", ""))
+
+    async def send_text(self, text: str) -> None:
+        if not text:
+            return
+
+        # Hold back leading whitespace so each section starts on real text
+        if not self.section_parts:
+            text = text.lstrip()
+            if not text:
+                return
+
+            self.section_parts.append(text)
+            if self.shown_parts:
+                text = f"\n\n{text}"
+        else:
+            self.section_parts.append(text)
+
+        self.shown_parts.append(text)
+        await send_response_delta(
+            websocket=self.websocket,
+            run_id=self.run_id,
+            session_id=self.session_id,
+            text=text,
+        )
+
+
+async def run_tool_round(
+    round_index: int,
+    prompt: str,
+    model: Model,
+    model_manager: ModelManager,
+    answer_stream: AnswerDeltaStream,
     websocket: WebSocket,
     run_id: str,
     session_id: int,
-) -> list[dict[str, str]]:
-    tool_results = []
+) -> tuple[str, list[dict[str, Any]]]:
+    """Stream one tool-enabled model turn, starting each tool call as soon as its arguments are complete.
+
+    Until the model starts a tool call its text is streamed as the answer. After that it is held
+    back and returned, along with the tool results in the order the model asked for them.
+    """
+    round_record = AgentRoundTelemetryRecord(round_index=round_index, started_at=now_utc())
+    tool_runner = ToolCallRunner(websocket=websocket, run_id=run_id, session_id=session_id)
+    unsent_parts: list[str] = []
+    tool_call_started = False
+    answer_stream.start_section()
+
+    try:
+        response_stream = model_manager.ask_model_stream(
+            model,
+            [Message(role="user", content=prompt)],
+            prompt_family="worker",
+            tools=TOOLS,
+            tool_choice="auto",
+        )
+        async with aclosing(response_stream) as stream:
+            async for stream_event in stream:
+                if stream_event.get("type") in {"tool_call_started", "tool_call"}:
+                    tool_call_started = True
+
+                if stream_event.get("type") == "tool_call":
+                    tool_started = await tool_runner.start(stream_event["tool_call"])
+                    if tool_started and round_record.first_tool_started_at is None:
+                        round_record.first_tool_started_at = now_utc()
+                    continue
+
+                if not tool_call_started:
+                    await answer_stream.forward(stream_event)
+                    continue
+
+                if stream_event.get("type") == "chunk":
+                    unsent_parts.append(stream_event.get("content", ""))
+
+        round_record.generation_ended_at = now_utc()
+        round_tool_results = await tool_runner.results()
+    finally:
+        tool_runner.cancel()
+        round_record.ended_at = now_utc()
+        round_record.tool_call_count = len(tool_runner.tool_tasks)
+        recorder = get_current_run_recorder()
+        if recorder is not None:
+            recorder.note_agent_round(round_record)
+
+    return "".join(unsent_parts), round_tool_results
+
+
+class ToolCallRunner:
+    """Start tool calls as they arrive and send each `tool_result` as soon as it finishes."""
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        run_id: str,
+        session_id: int,
+        max_tool_calls: int = MAX_TOOL_CALLS_PER_ROUND,
+    ):
+        self.websocket = websocket
+        self.run_id = run_id
+        self.session_id = session_id
+        self.max_tool_calls = max_tool_calls
+        self.received_tool_call_count = 0
+        self.tool_tasks: list[asyncio.Task] = []
+        self.previous_tasks_by_resource: dict[str, asyncio.Task] = {}
+        # Tool tasks report concurrently, so keep websocket sends from interleaving
+        self.send_lock = asyncio.Lock()
+
+    async def start(self, tool_call: dict[str, Any]) -> bool:
+        self.received_tool_call_count += 1
+        if self.received_tool_call_count > self.max_tool_calls:
+            return False
 
-    for tool_call in tool_calls[:4]:
         if tool_call.get("type") != "function":
-            continue
+            return False
 
         function = tool_call.get("function", {})
         tool_name = str(function.get("name", "")).strip()
-        handler = TOOL_MAP.get(tool_name)
-        if handler is None:
-            continue
+        if tool_name not in TOOL_HANDLERS:
+            return False
 
         arguments = parse_tool_arguments(function.get("arguments", {}))
-        await send_progress_update(
-            websocket=websocket,
-            run_id=run_id,
-            session_id=session_id,
-            status=f"Using tool: {tool_name}",
-            details={
-                "tool_name": tool_name,
-                "arguments": arguments,
-            },
+        async with self.send_lock:
+            await send_progress_update(
+                websocket=self.websocket,
+                run_id=self.run_id,
+                session_id=self.session_id,
+                status=f"Using tool: {tool_name}",
+                details={
+                    "tool_name": tool_name,
+                    "arguments": arguments,
+                },
+            )
+
+        # Calls on the same file keep their order; everything else runs concurrently
+        resource_key = tool_resource_key(tool_name, arguments)
+        tool_task = asyncio.create_task(
+            self.run_and_report(
+                tool_name=tool_name,
+                arguments=arguments,
+                previous_task=self.previous_tasks_by_resource.get(resource_key) if resource_key else None,
+            ),
         )
-
-        try:
-            result = handler(**arguments)
-            status = "completed"
-        except Exception as error:
-            logger.exception("Generic tool call failed: %s(%s)", tool_name, arguments)
-            result = f"Error: {error}"
-            status = "failed"
-
-        compact_result = compact_text(str(result), MAX_TOOL_RESULT_CHARS)
-        tool_result = {
-            "tool_name": tool_name,
-            "status": status,
-            "arguments": json.dumps(arguments, ensure_ascii=False),
-            "result": compact_result,
-        }
-        tool_results.append(tool_result)
-
-        await send_result_event(
-            websocket=websocket,
-            run_id=run_id,
-            session_id=session_id,
-            result_type="tool_result",
-            payload=tool_result,
-        )
-
-    return tool_results
+        if resource_key:
+            self.previous_tasks_by_resource[resource_key] = tool_task
+        self.tool_tasks.append(tool_task)
+        return True
+
+    async def run_and_report(
+        self,
+        tool_name: str,
+        arguments: dict[str, Any],
+        previous_task: asyncio.Task | None,
+    ) -> dict[str, Any]:
+        tool_result = await run_tool_call(tool_name, arguments, previous_task)
+        async with self.send_lock:
+            await send_result_event(
+                websocket=self.websocket,
+                run_id=self.run_id,
+                session_id=self.session_id,
+                result_type="tool_result",
+                payload=tool_result,
+            )
+
+        return tool_result
+
+    async def results(self) -> list[dict[str, Any]]:
+        # Observations stay in the order the model asked for them
+        return list(await asyncio.gather(*self.tool_tasks))
+
+    def cancel(self) -> None:
+        for tool_task in self.tool_tasks:
+            tool_task.cancel()
+
+
+async def run_tool_call(
+    tool_name: str,
+    arguments: dict[str, Any],
+    previous_task: asyncio.Task | None = None,
+) -> dict[str, Any]:
+    if previous_task is not None:
+        await asyncio.wait([previous_task])
+
+    started_at = time.perf_counter()
+    cache_hit = False
+    try:
+        tool_run_result = await run_tool_with_cache(tool_name, arguments)
+        result = tool_run_result.value
+        cache_hit = tool_run_result.cache_hit
+        status = "completed"
+    except TimeoutError:
+        logger.warning("Generic tool call timed out: %s(%s)", tool_name, arguments)
+        result = f"Error: {tool_name} timed out after {TOOL_HANDLERS[tool_name].timeout_seconds:g} seconds"
+        status = "timed_out"
+    except Exception as error:
+        logger.exception("Generic tool call failed: %s(%s)", tool_name, arguments)
+        result = f"Error: {error}"
+        status = "failed"
+
+    return {
+        "tool_name": tool_name,
+        "status": status,
+        "arguments": json.dumps(arguments, ensure_ascii=False),
+        "result": compact_text(str(result), MAX_TOOL_RESULT_CHARS),
+        "elapsed_ms": round((time.perf_counter() - started_at) * 1000),
+        "cache_hit": cache_hit,
+    }
 
 
 def parse_tool_arguments(arguments: Any) -> dict[str, Any]:
@@ -156,7 +408,7 @@ def parse_tool_arguments(arguments: Any) -> dict[str, Any]:
     return parsed_arguments if isinstance(parsed_arguments, dict) else {}
 
 
-async def finish_generic_response(
+async def complete_generic_response(
     final_response: str,
     conversation_history: Conversation,
     websocket: WebSocket,
@@ -167,12 +419,6 @@ async def finish_generic_response(
         Message(role="assistant", content=final_response),
     )
 
-    await send_response_delta(
-        websocket=websocket,
-        run_id=run_id,
-        session_id=session_id,
-        text=final_response,
-    )
     await send_run_completed(
         websocket=websocket,
         run_id=run_id,
@@ -180,15 +426,43 @@ async def finish_generic_response(
     )
 
 
-def build_tool_decision_prompt(
+async def build_tool_decision_prompt(
     query: str,
     conversation_history: Conversation,
+    tool_results_text: str,
+    model: Model,
+    model_manager: ModelManager,
+) -> str:
+    fitted_query, recent_history_text = await fit_query_and_history(
+        query=query,
+        conversation_history=conversation_history,
+        prompt_without_query_or_history=render_tool_decision_prompt(
+            query="",
+            recent_history_text="",
+            tool_results_text=tool_results_text,
+        ),
+        model=model,
+        model_manager=model_manager,
+    )
+
+    return render_tool_decision_prompt(
+        query=fitted_query,
+        recent_history_text=recent_history_text,
+        tool_results_text=tool_results_text,
+    )
+
+
+def render_tool_decision_prompt(
+    query: str,
+    recent_history_text: str,
+    tool_results_text: str,
 ) -> str:
     return f"""
     You are TARS, a concise local assistant with access to tools.
 
-    Decide whether a tool is useful. If a tool is useful, call the best tool with precise arguments.
-    If no tool is needed, answer directly.
+    Decide whether a tool is useful. If tools are useful, call the best tools with precise arguments.
+    Independent tool calls can be made together in one turn.
+    If the tool observations already cover the request, or no tool is needed, answer directly.
 
     Available tools:
     - read_file(path): read a local text file
@@ -197,20 +471,74 @@ def build_tool_decision_prompt(
 
     Recent conversation:
     ---
-    {format_recent_history(conversation_history)}
+    {recent_history_text}
     ---
 
     User request:
     ---
     {query}
     ---
+
+    Tool observations so far:
+    ---
+    {tool_results_text}
+    ---
     """
 
 
-def build_final_response_prompt(
+async def fit_tool_observations(
+    query: str,
+    tool_results_text: str,
+    model: Model,
+    model_manager: ModelManager,
+    websocket: WebSocket,
+    run_id: str,
+    session_id: int,
+) -> str:
+    observation_budget = int(context_token_budget(model) * TOOL_OBSERVATION_BUDGET_SHARE)
+    observation_tokens = await count_text_tokens(tool_results_text, model, model_manager)
+    if observation_tokens <= observation_budget:
+        return tool_results_text
+
+    logger.info("Summarizing %s tokens of tool observations to fit %s tokens", observation_tokens, observation_budget)
+    return await model_manager.ask_model_in_chunks(
+        model,
+        [Message(role="user", content=tool_results_text)],
+        user_goal=query,
+        progress_callback=build_progress_callback(websocket, run_id, session_id),
+    )
+
+
+async def build_final_response_prompt(
     query: str,
     conversation_history: Conversation,
-    tool_results: list[dict[str, str]],
+    tool_results_text: str,
+    model: Model,
+    model_manager: ModelManager,
+) -> str:
+    fitted_query, recent_history_text = await fit_query_and_history(
+        query=query,
+        conversation_history=conversation_history,
+        prompt_without_query_or_history=render_final_response_prompt(
+            query="",
+            recent_history_text="",
+            tool_results_text=tool_results_text,
+        ),
+        model=model,
+        model_manager=model_manager,
+    )
+
+    return render_final_response_prompt(
+        query=fitted_query,
+        recent_history_text=recent_history_text,
+        tool_results_text=tool_results_text,
+    )
+
+
+def render_final_response_prompt(
+    query: str,
+    recent_history_text: str,
+    tool_results_text: str,
 ) -> str:
     return f"""
     You are TARS, a concise local assistant.
@@ -220,7 +548,7 @@ def build_final_response_prompt(
 
     Recent conversation:
     ---
-    {format_recent_history(conversation_history)}
+    {recent_history_text}
     ---
 
     User request:
@@ -230,34 +558,17 @@ def build_final_response_prompt(
 
     Tool observations:
     ---
-    {format_tool_results(tool_results)}
+    {tool_results_text}
     ---
     """
 
 
-def format_recent_history(
-    conversation_history: Conversation,
-    max_messages: int = 6,
-) -> str:
-    visible_messages = [
-        message
-        for message in conversation_history.return_message_history()
-        if message.role in {"user", "assistant"}
-    ]
-    recent_messages = visible_messages[-max_messages:]
-
-    if not recent_messages:
-        return "(no prior conversation)"
-
-    return "\n".join(f"{message.role}: {message.content}" for message in recent_messages)
-
-
-def format_tool_results(tool_results: list[dict[str, str]]) -> str:
+def format_tool_results(tool_results: list[dict[str, Any]], first_index: int = 1) -> str:
     if not tool_results:
         return "No tools were called."
 
     formatted_results = []
-    for index, tool_result in enumerate(tool_results, start=1):
+    for index, tool_result in enumerate(tool_results, start=first_index):
         formatted_results.append(
             "\n".join([
                 f"[{index}] {tool_result['tool_name']} - {tool_result['status']}",
@@ -278,7 +589,7 @@ def compact_text(text: str, max_chars: int) -> str:
     return f"{stripped_text[:max_chars].rstrip()}\n[truncated: omitted {omitted_characters} characters]"
 
 
-def build_empty_tool_fallback(tool_results: list[dict[str, str]]) -> str:
+def build_empty_tool_fallback(tool_results: list[dict[str, Any]]) -> str:
     if tool_results:
         return "I used the available tools, but I could not turn the observations into a reliable answer."
 
@@ -5,15 +5,16 @@ from src.config.ModelConfig import ModelConfig
 
 
 DEFAULT_ROLE_MODEL_NAMES = {
+    "acknowledgement_model": "Qwen 3.5 4B Instruct (Q6_K)",
     "router_model": "Qwen 3.5 4B Instruct (Q6_K)",
     "planner_model": "Qwen 3.5 4B Instruct (Q6_K)",
     "worker_model": "Qwen 3.5 4B Instruct (Q6_K)",
     "review_model": "Qwen 3.5 4B Instruct (Q6_K)",
 }
 
-
 @dataclass(frozen=True)
 class OrchestrationModels:
+    acknowledgement_model: Model
     router_model: Model
     planner_model: Model
     worker_model: Model
@@ -34,6 +35,7 @@ class ModelRoleSelector:
 
     def resolve(self) -> OrchestrationModels:
         return OrchestrationModels(
+            acknowledgement_model=self.resolve_model("acknowledgement_model"),
             router_model=self.resolve_model("router_model"),
             planner_model=self.resolve_model("planner_model"),
             worker_model=self.resolve_model("worker_model"),
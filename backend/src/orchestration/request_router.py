@@ -1,53 +1,54 @@
-import json
 import logging
 from dataclasses import dataclass
 
 from src.config.Model import Model
 from src.infer.ModelManager import ModelManager
 from src.message_structures.message import Message
+from src.orchestration.fast_router import ROUTE_MODES, FastRouter
 
 logger = logging.getLogger("uvicorn.error")
 
+FAST_ROUTER = FastRouter()
 
-ROUTE_TOOLS = [
-    {
-        "type": "function",
-        "function": {
-            "name": "route_request",
-            "description": "Choose how the backend should handle the user's request.",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "mode": {
-                        "type": "string",
-                        "enum": [
-                            "direct_chat",
-                            "task_orchestrator",
-                        ],
-                    },
-                    "reason": {
-                        "type": "string",
-                        "description": "Short explanation for logging.",
-                    },
-                },
-                "required": ["mode", "reason"],
-            },
+ROUTE_DECISION_MAX_TOKENS = 96
+ROUTE_DECISION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "mode": {
+            "type": "string",
+            "enum": list(ROUTE_MODES),
         },
-    }
-]
+        "reason": {
+            "type": "string",
+            "description": "Short explanation for logging.",
+            "maxLength": 160,
+        },
+    },
+    "required": ["mode", "reason"],
+    "additionalProperties": False,
+}
 
 
 @dataclass(frozen=True)
 class RouteDecision:
     mode: str
     reason: str
+    source: str = "model"
 
 
-def route_request(
+async def route_request(
     query: str,
     model: Model,
     model_manager: ModelManager,
 ) -> RouteDecision:
+    fast_decision = await FAST_ROUTER.route(query)
+    if fast_decision is not None:
+        return RouteDecision(
+            mode=fast_decision.mode,
+            reason=fast_decision.reason,
+            source=fast_decision.source,
+        )
+
     prompt = f"""
     You are deciding how a local AI backend should handle a user request.
 
@@ -60,34 +61,28 @@ def route_request(
     - Do not choose direct_chat if the user asks to read local files, save files, analyse documents, research a topic, write code, execute code, or perform multi-step work.
     - Choose task_orchestrator for everything that is not a tiny conversational reply.
 
+    Respond with a JSON object holding the chosen `mode` and a one-sentence `reason`.
+
     User request:
     ---
     {query}
     ---
     """
 
-    response = model_manager.ask_model(
+    arguments = await model_manager.ask_model_structured(
         model,
         [Message(role="user", content=prompt)],
-        tools=ROUTE_TOOLS,
-        tool_choice="required",
+        schema_name="route_request",
+        schema=ROUTE_DECISION_SCHEMA,
+        max_tokens=ROUTE_DECISION_MAX_TOKENS,
+        prompt_family="router",
+        cache_response=True,
     )
 
-    for part in response:
-        if part.get("type") != "function":
-            continue
-
-        function = part["function"]
-        if function["name"] != "route_request":
-            continue
-
-        arguments = function["arguments"]
-        if isinstance(arguments, str):
-            arguments = json.loads(arguments)
-
+    if arguments and arguments.get("mode") in ROUTE_MODES:
         return RouteDecision(
             mode=arguments["mode"],
-            reason=arguments["reason"],
+            reason=str(arguments.get("reason", "")).strip(),
         )
 
     logger.warning(
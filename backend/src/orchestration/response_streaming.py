@@ -0,0 +1,52 @@
+"""Stream final-answer generations to the websocket as response deltas."""
+
+from fastapi import WebSocket
+
+from src.app.ws_events import send_response_delta
+from src.config.Model import Model
+from src.infer.ModelManager import ModelManager
+from src.message_structures.message import Message
+
+
+async def stream_model_response(
+    model: Model,
+    messages: list[Message],
+    model_manager: ModelManager,
+    websocket: WebSocket,
+    run_id: str,
+    session_id: int,
+    prompt_family: str,
+) -> str:
+    response_parts = []
+
+    async for stream_event in model_manager.ask_model_stream(model, messages, prompt_family=prompt_family):
+        if stream_event.get("type") == "reasoning":
+            await send_response_delta(
+                websocket=websocket,
+                run_id=run_id,
+                session_id=session_id,
+                text="",
+                reasoning_text=stream_event.get("reasoning_content", ""),
+            )
+            continue
+
+        content = stream_event.get("content", "")
+        if not content:
+            continue
+
+        # Hold back leading whitespace so the visible reply starts on real text
+        if not response_parts and not content.strip():
+            continue
+
+        if not response_parts:
+            content = content.lstrip()
+
+        response_parts.append(content)
+        await send_response_delta(
+            websocket=websocket,
+            run_id=run_id,
+            session_id=session_id,
+            text=content,
+        )
+
+    return "".join(response_parts).strip()
@@ -52,6 +52,8 @@ def build_task_agent_selection_prompt(query: str) -> str:
     ---
     {query}
     ---
+
+    Respond with a JSON object holding the chosen `agent_name` and a one-sentence `reason`.
     """
 
 
@@ -1,4 +1,3 @@
-import json
 import logging
 from dataclasses import dataclass
 
@@ -15,28 +14,24 @@ from src.orchestration.task_agent_registry import build_task_agent_selection_pro
 
 logger = logging.getLogger("uvicorn.error")
 
-TASK_AGENT_TOOLS = [
-    {
-        "type": "function",
-        "function": {
-            "name": "select_task_agent",
-            "description": "Choose which task agent should handle the user's task.",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "agent_name": {
-                        "type": "string",
-                        "enum": [
-                            *task_agent_names(),
-                        ],
-                    },
-                    "reason": {"type": "string"},
-                },
-                "required": ["agent_name", "reason"],
-            },
+TASK_AGENT_DECISION_MAX_TOKENS = 96
+TASK_AGENT_DECISION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "agent_name": {
+            "type": "string",
+            "enum": [
+                *task_agent_names(),
+            ],
         },
-    }
-]
+        "reason": {
+            "type": "string",
+            "maxLength": 160,
+        },
+    },
+    "required": ["agent_name", "reason"],
+    "additionalProperties": False,
+}
 
 
 @dataclass(frozen=True)
@@ -54,7 +49,7 @@ async def handle_task_query(
     model_manager: ModelManager,
     orchestration_models: OrchestrationModels,
 ):
-    decision = select_task_agent(
+    decision = await select_task_agent(
         query=query,
         model=orchestration_models.router_model,
         model_manager=model_manager,
@@ -95,35 +90,34 @@ async def handle_task_query(
     )
 
 
-def select_task_agent(
+async def select_task_agent(
     query: str,
     model: Model,
     model_manager: ModelManager,
 ) -> TaskAgentDecision:
+    registered_agent_names = task_agent_names()
+    if len(registered_agent_names) == 1:
+        return TaskAgentDecision(
+            agent_name=registered_agent_names[0],
+            reason="Only one task agent is registered.",
+        )
+
     prompt = build_task_agent_selection_prompt(query)
 
-    response = model_manager.ask_model(
+    arguments = await model_manager.ask_model_structured(
         model,
         [Message(role="user", content=prompt)],
-        tools=TASK_AGENT_TOOLS,
-        tool_choice="required",
+        schema_name="select_task_agent",
+        schema=TASK_AGENT_DECISION_SCHEMA,
+        max_tokens=TASK_AGENT_DECISION_MAX_TOKENS,
+        prompt_family="router",
+        cache_response=True,
     )
 
-    for part in response:
-        if part.get("type") != "function":
-            continue
-
-        function = part["function"]
-        if function["name"] != "select_task_agent":
-            continue
-
-        arguments = function["arguments"]
-        if isinstance(arguments, str):
-            arguments = json.loads(arguments)
-
+    if arguments and arguments.get("agent_name") in registered_agent_names:
         return TaskAgentDecision(
             agent_name=arguments["agent_name"],
-            reason=arguments["reason"].strip(),
+            reason=str(arguments.get("reason", "")).strip(),
         )
 
     return TaskAgentDecision(
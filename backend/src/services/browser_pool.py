@@ -0,0 +1,216 @@
+"""Long-lived headless browser for the crawl4ai page fallback."""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any
+
+logger = logging.getLogger("uvicorn.error")
+
+MAX_CONCURRENT_PAGES = 4
+MAX_PAGES_PER_BROWSER = 50
+MAX_BROWSER_MEMORY_MB = 1536
+IDLE_SHUTDOWN_SECONDS = 5 * 60
+PAGE_TIMEOUT_SECONDS = 30.0
+BROWSER_PROCESS_NAMES = ("chrome", "chromium", "headless_shell", "msedge")
+
+
+@dataclass
+class PooledBrowser:
+    crawler: Any
+    started_at: float
+    # Browser processes this crawler launched; empty when psutil is not installed
+    process_ids: frozenset[int] = frozenset()
+    pages_served: int = 0
+    active_pages: int = 0
+    retiring: bool = False
+
+
+class BrowserPool:
+    """Share one headless browser across crawls instead of launching one per URL.
+
+    The browser starts on the first crawl and serves up to `max_concurrent_pages` pages at once.
+    After `max_pages_per_browser` pages, or once its own processes pass the memory threshold
+    (measured only when psutil is installed), it is retired: new crawls get a fresh browser and
+    the old one closes when its last page finishes.
+    An idle browser is shut down after `idle_shutdown_seconds`.
+    """
+
+    def __init__(
+        self,
+        max_concurrent_pages: int = MAX_CONCURRENT_PAGES,
+        max_pages_per_browser: int = MAX_PAGES_PER_BROWSER,
+        max_browser_memory_mb: int = MAX_BROWSER_MEMORY_MB,
+        idle_shutdown_seconds: float = IDLE_SHUTDOWN_SECONDS,
+    ):
+        self.max_concurrent_pages = max_concurrent_pages
+        self.max_pages_per_browser = max_pages_per_browser
+        self.max_browser_memory_mb = max_browser_memory_mb
+        self.idle_shutdown_seconds = idle_shutdown_seconds
+        self.current_browser: PooledBrowser | None = None
+        self.page_semaphore: asyncio.Semaphore | None = None
+        self.lifecycle_lock: asyncio.Lock | None = None
+        self.idle_shutdown_task: asyncio.Task | None = None
+        self.last_used_at = 0.0
+
+    async def crawl_markdown(self, url: str) -> str:
+        if self.page_semaphore is None:
+            self.page_semaphore = asyncio.Semaphore(self.max_concurrent_pages)
+            self.lifecycle_lock = asyncio.Lock()
+
+        async with self.page_semaphore:
+            pooled_browser = await self.acquire_browser()
+            try:
+                crawl_result = await asyncio.wait_for(
+                    pooled_browser.crawler.arun(url=url),
+                    timeout=PAGE_TIMEOUT_SECONDS,
+                )
+            finally:
+                await self.release_browser(pooled_browser)
+
+        return str(getattr(crawl_result, "markdown", "") or "")
+
+    async def acquire_browser(self) -> PooledBrowser:
+        async with self.lifecycle_lock:
+            if self.current_browser is None or self.current_browser.retiring:
+                self.current_browser = await self.start_browser()
+
+            pooled_browser = self.current_browser
+            pooled_browser.active_pages += 1
+            pooled_browser.pages_served += 1
+            if pooled_browser.pages_served >= self.max_pages_per_browser:
+                logger.info("Recycling headless browser after %s pages", pooled_browser.pages_served)
+                pooled_browser.retiring = True
+
+            return pooled_browser
+
+    async def release_browser(self, pooled_browser: PooledBrowser) -> None:
+        browser_memory_mb = 0.0
+        # Walking the process tree is blocking, so it runs on a worker thread and outside the lock, and is
+        # skipped for a cancelled crawl so the page is handed back promptly
+        if pooled_browser.process_ids and not pooled_browser.retiring and not asyncio.current_task().cancelling():
+            browser_memory_mb = await asyncio.to_thread(measure_browser_memory_mb, pooled_browser.process_ids)
+
+        async with self.lifecycle_lock:
+            pooled_browser.active_pages -= 1
+            self.last_used_at = time.monotonic()
+
+            if not pooled_browser.retiring and browser_memory_mb > self.max_browser_memory_mb:
+                logger.info("Recycling headless browser using %.0f MB", browser_memory_mb)
+                pooled_browser.retiring = True
+
+            if pooled_browser.retiring and pooled_browser.active_pages == 0:
+                if self.current_browser is pooled_browser:
+                    self.current_browser = None
+                await self.close_browser(pooled_browser)
+
+        self.schedule_idle_shutdown()
+
+    async def start_browser(self) -> PooledBrowser:
+        from crawl4ai import AsyncWebCrawler
+
+        started_at = time.perf_counter()
+        existing_process_ids = await asyncio.to_thread(browser_process_ids)
+        crawler = AsyncWebCrawler()
+        try:
+            await crawler.start()
+            # Browsers start one at a time under the lifecycle lock, so the new processes belong to this crawler
+            process_ids = await asyncio.to_thread(browser_process_ids) - existing_process_ids
+        except BaseException:
+            # A fetch deadline can cancel a cold start, which would otherwise leave a half-started browser running
+            await self.close_browser(PooledBrowser(crawler=crawler, started_at=time.monotonic()))
+            raise
+
+        logger.info("Started headless browser in %.2fs", time.perf_counter() - started_at)
+        return PooledBrowser(crawler=crawler, started_at=time.monotonic(), process_ids=process_ids)
+
+    async def close_browser(self, pooled_browser: PooledBrowser) -> None:
+        try:
+            await pooled_browser.crawler.close()
+        except Exception:
+            logger.exception("Could not close headless browser cleanly")
+
+    def schedule_idle_shutdown(self) -> None:
+        if self.idle_shutdown_task is not None and not self.idle_shutdown_task.done():
+            return
+
+        self.idle_shutdown_task = asyncio.create_task(self.shut_down_when_idle())
+
+    async def shut_down_when_idle(self) -> None:
+        while self.current_browser is not None:
+            idle_seconds = time.monotonic() - self.last_used_at
+            if idle_seconds < self.idle_shutdown_seconds:
+                await asyncio.sleep(self.idle_shutdown_seconds - idle_seconds)
+                continue
+
+            async with self.lifecycle_lock:
+                pooled_browser = self.current_browser
+                if pooled_browser is None or pooled_browser.active_pages:
+                    return
+
+                if time.monotonic() - self.last_used_at < self.idle_shutdown_seconds:
+                    continue
+
+                logger.info("Shutting down idle headless browser")
+                self.current_browser = None
+                await self.close_browser(pooled_browser)
+
+    async def close(self) -> None:
+        if self.idle_shutdown_task is not None:
+            self.idle_shutdown_task.cancel()
+
+        if self.current_browser is not None:
+            pooled_browser = self.current_browser
+            self.current_browser = None
+            await self.close_browser(pooled_browser)
+
+
+def browser_process_ids() -> frozenset[int]:
+    # psutil is optional; without it only the page-count recycling applies
+    try:
+        import psutil
+    except ImportError:
+        return frozenset()
+
+    process_ids = set()
+    try:
+        for child_process in psutil.Process().children(recursive=True):
+            try:
+                if any(process_name in child_process.name().lower() for process_name in BROWSER_PROCESS_NAMES):
+                    process_ids.add(child_process.pid)
+            except psutil.Error:
+                continue
+    except psutil.Error:
+        return frozenset()
+
+    return frozenset(process_ids)
+
+
+def measure_browser_memory_mb(process_ids: frozenset[int]) -> float:
+    """Sum the resident memory of `process_ids` and the renderers they have started since."""
+    import psutil
+
+    measured_process_ids = set()
+    browser_memory_bytes = 0
+    for process_id in process_ids:
+        try:
+            browser_process = psutil.Process(process_id)
+            tree_processes = [browser_process, *browser_process.children(recursive=True)]
+        except psutil.Error:
+            continue
+
+        for tree_process in tree_processes:
+            if tree_process.pid in measured_process_ids:
+                continue
+
+            measured_process_ids.add(tree_process.pid)
+            try:
+                browser_memory_bytes += tree_process.memory_info().rss
+            except psutil.Error:
+                continue
+
+    return browser_memory_bytes / (1024 * 1024)
+
+
+BROWSER_POOL = BrowserPool()
@@ -0,0 +1,212 @@
+"""Compare the single-pass page text extractor with the BeautifulSoup walk it replaced.
+
+Pages are read from `generated/benchmarks/page_corpus/*.html`. Use the `save` command to add
+pages to the corpus, then `benchmark` to write `html_extraction.json` and `html_extraction.md`.
+"""
+
+import argparse
+import asyncio
+import html as html_module
+import json
+import re
+import statistics
+import time
+from pathlib import Path
+from urllib.parse import urlparse
+
+from src.config.RuntimeEnvironment import runtime_environment
+from src.services.html_text_extractor import extract_page_text
+
+CHARS_PER_TOKEN_ESTIMATE = 4
+DEFAULT_REPEATS = 5
+
+
+def soup_html_to_markdownish_text(html: str) -> str:
+    """The original extractor, kept as the benchmark baseline."""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+
+    for tag in soup.find_all(["script", "style", "noscript", "svg", "path"]):
+        tag.decompose()
+
+    lines = []
+
+    for tag in soup.find_all(["h1", "h2", "h3", "h4", "li", "p", "div", "section", "label", "button"]):
+        if tag.find(["h1", "h2", "h3", "h4", "li", "p", "div", "section", "label", "button"]) is not None:
+            continue
+
+        line_text = tag.get_text(" ", strip=True)
+        if not line_text:
+            continue
+
+        if tag.name == "h1":
+            lines.append(f"# {line_text}")
+            continue
+
+        if tag.name == "h2":
+            lines.append(f"## {line_text}")
+            continue
+
+        if tag.name in {"h3", "h4"}:
+            lines.append(f"### {line_text}")
+            continue
+
+        if tag.name == "li":
+            lines.append(f"- {line_text}")
+            continue
+
+        lines.append(line_text)
+
+    if not lines:
+        lines = [line.strip() for line in soup.get_text("\n").splitlines() if line.strip()]
+
+    text = "\n".join(lines)
+    text = html_module.unescape(text)
+    text = re.sub(r"[ \t]+", " ", text)
+    text = re.sub(r"\n{2,}", "\n", text)
+    return text.strip()
+
+
+EXTRACTORS = {
+    "soup": soup_html_to_markdownish_text,
+    "single_pass": lambda html: extract_page_text(html, remove_boilerplate=False),
+    "single_pass_boilerplate_removed": extract_page_text,
+}
+
+
+class HtmlExtractionBenchmark:
+    def __init__(self, repeats: int = DEFAULT_REPEATS):
+        self.repeats = repeats
+        self.benchmark_directory = runtime_environment().benchmark_directory
+        self.corpus_directory = self.benchmark_directory / "page_corpus"
+
+    def run(self, command_name: str, urls: list[str]) -> None:
+        if command_name == "save":
+            asyncio.run(self.save_pages(urls))
+            return
+
+        if command_name == "benchmark":
+            report = self.run_benchmark()
+            self.write_json("html_extraction.json", report)
+            self.write_markdown("html_extraction.md", self.benchmark_markdown(report))
+            return
+
+        raise ValueError(f"Unknown command: {command_name}")
+
+    async def save_pages(self, urls: list[str]) -> None:
+        from src.services.web_fetch_client import WEB_FETCH_CLIENT
+
+        self.corpus_directory.mkdir(parents=True, exist_ok=True)
+        try:
+            page_htmls = await WEB_FETCH_CLIENT.fetch_many(urls)
+        finally:
+            await WEB_FETCH_CLIENT.close()
+
+        for url, page_html in page_htmls.items():
+            page_path = self.corpus_directory / f"{self.corpus_file_stem(url)}.html"
+            page_path.write_text(page_html, encoding="utf-8")
+            print(f"Saved {url} -> {page_path}")
+
+        for url in urls:
+            if url not in page_htmls:
+                print(f"Could not fetch {url}")
+
+    def corpus_file_stem(self, url: str) -> str:
+        parsed_url = urlparse(url)
+        return re.sub(r"[^a-zA-Z0-9]+", "_", f"{parsed_url.netloc}{parsed_url.path}").strip("_")[:120] or "page"
+
+    def run_benchmark(self) -> dict:
+        page_paths = sorted(self.corpus_directory.glob("*.html"))
+        if not page_paths:
+            raise FileNotFoundError(f"No saved pages in {self.corpus_directory}; run the save command first")
+
+        page_rows = []
+        for page_path in page_paths:
+            page_html = page_path.read_text(encoding="utf-8", errors="ignore")
+            page_row = {
+                "page": page_path.name,
+                "html_bytes": len(page_html.encode("utf-8")),
+                "extractors": {},
+            }
+            for extractor_name, extractor in EXTRACTORS.items():
+                page_row["extractors"][extractor_name] = self.measure_extractor(extractor, page_html)
+
+            page_rows.append(page_row)
+
+        return {
+            "repeats": self.repeats,
+            "pages": page_rows,
+            "totals": {
+                extractor_name: {
+                    "elapsed_ms": round(sum(row["extractors"][extractor_name]["elapsed_ms"] for row in page_rows), 2),
+                    "output_chars": sum(row["extractors"][extractor_name]["output_chars"] for row in page_rows),
+                    "estimated_tokens": sum(row["extractors"][extractor_name]["estimated_tokens"] for row in page_rows),
+                }
+                for extractor_name in EXTRACTORS
+            },
+        }
+
+    def measure_extractor(self, extractor, page_html: str) -> dict:
+        elapsed_seconds = []
+        output_text = ""
+        for _ in range(self.repeats):
+            started_at = time.perf_counter()
+            output_text = extractor(page_html)
+            elapsed_seconds.append(time.perf_counter() - started_at)
+
+        return {
+            "elapsed_ms": round(statistics.median(elapsed_seconds) * 1000, 2),
+            "output_chars": len(output_text),
+            "output_lines": output_text.count("\n") + 1 if output_text else 0,
+            "estimated_tokens": len(output_text) // CHARS_PER_TOKEN_ESTIMATE,
+        }
+
+    def write_json(self, filename: str, payload: dict) -> None:
+        output_path = self.benchmark_directory / filename
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        output_path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+
+    def write_markdown(self, filename: str, content: str) -> None:
+        output_path = self.benchmark_directory / filename
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        output_path.write_text(content, encoding="utf-8")
+
+    def benchmark_markdown(self, report: dict) -> str:
+        lines = [
+            "# HTML Extraction Benchmark",
+            "",
+            f"Median of {report['repeats']} runs per page.",
+            "",
+            "| Page | HTML KiB | Extractor | ms | Output chars | Est. tokens |",
+            "| --- | ---: | --- | ---: | ---: | ---: |",
+        ]
+        for page_row in report["pages"]:
+            for extractor_name, measurement in page_row["extractors"].items():
+                lines.append(
+                    f"| {page_row['page']} | {page_row['html_bytes'] / 1024:.1f} | {extractor_name} | "
+                    f"{measurement['elapsed_ms']:.2f} | {measurement['output_chars']} | {measurement['estimated_tokens']} |",
+                )
+
+        lines.extend(["", "## Totals", "", "| Extractor | ms | Output chars | Est. tokens |", "| --- | ---: | ---: | ---: |"])
+        for extractor_name, totals in report["totals"].items():
+            lines.append(
+                f"| {extractor_name} | {totals['elapsed_ms']:.2f} | {totals['output_chars']} | {totals['estimated_tokens']} |",
+            )
+
+        return "\n".join(lines) + "\n"
+
+
+def main():
+    argument_parser = argparse.ArgumentParser()
+    argument_parser.add_argument("command", choices=["save", "benchmark"])
+    argument_parser.add_argument("urls", nargs="*", help="Pages to add to the corpus with the save command")
+    argument_parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS)
+    arguments = argument_parser.parse_args()
+
+    html_extraction_benchmark = HtmlExtractionBenchmark(repeats=arguments.repeats)
+    html_extraction_benchmark.run(arguments.command, arguments.urls)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+"""Single-pass HTML to markdown-ish text extraction with boilerplate removal.
+
+The page is streamed through the standard library `HTMLParser` once. Open block elements are kept
+on a stack and each block's text is emitted when it closes or when a nested block starts, which
+replaces searching every block's subtree for nested blocks.
+"""
+
+import re
+from dataclasses import dataclass, field
+from html.parser import HTMLParser
+
+BLOCK_TAGS = {"h1", "h2", "h3", "h4", "li", "p", "div", "section", "label", "button"}
+SKIPPED_TAGS = {"script", "style", "noscript", "svg", "template", "iframe", "canvas", "object"}
+BOILERPLATE_TAGS = {"nav", "header", "footer", "aside", "form", "dialog", "menu"}
+CONTENT_TAGS = {"html", "body", "main", "article"}
+# Inside an article these usually hold its title and byline rather than site chrome
+ARTICLE_PART_TAGS = {"header", "footer"}
+BOILERPLATE_ROLES = {"navigation", "banner", "contentinfo", "complementary", "search", "dialog", "alert"}
+# Whole class or id tokens of small widgets. Layout names such as `sidebar` or `header` are left out
+# because they often name wrappers around the page content.
+BOILERPLATE_NAME_PATTERN = re.compile(
+    r"nav|navbar|menu|breadcrumbs?|cookies?|cookie-banner|cookie-notice|consent|newsletter|subscribe|"
+    r"share|sharing|share-buttons|social|social-links|advert|ads?|promo|popup|modal|skip-link",
+)
+VOID_TAGS = {
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "param", "source", "track", "wbr",
+}
+LIST_TAGS = {"ul", "ol"}
+# Browsers end an open paragraph when one of these starts, and an open list item when the next starts
+PARAGRAPH_CLOSING_TAGS = {"p", "div", "section", "h1", "h2", "h3", "h4", "li"}
+# End tags that also end an open paragraph or list item, since they close its parent
+PARAGRAPH_PARENT_TAGS = BLOCK_TAGS | LIST_TAGS | CONTENT_TAGS
+LIST_ITEM_PARENT_TAGS = LIST_TAGS | CONTENT_TAGS
+HEADING_PREFIXES = {"h1": "# ", "h2": "## ", "h3": "### ", "h4": "### ", "li": "- "}
+MAX_LINK_LINE_CHARS = 80
+MIN_LINK_TEXT_RATIO = 0.9
+WHITESPACE_PATTERN = re.compile(r"[ \t]+")
+BLANK_LINES_PATTERN = re.compile(r"\n{2,}")
+
+
+@dataclass
+class OpenBlock:
+    tag: str
+    text_parts: list[str] = field(default_factory=list)
+    link_chars: int = 0
+    has_emitted_line: bool = False
+    list_depth: int = 0
+
+
+class HtmlTextExtractor(HTMLParser):
+    def __init__(self, remove_boilerplate: bool = True):
+        super().__init__(convert_charrefs=True)
+        self.remove_boilerplate = remove_boilerplate
+        self.open_blocks: list[OpenBlock] = []
+        self.skipped_tag = ""
+        self.skipped_depth = 0
+        self.skipped_list_depth = 0
+        self.skipped_boilerplate = False
+        self.link_depth = 0
+        self.article_depth = 0
+        self.list_depth = 0
+        self.lines: list[str] = []
+        self.seen_lines: set[str] = set()
+        self.all_text_parts: list[str] = []
+        # Text can arrive in several pieces when the page is fed in chunks, so it is joined before use
+        self.pending_data_parts: list[str] = []
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        self.flush_pending_data()
+        if self.skipped_depth:
+            if not self.start_ends_skip(tag):
+                return
+            self.stop_skipping()
+
+        if tag in VOID_TAGS:
+            return
+
+        if tag in SKIPPED_TAGS or (self.remove_boilerplate and self.is_boilerplate(tag, attrs)):
+            self.skipped_tag = tag
+            self.skipped_depth = 1
+            self.skipped_boilerplate = tag not in SKIPPED_TAGS
+            return
+
+        if tag == "a":
+            self.link_depth += 1
+            return
+
+        if tag in {"main", "article"}:
+            self.article_depth += 1
+            return
+
+        if tag in LIST_TAGS:
+            self.close_open_paragraph()
+            self.list_depth += 1
+            return
+
+        if tag not in BLOCK_TAGS:
+            return
+
+        if tag in PARAGRAPH_CLOSING_TAGS:
+            self.close_open_paragraph()
+
+        if tag == "li" and self.open_blocks and self.open_blocks[-1].tag == "li" and self.open_blocks[-1].list_depth == self.list_depth:
+            self.close_block()
+
+        if self.open_blocks:
+            # Text that came before a nested block is emitted now so it keeps its place in the page
+            self.emit_block_text(self.open_blocks[-1])
+
+        self.open_blocks.append(OpenBlock(tag=tag, list_depth=self.list_depth))
+
+    def handle_startendtag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        # `<div/>` and friends open nothing, but they still separate the text around them
+        self.flush_pending_data()
+
+    def handle_endtag(self, tag: str) -> None:
+        self.flush_pending_data()
+        if self.skipped_depth:
+            if not self.end_ends_skip(tag):
+                return
+            skipped_tag = self.skipped_tag
+            self.stop_skipping()
+            if tag == skipped_tag:
+                return
+
+        if tag == "a":
+            self.link_depth = max(0, self.link_depth - 1)
+            return
+
+        if tag in {"main", "article"}:
+            self.article_depth = max(0, self.article_depth - 1)
+            return
+
+        if tag in LIST_TAGS:
+            # Unclosed list items end with their list
+            while self.open_blocks and self.open_blocks[-1].tag in {"li", "p"} and self.open_blocks[-1].list_depth >= self.list_depth:
+                self.close_block()
+            self.list_depth = max(0, self.list_depth - 1)
+            return
+
+        if tag not in BLOCK_TAGS:
+            return
+
+        # Stray end tags are ignored; otherwise close everything left open inside this block
+        if not any(open_block.tag == tag for open_block in self.open_blocks):
+            return
+
+        while self.open_blocks:
+            closed_tag = self.close_block()
+            if closed_tag == tag:
+                return
+
+    def start_ends_skip(self, tag: str) -> bool:
+        # Content inside a boilerplate match means the match was a layout wrapper, so the skip is undone
+        if self.skipped_boilerplate and tag in {"main", "article"}:
+            return True
+
+        # `<p>` and `<li>` often have no end tag, so they end the way open paragraphs and list items do
+        if self.skipped_tag == "p":
+            return tag in PARAGRAPH_CLOSING_TAGS or tag in LIST_TAGS
+
+        if self.skipped_tag == "li":
+            if tag in LIST_TAGS:
+                self.skipped_list_depth += 1
+            return tag == "li" and not self.skipped_list_depth
+
+        if tag == self.skipped_tag:
+            self.skipped_depth += 1
+        return False
+
+    def end_ends_skip(self, tag: str) -> bool:
+        if self.skipped_tag == "p":
+            return tag in PARAGRAPH_PARENT_TAGS
+
+        if self.skipped_tag == "li":
+            if self.skipped_list_depth:
+                if tag in LIST_TAGS:
+                    self.skipped_list_depth -= 1
+                return False
+            return tag == "li" or tag in LIST_ITEM_PARENT_TAGS
+
+        if tag == self.skipped_tag:
+            self.skipped_depth -= 1
+        return not self.skipped_depth
+
+    def stop_skipping(self) -> None:
+        self.skipped_tag = ""
+        self.skipped_depth = 0
+        self.skipped_list_depth = 0
+        self.skipped_boilerplate = False
+
+    def handle_data(self, data: str) -> None:
+        if self.skipped_depth:
+            return
+
+        self.pending_data_parts.append(data)
+
+    def flush_pending_data(self) -> None:
+        if not self.pending_data_parts:
+            return
+
+        text = "".join(self.pending_data_parts).strip()
+        self.pending_data_parts = []
+        if not text:
+            return
+
+        self.all_text_parts.append(text)
+        if not self.open_blocks:
+            return
+
+        open_block = self.open_blocks[-1]
+        open_block.text_parts.append(text)
+        if self.link_depth:
+            open_block.link_chars += len(text)
+
+    def close(self) -> None:
+        super().close()
+        self.flush_open_blocks()
+
+    def flush_open_blocks(self) -> None:
+        # Also used when a download stops early, where closing the parser would emit a half-read tag as text
+        self.flush_pending_data()
+        while self.open_blocks:
+            self.close_block()
+
+    def close_open_paragraph(self) -> None:
+        if self.open_blocks and self.open_blocks[-1].tag == "p":
+            self.close_block()
+
+    def close_block(self) -> str:
+        open_block = self.open_blocks.pop()
+        self.emit_block_text(open_block)
+        return open_block.tag
+
+    def emit_block_text(self, open_block: OpenBlock) -> None:
+        if not open_block.text_parts:
+            return
+
+        line_text = " ".join(open_block.text_parts)
+        link_chars = open_block.link_chars
+        open_block.text_parts = []
+        open_block.link_chars = 0
+        if self.remove_boilerplate and self.is_link_line(line_text, link_chars):
+            return
+
+        line_prefix = "" if open_block.has_emitted_line else HEADING_PREFIXES.get(open_block.tag, "")
+        open_block.has_emitted_line = True
+        line = line_prefix + line_text
+        if self.remove_boilerplate:
+            # Repeated menus, share bars and footers add tokens without adding facts
+            if line in self.seen_lines:
+                return
+            self.seen_lines.add(line)
+
+        self.lines.append(line)
+
+    def is_boilerplate(self, tag: str, attrs: list[tuple[str, str | None]]) -> bool:
+        if tag in CONTENT_TAGS:
+            return False
+
+        if self.article_depth and tag in ARTICLE_PART_TAGS:
+            return False
+
+        if tag in BOILERPLATE_TAGS:
+            return True
+
+        attributes = dict(attrs)
+        if (attributes.get("role") or "").lower() in BOILERPLATE_ROLES:
+            return True
+
+        if (attributes.get("aria-hidden") or "").lower() == "true" or "hidden" in attributes:
+            return True
+
+        element_names = f"{attributes.get('id') or ''} {attributes.get('class') or ''}".lower().split()
+        return any(BOILERPLATE_NAME_PATTERN.fullmatch(element_name) for element_name in element_names)
+
+    def is_link_line(self, line_text: str, link_chars: int) -> bool:
+        text_chars = len(line_text)
+        return text_chars <= MAX_LINK_LINE_CHARS and link_chars >= text_chars * MIN_LINK_TEXT_RATIO
+
+    def text(self) -> str:
+        lines = self.lines or self.all_text_parts
+        text = "\n".join(lines)
+        text = WHITESPACE_PATTERN.sub(" ", text)
+        text = BLANK_LINES_PATTERN.sub("\n", text)
+        return text.strip()
+
+
+def extract_page_text(html: str, remove_boilerplate: bool = True) -> str:
+    html_text_extractor = HtmlTextExtractor(remove_boilerplate=remove_boilerplate)
+    html_text_extractor.feed(html)
+    html_text_extractor.close()
+    return html_text_extractor.text()
@@ -0,0 +1,294 @@
+"""Persistent disk cache for web responses, extracted page text and search results."""
+
+import hashlib
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable
+
+from src.config.RuntimeEnvironment import runtime_environment
+from src.telemetry.run_telemetry import get_current_run_recorder
+
+logger = logging.getLogger("uvicorn.error")
+
+DEFAULT_DISK_BUDGET_BYTES = 256 * 1024 * 1024
+EVICTION_TARGET_RATIO = 0.9
+DEFAULT_TTL_SECONDS = 60 * 60
+CONTENT_TYPE_TTL_SECONDS = {
+    "text/html": 6 * 60 * 60,
+    "application/xhtml+xml": 6 * 60 * 60,
+    "text/plain": 24 * 60 * 60,
+    "application/pdf": 7 * 24 * 60 * 60,
+    "application/json": 15 * 60,
+}
+SEARCH_RESULTS_TTL_SECONDS = 30 * 60
+RENDERED_PAGE_TTL_SECONDS = 6 * 60 * 60
+# Bump when the page text extractor changes, so text extracted by an older version is not reused
+EXTRACTOR_VERSION = 2
+CACHE_ENTRY_DIRECTORIES = ("responses", "bodies", "extracted", "documents")
+
+
+@dataclass
+class CachedWebResponse:
+    url: str
+    body_hash: str
+    content_type: str
+    etag: str
+    last_modified: str
+    stored_at: float
+    expires_at: float
+    body: str = ""
+
+    @property
+    def is_fresh(self) -> bool:
+        return time.time() < self.expires_at
+
+    def validator_headers(self) -> dict[str, str]:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+    def to_index_payload(self) -> dict:
+        return {
+            "url": self.url,
+            "body_hash": self.body_hash,
+            "content_type": self.content_type,
+            "etag": self.etag,
+            "last_modified": self.last_modified,
+            "stored_at": self.stored_at,
+            "expires_at": self.expires_at,
+        }
+
+
+class WebPageCache:
+    """Content-addressed web cache under `generated/web_cache`.
+
+    `responses/` maps a URL to its validators, expiry and body hash, `bodies/` stores each distinct
+    body once under its SHA-256, and `extracted/` stores the page text extracted from a body, so a
+    body seen again under any URL skips extraction. `documents/` holds JSON values such as search
+    results. Reads touch file mtimes, so evicting the oldest mtimes first is least recently used.
+    """
+
+    def __init__(
+        self,
+        cache_directory: Path,
+        disk_budget_bytes: int = DEFAULT_DISK_BUDGET_BYTES,
+    ):
+        self.cache_directory = Path(cache_directory)
+        self.disk_budget_bytes = disk_budget_bytes
+        self.total_size_bytes: int | None = None
+
+    def lookup_response(self, url: str) -> CachedWebResponse | None:
+        index_path = self.entry_path("responses", cache_key(url), ".json")
+        raw_index = self.read_json(index_path)
+        if raw_index is None:
+            return None
+
+        try:
+            cached_response = CachedWebResponse(**raw_index)
+        except TypeError:
+            self.remove_file(index_path)
+            return None
+
+        body_path = self.entry_path("bodies", cached_response.body_hash, ".txt")
+        body = self.read_text(body_path)
+        if body is None:
+            # The body was evicted on its own, so the index entry is useless
+            self.remove_file(index_path)
+            return None
+
+        cached_response.body = body
+        return cached_response
+
+    def store_response(
+        self,
+        url: str,
+        body: str,
+        content_type: str,
+        etag: str = "",
+        last_modified: str = "",
+        cache_control: str = "",
+    ) -> None:
+        if "no-store" in cache_control.lower():
+            return
+
+        body_hash = content_hash(body)
+        body_path = self.entry_path("bodies", body_hash, ".txt")
+        if not body_path.exists():
+            self.write_text(body_path, body)
+
+        stored_at = time.time()
+        cached_response = CachedWebResponse(
+            url=url,
+            body_hash=body_hash,
+            content_type=content_type,
+            etag=etag,
+            last_modified=last_modified,
+            stored_at=stored_at,
+            expires_at=stored_at + content_type_ttl_seconds(content_type),
+        )
+        self.write_json(self.entry_path("responses", cache_key(url), ".json"), cached_response.to_index_payload())
+
+    def refresh_response(self, cached_response: CachedWebResponse) -> None:
+        """Extend a response the server confirmed with `304 Not Modified`."""
+        cached_response.stored_at = time.time()
+        cached_response.expires_at = cached_response.stored_at + content_type_ttl_seconds(cached_response.content_type)
+        self.write_json(
+            self.entry_path("responses", cache_key(cached_response.url), ".json"),
+            cached_response.to_index_payload(),
+        )
+
+    def extracted_text(self, body: str, extractor: Callable[[str], str]) -> str:
+        extracted_path = self.entry_path("extracted", f"{content_hash(body)}-v{EXTRACTOR_VERSION}", ".md")
+        extracted_text = self.read_text(extracted_path)
+        note_web_cache_lookup("extracted", "hit" if extracted_text is not None else "miss")
+        if extracted_text is not None:
+            return extracted_text
+
+        extracted_text = extractor(body)
+        self.write_text(extracted_path, extracted_text)
+        return extracted_text
+
+    def lookup_document(self, document_kind: str, key: str) -> Any | None:
+        document_path = self.entry_path("documents", cache_key(f"{document_kind}:{key}"), ".json")
+        raw_document = self.read_json(document_path)
+        if raw_document is None:
+            note_web_cache_lookup(document_kind, "miss")
+            return None
+
+        if time.time() >= float(raw_document.get("expires_at", 0)):
+            self.remove_file(document_path)
+            note_web_cache_lookup(document_kind, "miss")
+            return None
+
+        note_web_cache_lookup(document_kind, "hit")
+        return raw_document.get("value")
+
+    def store_document(self, document_kind: str, key: str, value: Any, ttl_seconds: float) -> None:
+        self.write_json(
+            self.entry_path("documents", cache_key(f"{document_kind}:{key}"), ".json"),
+            {"value": value, "expires_at": time.time() + ttl_seconds},
+        )
+
+    def entry_path(self, entry_directory: str, entry_name: str, suffix: str) -> Path:
+        # Two-character fan-out keeps any one directory from growing huge
+        return self.cache_directory / entry_directory / entry_name[:2] / f"{entry_name}{suffix}"
+
+    def read_text(self, path: Path) -> str | None:
+        try:
+            text = path.read_text(encoding="utf-8")
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        except OSError:
+            logger.warning("Could not read web cache entry %s", path)
+            return None
+
+        return text
+
+    def read_json(self, path: Path) -> dict | None:
+        text = self.read_text(path)
+        if text is None:
+            return None
+
+        try:
+            return json.loads(text)
+        except json.JSONDecodeError:
+            self.remove_file(path)
+            return None
+
+    def write_json(self, path: Path, payload: dict) -> None:
+        try:
+            serialized_payload = json.dumps(payload, ensure_ascii=False)
+        except (TypeError, ValueError):
+            logger.warning("Skipping web cache entry that is not JSON serializable: %s", path.name)
+            return
+
+        self.write_text(path, serialized_payload)
+
+    def write_text(self, path: Path, text: str) -> None:
+        size_before_write = self.current_size_bytes()
+        previous_file_size = path.stat().st_size if path.exists() else 0
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(text, encoding="utf-8")
+        except (OSError, UnicodeError):
+            logger.warning("Could not write web cache entry %s", path)
+            return
+
+        self.total_size_bytes = size_before_write + path.stat().st_size - previous_file_size
+        if self.total_size_bytes > self.disk_budget_bytes:
+            self.evict_to_budget()
+
+    def remove_file(self, path: Path) -> None:
+        try:
+            file_size = path.stat().st_size
+            path.unlink()
+        except OSError:
+            return
+
+        if self.total_size_bytes is not None:
+            self.total_size_bytes -= file_size
+
+    def current_size_bytes(self) -> int:
+        if self.total_size_bytes is None:
+            self.total_size_bytes = sum(file_size for _, file_size, _ in self.entry_files())
+
+        return self.total_size_bytes
+
+    def entry_files(self) -> list[tuple[Path, int, float]]:
+        entry_files = []
+        for entry_directory in CACHE_ENTRY_DIRECTORIES:
+            for entry_path in (self.cache_directory / entry_directory).glob("*/*"):
+                try:
+                    entry_stat = entry_path.stat()
+                except OSError:
+                    continue
+                entry_files.append((entry_path, entry_stat.st_size, entry_stat.st_mtime))
+        return entry_files
+
+    def evict_to_budget(self) -> None:
+        entry_files = self.entry_files()
+        total_size_bytes = sum(file_size for _, file_size, _ in entry_files)
+        target_size_bytes = int(self.disk_budget_bytes * EVICTION_TARGET_RATIO)
+
+        # Evict down to below the budget so the next few writes do not each trigger a scan
+        evicted_count = 0
+        for entry_path, file_size, _ in sorted(entry_files, key=lambda entry_file: entry_file[2]):
+            if total_size_bytes <= target_size_bytes:
+                break
+
+            entry_path.unlink(missing_ok=True)
+            total_size_bytes -= file_size
+            evicted_count += 1
+
+        self.total_size_bytes = total_size_bytes
+        logger.info("Evicted %s web cache entries to fit %s bytes", evicted_count, self.disk_budget_bytes)
+
+
+def cache_key(value: str) -> str:
+    return hashlib.sha256(value.encode("utf-8")).hexdigest()
+
+
+def content_hash(body: str) -> str:
+    return hashlib.sha256(body.encode("utf-8", errors="surrogatepass")).hexdigest()
+
+
+def content_type_ttl_seconds(content_type: str) -> float:
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    return CONTENT_TYPE_TTL_SECONDS.get(media_type, DEFAULT_TTL_SECONDS)
+
+
+def note_web_cache_lookup(entry_kind: str, outcome: str) -> None:
+    recorder = get_current_run_recorder()
+    if recorder is not None:
+        recorder.note_web_cache_lookup(entry_kind, outcome)
+
+
+WEB_PAGE_CACHE = WebPageCache(runtime_environment().web_cache_directory)
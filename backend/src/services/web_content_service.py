@@ -1,25 +1,98 @@
 import asyncio
 import logging
-import html as html_module
 import re
 import sys
 from urllib.parse import parse_qs, unquote, urljoin, urlparse
 
-import requests
-from bs4 import BeautifulSoup
+import httpx
+
+from src.services.html_text_extractor import HtmlTextExtractor, extract_page_text
+from src.services.web_cache import RENDERED_PAGE_TTL_SECONDS, WEB_PAGE_CACHE, content_type_ttl_seconds
+from src.services.web_fetch_client import (
+    DEFAULT_FETCH_DEADLINE_SECONDS,
+    WEB_FETCH_CLIENT,
+    UnsupportedContentError,
+    gather_within_deadline,
+)
 
 logger = logging.getLogger("uvicorn.error")
 
+EVIDENCE_PAGE_COUNT = 3
+EVIDENCE_EXCERPT_CHARS = 1500
+EVIDENCE_DEADLINE_SECONDS = 8.0
+MIN_USABLE_LINES = 8
+# Enough text to fill a tool result several times over, after which more of the page is wasted download
+MAX_COLLECTED_CHARS = 20000
+MIN_COLLECTED_CHARS_WITHOUT_QUERY = 6000
+MIN_RELEVANT_LINES = 6
+MIN_QUERY_TERM_CHARS = 3
+QUERY_TERM_PATTERN = re.compile(r"[a-z0-9]+")
+QUERY_STOP_WORDS = {
+    "the", "and", "for", "with", "what", "when", "where", "which", "who", "why", "how", "does", "did",
+    "are", "was", "were", "is", "this", "that", "from", "about", "into", "your", "you", "can", "will",
+}
+
+
+class PageTextCollector:
+    """Parse a page as it streams in and report when enough useful text has been collected.
+
+    A page has enough text once it is usable by `page_text_is_usable` and either holds
+    `MIN_RELEVANT_LINES` lines that mention a query term, or, without a query, a few thousand
+    characters. Past `MAX_COLLECTED_CHARS` the download always stops.
+    """
+
+    def __init__(self, query: str = ""):
+        self.html_text_extractor = HtmlTextExtractor()
+        self.query_terms = query_terms(query)
+        self.checked_line_count = 0
+        self.collected_chars = 0
+        self.relevant_line_count = 0
+
+    def feed(self, text_chunk: str) -> bool:
+        self.html_text_extractor.feed(text_chunk)
+
+        new_lines = self.html_text_extractor.lines[self.checked_line_count:]
+        self.checked_line_count += len(new_lines)
+        for line in new_lines:
+            self.collected_chars += len(line)
+            if line_mentions_query(line, self.query_terms):
+                self.relevant_line_count += 1
+
+        return self.has_enough_text()
+
+    def has_enough_text(self) -> bool:
+        if self.collected_chars >= MAX_COLLECTED_CHARS:
+            return True
+
+        if self.checked_line_count < MIN_USABLE_LINES:
+            return False
 
-async def fetch_page_markdown(url: str) -> str:
+        if not self.query_terms:
+            return self.collected_chars >= MIN_COLLECTED_CHARS_WITHOUT_QUERY
+
+        return self.relevant_line_count >= MIN_RELEVANT_LINES
+
+    def text(self, complete: bool) -> str:
+        if complete:
+            self.html_text_extractor.close()
+        else:
+            self.html_text_extractor.flush_open_blocks()
+
+        return self.html_text_extractor.text()
+
+
+async def fetch_page_markdown(url: str, query: str = "") -> str:
     if not url:
         return ""
 
-    fallback_markdown = fetch_page_markdown_fallback(url)
-    if page_text_is_usable(fallback_markdown):
-        return fallback_markdown
+    fallback_markdown = await fetch_page_markdown_fallback(url, query)
+    return await render_unusable_page(url, fallback_markdown)
+
 
-    if not browser_fetch_is_supported():
+async def render_unusable_page(url: str, fallback_markdown: str) -> str:
+    """Render `url` in the pooled browser when its plain fetch gave unusable text."""
+    url = normalize_fetch_url(url)
+    if not url or page_text_is_usable(fallback_markdown) or not browser_fetch_is_supported():
         return fallback_markdown
 
     try:
@@ -28,9 +101,20 @@ async def fetch_page_markdown(url: str) -> str:
         logger.exception("Could not import crawl_page_markdown for web fetch")
         return fallback_markdown
 
+    cached_browser_markdown = await asyncio.to_thread(WEB_PAGE_CACHE.lookup_document, "rendered_page", url)
+    if cached_browser_markdown is not None:
+        return cached_browser_markdown
+
     try:
         browser_markdown = await crawl_page_markdown(url)
         if page_text_is_usable(browser_markdown):
+            await asyncio.to_thread(
+                WEB_PAGE_CACHE.store_document,
+                "rendered_page",
+                url,
+                browser_markdown,
+                RENDERED_PAGE_TTL_SECONDS,
+            )
             return browser_markdown
     except Exception:
         logger.exception("Web fetch failed for %s", url)
@@ -38,29 +122,126 @@ async def fetch_page_markdown(url: str) -> str:
     return fallback_markdown
 
 
-def fetch_page_markdown_fallback(url: str) -> str:
+async def fetch_page_markdown_fallback(url: str, query: str = "") -> str:
     url = normalize_fetch_url(url)
     if not url:
         return ""
 
+    # Where a download stops depends on the query, so text from a partial download is cached per query
+    partial_page_key = f"{url}\n{query}"
+    cached_partial_text = await asyncio.to_thread(WEB_PAGE_CACHE.lookup_document, "partial_page", partial_page_key)
+    if cached_partial_text is not None:
+        return cached_partial_text
+
+    page_text_collector = PageTextCollector(query)
     try:
-        response = requests.get(
-            url,
-            timeout=20,
-            headers={
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) Tars/0.1",
-            },
-        )
-        response.raise_for_status()
-    except requests.HTTPError as exc:
-        status_code = exc.response.status_code if exc.response is not None else ""
-        logger.warning("Fallback web fetch skipped %s: HTTP %s", url, status_code)
+        streamed_page = await WEB_FETCH_CLIENT.fetch_text_streamed(url, page_text_collector.feed)
+    except httpx.HTTPStatusError as exc:
+        logger.warning("Fallback web fetch skipped %s: HTTP %s", url, exc.response.status_code)
+        return ""
+    except UnsupportedContentError as error:
+        logger.info("Fallback web fetch skipped %s: %s", url, error)
         return ""
     except Exception:
         logger.exception("Fallback web fetch failed for %s", url)
         return ""
 
-    return html_to_markdownish_text(response.text)
+    if streamed_page.from_cache:
+        return await extract_page_markdown(streamed_page.text)
+
+    page_text = await asyncio.to_thread(page_text_collector.text, streamed_page.complete)
+    if not streamed_page.complete:
+        logger.info("Stopped downloading %s after %s bytes with enough page text", url, streamed_page.received_bytes)
+        await asyncio.to_thread(
+            WEB_PAGE_CACHE.store_document,
+            "partial_page",
+            partial_page_key,
+            page_text,
+            content_type_ttl_seconds(streamed_page.content_type),
+        )
+
+    return page_text
+
+
+async def fetch_pages_markdown(
+    urls: list[str],
+    deadline_seconds: float = DEFAULT_FETCH_DEADLINE_SECONDS,
+    query: str = "",
+) -> dict[str, str]:
+    """Fetch several pages in one wall-clock window, keyed by the URL as given.
+
+    Pages whose plain fetch gives unusable text are rendered in the pooled browser within the same
+    window, and keep their plain text if the render misses it.
+    """
+    fallback_pages_markdown: dict[str, str] = {}
+
+    async def fetch_page(url: str) -> str:
+        fallback_markdown = await fetch_page_markdown_fallback(url, query)
+        fallback_pages_markdown[url] = fallback_markdown
+        return await render_unusable_page(url, fallback_markdown)
+
+    pages_markdown = await gather_within_deadline(
+        {
+            url: lambda url=url: fetch_page(url)
+            for url in urls
+            if url
+        },
+        deadline_seconds,
+    )
+    pages_markdown = {**fallback_pages_markdown, **pages_markdown}
+    return {url: page_markdown for url, page_markdown in pages_markdown.items() if page_markdown}
+
+
+async def add_page_excerpts(
+    search_results: list[dict],
+    query: str = "",
+    page_count: int = EVIDENCE_PAGE_COUNT,
+    max_chars: int = EVIDENCE_EXCERPT_CHARS,
+    deadline_seconds: float = EVIDENCE_DEADLINE_SECONDS,
+) -> list[dict]:
+    """Fetch the top result pages together and attach the most query-relevant text of each as an `excerpt`."""
+    page_urls = [str(result.get("url", "")).strip() for result in search_results[:page_count]]
+    pages_markdown = await fetch_pages_markdown(page_urls, deadline_seconds=deadline_seconds, query=query)
+
+    return [
+        {
+            **result,
+            "excerpt": relevant_excerpt(
+                pages_markdown.get(str(result.get("url", "")).strip(), ""),
+                query,
+                max_chars,
+            ),
+        }
+        for result in search_results
+    ]
+
+
+def relevant_excerpt(page_text: str, query: str, max_chars: int) -> str:
+    terms = query_terms(query)
+    relevant_lines = [
+        line
+        for line in page_text.splitlines()
+        if line_mentions_query(line, terms)
+    ]
+    if not relevant_lines:
+        return page_text[:max_chars]
+
+    return "\n".join(relevant_lines)[:max_chars]
+
+
+def query_terms(query: str) -> set[str]:
+    return {
+        term
+        for term in QUERY_TERM_PATTERN.findall(query.lower())
+        if len(term) >= MIN_QUERY_TERM_CHARS and term not in QUERY_STOP_WORDS
+    }
+
+
+def line_mentions_query(line: str, terms: set[str]) -> bool:
+    if not terms:
+        return False
+
+    return not terms.isdisjoint(QUERY_TERM_PATTERN.findall(line.lower()))
 
 
 def normalize_fetch_url(url: str) -> str:
@@ -94,48 +275,13 @@ def page_text_is_usable(page_text: str) -> bool:
         return False
 
     meaningful_lines = [line for line in page_text.splitlines() if line.strip()]
-    return len(meaningful_lines) >= 8
-
-
-def html_to_markdownish_text(html: str) -> str:
-    soup = BeautifulSoup(html, "html.parser")
-
-    for tag in soup.find_all(["script", "style", "noscript", "svg", "path"]):
-        tag.decompose()
-
-    lines = []
-
-    for tag in soup.find_all(["h1", "h2", "h3", "h4", "li", "p", "div", "section", "label", "button"]):
-        if tag.find(["h1", "h2", "h3", "h4", "li", "p", "div", "section", "label", "button"]) is not None:
-            continue
-
-        line_text = tag.get_text(" ", strip=True)
-        if not line_text:
-            continue
+    return len(meaningful_lines) >= MIN_USABLE_LINES
 
-        if tag.name == "h1":
-            lines.append(f"# {line_text}")
-            continue
 
-        if tag.name == "h2":
-            lines.append(f"## {line_text}")
-            continue
+async def extract_page_markdown(page_html: str) -> str:
+    # Extracted text is cached by body hash, so a page seen before skips parsing entirely
+    return await asyncio.to_thread(WEB_PAGE_CACHE.extracted_text, page_html, html_to_markdownish_text)
 
-        if tag.name in {"h3", "h4"}:
-            lines.append(f"### {line_text}")
-            continue
 
-        if tag.name == "li":
-            lines.append(f"- {line_text}")
-            continue
-
-        lines.append(line_text)
-
-    if not lines:
-        lines = [line.strip() for line in soup.get_text("\n").splitlines() if line.strip()]
-
-    text = "\n".join(lines)
-    text = html_module.unescape(text)
-    text = re.sub(r"[ \t]+", " ", text)
-    text = re.sub(r"\n{2,}", "\n", text)
-    return text.strip()
+def html_to_markdownish_text(html: str) -> str:
+    return extract_page_text(html)
@@ -0,0 +1,396 @@
+"""Pooled async HTTP for web searches and page fetches."""
+
+import asyncio
+import codecs
+import logging
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+from urllib.parse import urlparse
+
+import httpx
+
+from src.services.web_cache import WEB_PAGE_CACHE, WebPageCache, note_web_cache_lookup
+
+logger = logging.getLogger("uvicorn.error")
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) Tars/0.1"
+MAX_CONNECTIONS = 32
+MAX_CONNECTIONS_PER_HOST = 4
+CONNECT_TIMEOUT_SECONDS = 5.0
+REQUEST_TIMEOUT_SECONDS = 10.0
+HEDGE_DELAY_SECONDS = 1.5
+DEFAULT_FETCH_DEADLINE_SECONDS = 12.0
+MAX_STREAMED_BYTES = 2 * 1024 * 1024
+# Decoded text is handed to the consumer in batches about this size rather than per network read
+CONSUME_BATCH_CHARS = 32 * 1024
+TEXT_MEDIA_TYPES = ("text/html", "application/xhtml+xml", "text/plain", "text/xml", "application/xml")
+SNIFF_BYTES = 1024
+BINARY_SIGNATURES = (b"%PDF", b"PK\x03\x04", b"\x89PNG", b"GIF8", b"\xff\xd8\xff", b"\x1f\x8b")
+
+
+class UnsupportedContentError(Exception):
+    pass
+
+
+@dataclass
+class StreamedText:
+    text: str
+    content_type: str
+    received_bytes: int
+    complete: bool
+    from_cache: bool = False
+
+
+class WebFetchClient:
+    """Shared keep-alive client for outbound web requests.
+
+    httpx pools connections across hosts, and a semaphore per host keeps one slow site from
+    taking the whole pool. Fetches can be hedged, with a duplicate request sent when the first is
+    slow and whichever answers first winning, and batches of fetches share one overall deadline.
+    With a page cache, fresh responses are served from disk and stale ones are revalidated with
+    their ETag or Last-Modified validators.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = MAX_CONNECTIONS,
+        max_connections_per_host: int = MAX_CONNECTIONS_PER_HOST,
+        page_cache: WebPageCache | None = None,
+    ):
+        self.max_connections = max_connections
+        self.max_connections_per_host = max_connections_per_host
+        self.page_cache = page_cache
+        self.http_client: httpx.AsyncClient | None = None
+        self.host_semaphores: dict[str, asyncio.Semaphore] = {}
+
+    def client(self) -> httpx.AsyncClient:
+        if self.http_client is None or self.http_client.is_closed:
+            self.http_client = httpx.AsyncClient(
+                timeout=httpx.Timeout(REQUEST_TIMEOUT_SECONDS, connect=CONNECT_TIMEOUT_SECONDS),
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+                headers={"User-Agent": USER_AGENT},
+                follow_redirects=True,
+            )
+
+        return self.http_client
+
+    def host_semaphore(self, url: str) -> asyncio.Semaphore:
+        host = urlparse(url).netloc.lower()
+        if host not in self.host_semaphores:
+            self.host_semaphores[host] = asyncio.Semaphore(self.max_connections_per_host)
+
+        return self.host_semaphores[host]
+
+    async def fetch(self, url: str, headers: dict[str, str] | None = None) -> httpx.Response:
+        async with self.host_semaphore(url):
+            response = await self.client().get(url, headers=headers)
+
+        if response.status_code == 304:
+            return response
+
+        response.raise_for_status()
+        return response
+
+    async def fetch_hedged(
+        self,
+        url: str,
+        headers: dict[str, str] | None = None,
+        hedge_delay_seconds: float = HEDGE_DELAY_SECONDS,
+        deadline_seconds: float = DEFAULT_FETCH_DEADLINE_SECONDS,
+    ) -> httpx.Response:
+        """Fetch `url`, sending a second request if the first has not answered after the hedge delay."""
+        fetch_tasks = [asyncio.create_task(self.fetch(url, headers))]
+        try:
+            async with asyncio.timeout(deadline_seconds):
+                done_tasks, _ = await asyncio.wait(fetch_tasks, timeout=hedge_delay_seconds)
+                if not done_tasks:
+                    logger.info("Hedging slow fetch for %s", url)
+                    fetch_tasks.append(asyncio.create_task(self.fetch(url, headers)))
+
+                last_error: BaseException | None = None
+                for next_finished_fetch in asyncio.as_completed(fetch_tasks):
+                    try:
+                        return await next_finished_fetch
+                    except httpx.HTTPError as error:
+                        last_error = error
+
+                raise last_error
+        finally:
+            for fetch_task in fetch_tasks:
+                fetch_task.cancel()
+
+    async def fetch_text_hedged(
+        self,
+        url: str,
+        hedge_delay_seconds: float = HEDGE_DELAY_SECONDS,
+        deadline_seconds: float = DEFAULT_FETCH_DEADLINE_SECONDS,
+    ) -> str:
+        cached_response = None
+        if self.page_cache is not None:
+            cached_response = await asyncio.to_thread(self.page_cache.lookup_response, url)
+            if cached_response is not None and cached_response.is_fresh:
+                note_web_cache_lookup("response", "hit")
+                return cached_response.body
+
+        response = await self.fetch_hedged(
+            url,
+            headers=cached_response.validator_headers() if cached_response is not None else None,
+            hedge_delay_seconds=hedge_delay_seconds,
+            deadline_seconds=deadline_seconds,
+        )
+        if self.page_cache is None:
+            return response.text
+
+        if response.status_code == 304 and cached_response is not None:
+            await asyncio.to_thread(self.page_cache.refresh_response, cached_response)
+            note_web_cache_lookup("response", "revalidated")
+            return cached_response.body
+
+        note_web_cache_lookup("response", "miss")
+        await asyncio.to_thread(
+            self.page_cache.store_response,
+            url,
+            response.text,
+            content_type=response.headers.get("content-type", ""),
+            etag=response.headers.get("etag", ""),
+            last_modified=response.headers.get("last-modified", ""),
+            cache_control=response.headers.get("cache-control", ""),
+        )
+        return response.text
+
+    async def fetch_text_streamed(
+        self,
+        url: str,
+        consume_text: Callable[[str], bool],
+        max_bytes: int = MAX_STREAMED_BYTES,
+        hedge_delay_seconds: float = HEDGE_DELAY_SECONDS,
+        deadline_seconds: float = DEFAULT_FETCH_DEADLINE_SECONDS,
+    ) -> StreamedText:
+        """Stream a text response into `consume_text`, stopping when it returns True or at `max_bytes`.
+
+        The request is hedged like `fetch_hedged` until response headers arrive. Fresh cached bodies
+        are returned with `from_cache` set and are not passed to `consume_text`. Only complete
+        downloads are stored in the page cache; callers cache what they extracted from a partial one.
+        """
+        cached_response = None
+        if self.page_cache is not None:
+            cached_response = await asyncio.to_thread(self.page_cache.lookup_response, url)
+            if cached_response is not None and cached_response.is_fresh:
+                note_web_cache_lookup("response", "hit")
+                return StreamedText(
+                    text=cached_response.body,
+                    content_type=cached_response.content_type,
+                    received_bytes=0,
+                    complete=True,
+                    from_cache=True,
+                )
+
+        headers = cached_response.validator_headers() if cached_response is not None else None
+        async with asyncio.timeout(deadline_seconds), self.host_semaphore(url):
+            response = await self.open_stream_hedged(url, headers, hedge_delay_seconds)
+            try:
+                if response.status_code == 304 and cached_response is not None:
+                    await asyncio.to_thread(self.page_cache.refresh_response, cached_response)
+                    note_web_cache_lookup("response", "revalidated")
+                    return StreamedText(
+                        text=cached_response.body,
+                        content_type=cached_response.content_type,
+                        received_bytes=0,
+                        complete=True,
+                        from_cache=True,
+                    )
+
+                response.raise_for_status()
+                streamed_text = await self.consume_text_stream(response, consume_text, max_bytes)
+            finally:
+                await response.aclose()
+
+        if self.page_cache is not None:
+            note_web_cache_lookup("response", "miss")
+            if streamed_text.complete:
+                await asyncio.to_thread(
+                    self.page_cache.store_response,
+                    url,
+                    streamed_text.text,
+                    content_type=streamed_text.content_type,
+                    etag=response.headers.get("etag", ""),
+                    last_modified=response.headers.get("last-modified", ""),
+                    cache_control=response.headers.get("cache-control", ""),
+                )
+
+        return streamed_text
+
+    async def open_stream_hedged(
+        self,
+        url: str,
+        headers: dict[str, str] | None,
+        hedge_delay_seconds: float,
+    ) -> httpx.Response:
+        """Open a streamed GET, sending a second one if no response headers arrived after the hedge delay.
+
+        The first response to arrive wins and the other request is cancelled or closed.
+        """
+        http_client = self.client()
+
+        def open_stream() -> Awaitable[httpx.Response]:
+            return http_client.send(http_client.build_request("GET", url, headers=headers), stream=True)
+
+        open_tasks = [asyncio.create_task(open_stream())]
+        winning_response: httpx.Response | None = None
+        try:
+            done_tasks, _ = await asyncio.wait(open_tasks, timeout=hedge_delay_seconds)
+            if not done_tasks:
+                logger.info("Hedging slow streamed fetch for %s", url)
+                open_tasks.append(asyncio.create_task(open_stream()))
+
+            last_error: BaseException | None = None
+            for next_opened_stream in asyncio.as_completed(open_tasks):
+                try:
+                    winning_response = await next_opened_stream
+                    return winning_response
+                except httpx.HTTPError as error:
+                    last_error = error
+
+            raise last_error
+        finally:
+            for open_task in open_tasks:
+                if not open_task.done():
+                    open_task.cancel()
+                elif not open_task.cancelled() and open_task.exception() is None and open_task.result() is not winning_response:
+                    await open_task.result().aclose()
+
+    async def consume_text_stream(
+        self,
+        response: httpx.Response,
+        consume_text: Callable[[str], bool],
+        max_bytes: int,
+    ) -> StreamedText:
+        content_type = response.headers.get("content-type", "")
+        media_type = content_type.split(";", 1)[0].strip().lower()
+        if media_type and media_type not in TEXT_MEDIA_TYPES:
+            raise UnsupportedContentError(f"Unsupported content type {media_type}")
+
+        text_decoder = codecs.getincrementaldecoder(response_charset(response))(errors="replace")
+        text_parts: list[str] = []
+        unconsumed_parts: list[str] = []
+        unconsumed_chars = 0
+        received_bytes = 0
+        complete = True
+        async for byte_chunk in response.aiter_bytes():
+            if received_bytes == 0 and looks_binary(byte_chunk[:SNIFF_BYTES]):
+                # Servers label PDFs and downloads as text/html often enough to check the bytes
+                raise UnsupportedContentError("Response body is not text")
+
+            byte_chunk = byte_chunk[:max_bytes - received_bytes]
+            received_bytes += len(byte_chunk)
+            text_chunk = text_decoder.decode(byte_chunk)
+            text_parts.append(text_chunk)
+            unconsumed_parts.append(text_chunk)
+            unconsumed_chars += len(text_chunk)
+            if unconsumed_chars < CONSUME_BATCH_CHARS and received_bytes < max_bytes:
+                continue
+
+            # Parsing a batch can take milliseconds, so keep it off the event loop
+            has_enough_text = await asyncio.to_thread(consume_text, "".join(unconsumed_parts))
+            unconsumed_parts = []
+            unconsumed_chars = 0
+            if has_enough_text:
+                complete = False
+                break
+
+            if received_bytes >= max_bytes:
+                logger.info("Stopped reading %s at the %s byte cap", response.url, max_bytes)
+                complete = False
+                break
+
+        if complete:
+            final_text = text_decoder.decode(b"", final=True)
+            text_parts.append(final_text)
+            unconsumed_parts.append(final_text)
+            remaining_text = "".join(unconsumed_parts)
+            if remaining_text:
+                await asyncio.to_thread(consume_text, remaining_text)
+
+        return StreamedText(
+            text="".join(text_parts),
+            content_type=content_type,
+            received_bytes=received_bytes,
+            complete=complete,
+        )
+
+    async def fetch_many(
+        self,
+        urls: list[str],
+        deadline_seconds: float = DEFAULT_FETCH_DEADLINE_SECONDS,
+    ) -> dict[str, str]:
+        """Fetch every URL concurrently and return whatever finished before the shared deadline."""
+        return await gather_within_deadline(
+            {
+                url: lambda url=url: self.fetch_text_hedged(url, deadline_seconds=deadline_seconds)
+                for url in urls
+            },
+            deadline_seconds,
+        )
+
+    async def close(self) -> None:
+        if self.http_client is not None:
+            await self.http_client.aclose()
+            self.http_client = None
+
+
+async def gather_within_deadline(
+    fetches: dict[str, Callable[[], Awaitable[str]]],
+    deadline_seconds: float,
+) -> dict[str, str]:
+    """Run every fetch concurrently and keep the results that finished before the shared deadline."""
+    fetch_tasks = {key: asyncio.create_task(start_fetch()) for key, start_fetch in fetches.items()}
+    if not fetch_tasks:
+        return {}
+
+    await asyncio.wait(fetch_tasks.values(), timeout=deadline_seconds)
+
+    fetched_texts = {}
+    for key, fetch_task in fetch_tasks.items():
+        if not fetch_task.done():
+            fetch_task.cancel()
+            logger.info("Web fetch missed the %.1fs deadline: %s", deadline_seconds, key)
+            continue
+
+        if fetch_task.cancelled() or fetch_task.exception() is not None:
+            logger.info("Web fetch failed for %s: %s", key, describe_fetch_error(fetch_task))
+            continue
+
+        fetched_texts[key] = fetch_task.result()
+
+    return fetched_texts
+
+
+def response_charset(response: httpx.Response) -> str:
+    charset = response.charset_encoding or "utf-8"
+    try:
+        codecs.lookup(charset)
+    except LookupError:
+        return "utf-8"
+
+    return charset
+
+
+def looks_binary(first_bytes: bytes) -> bool:
+    return first_bytes.startswith(BINARY_SIGNATURES) or b"\x00" in first_bytes
+
+
+def describe_fetch_error(fetch_task: asyncio.Task) -> str:
+    if fetch_task.cancelled():
+        return "cancelled"
+
+    error = fetch_task.exception()
+    if isinstance(error, httpx.HTTPStatusError):
+        return f"HTTP {error.response.status_code}"
+
+    return repr(error)
+
+
+WEB_FETCH_CLIENT = WebFetchClient(page_cache=WEB_PAGE_CACHE)
@@ -1,4 +1,5 @@
 import json
+from collections import Counter
 from contextvars import ContextVar
 from dataclasses import asdict, dataclass, field
 from datetime import datetime, timezone
@@ -88,6 +89,7 @@ class UsageTelemetrySnapshot:
     input_tokens: int = 0
     output_tokens: int = 0
     total_tokens: int = 0
+    cached_input_tokens: int = 0
     tokens_per_second: float = 0.0
 
     def to_payload(self) -> dict:
@@ -136,9 +138,22 @@ class ModelInvocationTelemetryRecord:
     prompt_eval_ms: int = 0
     decode_ms: int = 0
     queue_ms: int = 0
+    queue_depth: int = 0
+    slot_id: int = -1
+    prompt_family: str = ""
+    output_constraint: str = ""
+    max_tokens: int = 0
+    finish_reason: str = ""
+    cached_prompt_tokens: int = 0
+    evaluated_prompt_tokens: int = 0
     reasoning_content: str = ""
     status: str = "completed"
 
+    @property
+    def truncated(self) -> bool:
+        # The server stopped at max_tokens or the context limit rather than a natural end
+        return self.finish_reason == "length"
+
     def to_payload(self) -> dict:
         payload = asdict(self)
         payload["model"] = self.model.to_payload()
@@ -147,6 +162,7 @@ class ModelInvocationTelemetryRecord:
         payload["first_token_at"] = to_iso8601(self.first_token_at)
         payload["elapsed_ms"] = elapsed_ms(self.started_at, self.ended_at)
         payload["first_token_ms"] = elapsed_ms(self.started_at, self.first_token_at)
+        payload["truncated"] = self.truncated
 
         duration_seconds = max(0.001, elapsed_ms(self.started_at, self.ended_at) / 1000)
         if self.output_tokens > 0:
@@ -157,6 +173,96 @@ class ModelInvocationTelemetryRecord:
         return payload
 
 
+@dataclass
+class AgentRoundTelemetryRecord:
+    round_index: int
+    started_at: datetime
+    generation_ended_at: datetime | None = None
+    first_tool_started_at: datetime | None = None
+    ended_at: datetime | None = None
+    tool_call_count: int = 0
+
+    def to_payload(self) -> dict:
+        generation_ended_at = self.generation_ended_at or self.ended_at
+        return {
+            "round_index": self.round_index,
+            "tool_call_count": self.tool_call_count,
+            "started_at": to_iso8601(self.started_at),
+            "ended_at": to_iso8601(self.ended_at),
+            "elapsed_ms": elapsed_ms(self.started_at, self.ended_at),
+            "generation_ms": elapsed_ms(self.started_at, generation_ended_at),
+            "first_tool_start_ms": elapsed_ms(self.started_at, self.first_tool_started_at) if self.first_tool_started_at else 0,
+            # Tool time that did not overlap with generation, so the round had to wait for it
+            "tool_wait_ms": elapsed_ms(generation_ended_at, self.ended_at) if generation_ended_at else 0,
+        }
+
+
+@dataclass
+class RouteTelemetryRecord:
+    mode: str
+    reason: str
+    source: str
+
+    def to_payload(self) -> dict:
+        return {
+            "mode": self.mode,
+            "reason": self.reason,
+            "source": self.source,
+        }
+
+
+@dataclass
+class AcknowledgementTelemetryRecord:
+    source: str
+    status: str
+    started_at: datetime
+    ended_at: datetime | None = None
+
+    def to_payload(self, run_started_at: datetime, first_response_token_at: datetime | None) -> dict:
+        delivered = self.status == "delivered"
+        time_to_acknowledgement_ms = elapsed_ms(run_started_at, self.ended_at) if delivered else 0
+        time_to_first_token_ms = elapsed_ms(run_started_at, first_response_token_at) if first_response_token_at else 0
+        return {
+            "source": self.source,
+            "status": self.status,
+            "started_at": to_iso8601(self.started_at),
+            "ended_at": to_iso8601(self.ended_at),
+            "elapsed_ms": elapsed_ms(self.started_at, self.ended_at),
+            "time_to_acknowledgement_ms": time_to_acknowledgement_ms,
+            "time_to_first_token_ms": time_to_first_token_ms,
+            # How much sooner the user heard back than they would have from the answer alone
+            "acknowledgement_lead_ms": max(0, time_to_first_token_ms - time_to_acknowledgement_ms)
+            if delivered and time_to_first_token_ms
+            else 0,
+            "model_call_avoided": self.source == "fast_path",
+        }
+
+
+@dataclass
+class ModelSwapTelemetryRecord:
+    model_name: str
+    evicted_model_names: list[str]
+    started_at: datetime
+    ended_at: datetime
+    status: str = "completed"
+    unload_ms: int = 0
+    status_poll_count: int = 0
+
+    def to_payload(self) -> dict:
+        swap_elapsed_ms = elapsed_ms(self.started_at, self.ended_at)
+        return {
+            "model_name": self.model_name,
+            "evicted_model_names": self.evicted_model_names,
+            "started_at": to_iso8601(self.started_at),
+            "ended_at": to_iso8601(self.ended_at),
+            "elapsed_ms": swap_elapsed_ms,
+            "unload_ms": self.unload_ms,
+            "load_ms": max(0, swap_elapsed_ms - self.unload_ms),
+            "status_poll_count": self.status_poll_count,
+            "status": self.status,
+        }
+
+
 @dataclass
 class ResultTelemetryRecord:
     result_type: str
@@ -201,6 +307,7 @@ class RunTelemetryRecorder:
         self.user_message = user_message
         self.started_at = now_utc()
         self.finished_at: datetime | None = None
+        self.first_response_token_at: datetime | None = None
         self.status = "running"
 
         self.current_phase = ""
@@ -214,7 +321,14 @@ class RunTelemetryRecorder:
         self.current_activity_key = ""
         self.parent_activity_key = ""
 
+        self.route: RouteTelemetryRecord | None = None
+        self.acknowledgement: AcknowledgementTelemetryRecord | None = None
         self.invocations: list[ModelInvocationTelemetryRecord] = []
+        self.model_swaps: list[ModelSwapTelemetryRecord] = []
+        self.agent_rounds: list[AgentRoundTelemetryRecord] = []
+        self.response_cache_hits = 0
+        self.response_cache_misses = 0
+        self.web_cache_lookups: Counter[str] = Counter()
         self.results: list[ResultTelemetryRecord] = []
         self.artifacts: list[ArtifactTelemetryRecord] = []
         self.event_kinds: list[str] = []
@@ -224,6 +338,17 @@ class RunTelemetryRecorder:
     def elapsed_ms(self) -> int:
         return elapsed_ms(self.started_at, self.finished_at)
 
+    @property
+    def truncated_invocation_count(self) -> int:
+        return sum(1 for invocation in self.invocations if invocation.truncated)
+
+    @property
+    def time_to_first_token_ms(self) -> int:
+        if self.first_response_token_at is None:
+            return 0
+
+        return elapsed_ms(self.started_at, self.first_response_token_at)
+
     def record_event_kind(self, event_kind: str) -> None:
         if not event_kind:
             return
@@ -264,6 +389,77 @@ class RunTelemetryRecorder:
         )
         self.parent_activity_key = str(details.get("parent_activity_key") or self.parent_activity_key or "")
 
+    def note_response_delta(self, text: str) -> None:
+        if not text:
+            return
+
+        if self.first_response_token_at is not None:
+            return
+
+        self.first_response_token_at = now_utc()
+
+    def note_route(self, mode: str, reason: str, source: str) -> None:
+        self.route = RouteTelemetryRecord(mode=mode, reason=reason, source=source)
+
+    def note_acknowledgement(
+        self,
+        source: str,
+        status: str,
+        started_at: datetime,
+        ended_at: datetime | None = None,
+    ) -> None:
+        self.acknowledgement = AcknowledgementTelemetryRecord(
+            source=source,
+            status=status,
+            started_at=started_at,
+            ended_at=ended_at or now_utc(),
+        )
+
+    def acknowledgement_payload(self) -> dict:
+        if self.acknowledgement is None:
+            return {}
+
+        return self.acknowledgement.to_payload(self.started_at, self.first_response_token_at)
+
+    def note_response_cache_lookup(self, hit: bool) -> None:
+        if hit:
+            self.response_cache_hits += 1
+        else:
+            self.response_cache_misses += 1
+
+    def note_web_cache_lookup(self, entry_kind: str, outcome: str) -> None:
+        self.web_cache_lookups[f"{entry_kind}_{outcome}"] += 1
+
+    @property
+    def web_cache_hit_count(self) -> int:
+        return sum(
+            lookup_count
+            for lookup_name, lookup_count in self.web_cache_lookups.items()
+            if not lookup_name.endswith("_miss")
+        )
+
+    @property
+    def web_cache_miss_count(self) -> int:
+        return sum(
+            lookup_count
+            for lookup_name, lookup_count in self.web_cache_lookups.items()
+            if lookup_name.endswith("_miss")
+        )
+
+    def note_model_swap(self, swap_record: ModelSwapTelemetryRecord) -> None:
+        self.model_swaps.append(swap_record)
+
+    def note_agent_round(self, round_record: AgentRoundTelemetryRecord) -> None:
+        self.agent_rounds.append(round_record)
+
+    @property
+    def model_queue_ms(self) -> int:
+        return sum(invocation.queue_ms for invocation in self.invocations)
+
+    @property
+    def model_swap_ms(self) -> int:
+        return sum(elapsed_ms(record.started_at, record.ended_at) for record in self.model_swaps)
+
     def note_result(self, result_type: str, payload: dict[str, Any]) -> None:
         self.results.append(
             ResultTelemetryRecord(
@@ -284,13 +480,29 @@ class RunTelemetryRecorder:
             ),
         )
 
-    def start_model_invocation(self, model, kind: str) -> int:
+    def start_model_invocation(
+        self,
+        model,
+        kind: str,
+        slot_id: int = -1,
+        queue_ms: int = 0,
+        queue_depth: int = 0,
+        prompt_family: str = "",
+        output_constraint: str = "",
+        max_tokens: int = 0,
+    ) -> int:
         invocation = ModelInvocationTelemetryRecord(
             kind=kind,
             model=model_to_snapshot(model),
             activity_label=self.current_activity or self.current_phase or kind,
             phase=self.current_phase,
             started_at=now_utc(),
+            queue_ms=queue_ms,
+            queue_depth=queue_depth,
+            slot_id=slot_id,
+            prompt_family=prompt_family,
+            output_constraint=output_constraint,
+            max_tokens=max_tokens,
         )
         self.invocations.append(invocation)
         return len(self.invocations) - 1
@@ -302,6 +514,7 @@ class RunTelemetryRecorder:
         first_token_at: datetime | None = None,
         reasoning_content: str = "",
         status: str = "completed",
+        finish_reason: str = "",
     ) -> None:
         if index < 0 or index >= len(self.invocations):
             return
@@ -311,6 +524,7 @@ class RunTelemetryRecorder:
         invocation.first_token_at = first_token_at
         invocation.reasoning_content = reasoning_content or ""
         invocation.status = status
+        invocation.finish_reason = finish_reason
 
         usage = usage or {}
         invocation.input_tokens = int(
@@ -330,7 +544,9 @@ class RunTelemetryRecorder:
         )
         invocation.prompt_eval_ms = int(usage.get("prompt_eval_ms") or usage.get("prompt_ms") or 0)
         invocation.decode_ms = int(usage.get("decode_ms") or usage.get("completion_ms") or 0)
-        invocation.queue_ms = int(usage.get("queue_ms") or 0)
+        invocation.queue_ms = int(usage.get("queue_ms") or invocation.queue_ms)
+        invocation.cached_prompt_tokens = int(usage.get("cached_prompt_tokens") or 0)
+        invocation.evaluated_prompt_tokens = int(usage.get("evaluated_prompt_tokens") or 0)
 
     def build_snapshot(self, event_kind: str = "") -> dict:
         current_invocation = self.invocations[-1] if self.invocations else None
@@ -366,6 +582,7 @@ class RunTelemetryRecorder:
             input_tokens=current_invocation.input_tokens if current_invocation else 0,
             output_tokens=current_invocation.output_tokens if current_invocation else 0,
             total_tokens=current_invocation.total_tokens if current_invocation else 0,
+            cached_input_tokens=current_invocation.cached_prompt_tokens if current_invocation else 0,
             tokens_per_second=current_invocation.to_payload().get("tokens_per_second", 0.0)
             if current_invocation
             else 0.0,
@@ -382,6 +599,9 @@ class RunTelemetryRecorder:
                 "status": self.status,
                 "started_at": to_iso8601(self.started_at),
                 "elapsed_ms": self.elapsed_ms,
+                "time_to_first_token_ms": self.time_to_first_token_ms,
+                "model_swap_ms": self.model_swap_ms,
+                "model_queue_ms": self.model_queue_ms,
                 "event_count": len(self.event_kinds),
             },
             "event_kind": event_kind,
@@ -391,11 +611,19 @@ class RunTelemetryRecorder:
             "timing": timing_payload,
             "usage": usage_payload,
             "invocation": invocation_payload,
+            "acknowledgement": self.acknowledgement_payload(),
             "counts": {
                 "phases": len(self.phase_history) + (1 if self.current_phase_started_at is not None else 0),
                 "results": len(self.results),
                 "artifacts": len(self.artifacts),
                 "model_invocations": len(self.invocations),
+                "model_swaps": len(self.model_swaps),
+                "agent_rounds": len(self.agent_rounds),
+                "truncated_invocations": self.truncated_invocation_count,
+                "response_cache_hits": self.response_cache_hits,
+                "response_cache_misses": self.response_cache_misses,
+                "web_cache_hits": self.web_cache_hit_count,
+                "web_cache_misses": self.web_cache_miss_count,
             },
         }
 
@@ -429,6 +657,8 @@ class RunTelemetryRecorder:
             "started_at": to_iso8601(self.started_at),
             "finished_at": to_iso8601(self.finished_at),
             "elapsed_ms": elapsed_ms(self.started_at, completed_at),
+            "first_response_token_at": to_iso8601(self.first_response_token_at),
+            "time_to_first_token_ms": self.time_to_first_token_ms,
             "phase_history": [record.to_payload() for record in self.phase_history],
             "current_phase": self.current_phase,
             "current_phase_detail": self.current_phase_detail,
@@ -439,7 +669,19 @@ class RunTelemetryRecorder:
                 slot_id=self.current_slot_id,
                 parent_activity_key=self.parent_activity_key,
             ).to_payload(),
+            "route": self.route.to_payload() if self.route else {},
+            "acknowledgement": self.acknowledgement_payload(),
             "invocations": [record.to_payload() for record in self.invocations],
+            "model_swaps": [record.to_payload() for record in self.model_swaps],
+            "agent_rounds": [record.to_payload() for record in self.agent_rounds],
+            "model_swap_ms": self.model_swap_ms,
+            "model_queue_ms": self.model_queue_ms,
+            "truncated_invocations": self.truncated_invocation_count,
+            "response_cache": {
+                "hits": self.response_cache_hits,
+                "misses": self.response_cache_misses,
+            },
+            "web_cache": dict(sorted(self.web_cache_lookups.items())),
             "results": [record.to_payload() for record in self.results],
             "artifacts": [record.to_payload() for record in self.artifacts],
             "event_kinds": self.event_kinds,
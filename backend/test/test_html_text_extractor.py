@@ -0,0 +1,57 @@
+import sys
+from pathlib import Path
+
+BACKEND_ROOT = Path(__file__).resolve().parents[1]
+
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+from src.services.html_text_extractor import extract_page_text  # noqa: E402
+
+
+def test_skipped_paragraph_without_end_tag_ends_at_next_paragraph():
+    page_html = "<body><p hidden>x<p>First real paragraph.<p>Second paragraph.</body>"
+
+    assert extract_page_text(page_html) == "First real paragraph.\nSecond paragraph."
+
+
+def test_skipped_paragraph_ends_when_its_parent_closes():
+    page_html = '<div><p class="share">Share this</div><p>Next paragraph.</p>'
+
+    assert extract_page_text(page_html) == "Next paragraph."
+
+
+def test_skipped_list_item_without_end_tag_ends_at_next_item():
+    page_html = '<ul><li class="share">Share<li>Item two real<li>Item three</ul><p>After list paragraph.</p>'
+
+    assert extract_page_text(page_html) == "- Item two real\n- Item three\nAfter list paragraph."
+
+
+def test_skipped_list_item_keeps_skipping_its_nested_list():
+    page_html = '<ul><li class="share">Share<ul><li>Nested one<li>Nested two</ul><li>Real item</ul>'
+
+    assert extract_page_text(page_html) == "- Real item"
+
+
+def test_layout_class_names_are_not_boilerplate():
+    page_html = '<div class="site-content has-sidebar"><article><p>Body text.</p></article></div>'
+
+    assert extract_page_text(page_html) == "Body text."
+
+
+def test_article_title_wrapper_is_kept():
+    page_html = '<article><div class="post-header"><h1>Title</h1></div><p>Body</p></article>'
+
+    assert extract_page_text(page_html) == "# Title\nBody"
+
+
+def test_boilerplate_match_around_main_content_is_undone():
+    page_html = '<div class="menu"><a href="/">Home</a><main><p>Main body.</p></main></div>'
+
+    assert extract_page_text(page_html) == "Main body."
+
+
+def test_widget_class_tokens_are_still_removed():
+    page_html = '<div class="cookie-banner">We use cookies</div><p>Content paragraph.</p><div class="share">Share</div>'
+
+    assert extract_page_text(page_html) == "Content paragraph."
@@ -0,0 +1,89 @@
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+BACKEND_ROOT = Path(__file__).resolve().parents[1]
+
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+from src.app import api  # noqa: E402
+from src.app.ws_events import send_response_delta, send_run_completed  # noqa: E402
+
+
+class RecordingWebSocket:
+    def __init__(self):
+        self.payloads = []
+
+    async def send_json(self, payload):
+        self.payloads.append(payload)
+
+    def event_kinds(self) -> list[str]:
+        return [payload["event_kind"] for payload in self.payloads]
+
+
+class StubRoleSelector:
+    def __init__(self, config):
+        self.config = config
+
+    def resolve_model(self, role_name: str):
+        return None
+
+
+def stream_one_delta(answer_delay_seconds: float):
+    async def handle_query(message, websocket, run_id, session_id, conversation_history, model_manager):
+        await asyncio.sleep(answer_delay_seconds)
+        await send_response_delta(
+            websocket=websocket,
+            run_id=run_id,
+            session_id=session_id,
+            text="Forty-two.",
+        )
+        await send_run_completed(
+            websocket=websocket,
+            run_id=run_id,
+            session_id=session_id,
+        )
+
+    return handle_query
+
+
+def run_socket_message(monkeypatch, acknowledgement_delay_seconds: float, answer_delay_seconds: float) -> RecordingWebSocket:
+    async def resolve_acknowledgement_text(message, model, model_manager):
+        await asyncio.sleep(acknowledgement_delay_seconds)
+        return "Copy that.", "fast_path"
+
+    monkeypatch.setattr(api, "ModelRoleSelector", StubRoleSelector)
+    monkeypatch.setattr(api, "resolve_acknowledgement_text", resolve_acknowledgement_text)
+    monkeypatch.setattr(api, "handle_query", stream_one_delta(answer_delay_seconds))
+    monkeypatch.setattr(api.RunTelemetryRecorder, "persist", lambda recorder: None)
+
+    websocket = RecordingWebSocket()
+    data = json.dumps({"event_kind": "run.create", "session_id": 4242, "payload": {"message": "What is the answer?"}})
+    asyncio.run(api.handle_socket_message(websocket, data, run_id="run-test"))
+    return websocket
+
+
+def test_acknowledgement_arrives_before_streamed_delta(monkeypatch):
+    websocket = run_socket_message(monkeypatch, acknowledgement_delay_seconds=0, answer_delay_seconds=0.05)
+
+    event_kinds = websocket.event_kinds()
+    assert "run.failed" not in event_kinds
+    assert event_kinds.index("assistant.acknowledgement") < event_kinds.index("assistant.response.delta")
+    assert event_kinds[-1] == "run.completed"
+
+    acknowledgement_telemetry = websocket.payloads[-1]["payload"]["telemetry"]["acknowledgement"]
+    assert acknowledgement_telemetry["status"] == "delivered"
+    assert acknowledgement_telemetry["acknowledgement_lead_ms"] > 0
+    assert acknowledgement_telemetry["model_call_avoided"] is True
+
+
+def test_first_delta_cancels_pending_acknowledgement(monkeypatch):
+    websocket = run_socket_message(monkeypatch, acknowledgement_delay_seconds=5, answer_delay_seconds=0)
+
+    event_kinds = websocket.event_kinds()
+    assert "run.failed" not in event_kinds
+    assert "assistant.acknowledgement" not in event_kinds
+    assert event_kinds.count("assistant.response.delta") == 1
+    assert event_kinds[-1] == "run.completed"